@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Pagination par curseur sur la clé primaire : chaque page est une
+    requête `WHERE id > curseur LIMIT n`, de coût constant quelle que soit
+    la profondeur, et stable pendant les insertions.
+    """
+
+    ordering = "pk"
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
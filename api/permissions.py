@@ -0,0 +1,18 @@
+from rest_framework.permissions import BasePermission
+
+from ums.mixins import RoleGroups
+
+
+class HasRole(BasePermission):
+    """Équivalent API de `RolePermissionMixin` : lit `allowed_roles` sur la vue."""
+
+    message = "Vous n'avez pas les autorisations nécessaires."
+
+    def has_permission(self, request, view):
+        user = request.user
+        if not user or not user.is_authenticated:
+            return False
+        if user.is_superuser:
+            return True
+        allowed_roles = getattr(view, "allowed_roles", RoleGroups.ALL_STAFF)
+        return allowed_roles is None or getattr(user, "role", None) in allowed_roles
@@ -0,0 +1,149 @@
+from rest_framework import serializers
+
+from courses.models import Course, CourseOffering
+from enrollment.models import Enrollment
+from fees.models import AcademicFee
+from grades.models import Grade
+from payments.models import Payment
+from students.models import Student
+
+
+class SparseFieldsetMixin:
+    """
+    `?fields=a,b,c` limite la représentation aux champs demandés ; les
+    champs inconnus sont ignorés.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None:
+            return
+        fields = request.query_params.get("fields")
+        if not fields:
+            return
+        wanted = {name.strip() for name in fields.split(",") if name.strip()}
+        for name in set(self.fields) - wanted:
+            self.fields.pop(name)
+
+
+class StudentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    email = serializers.EmailField(source="contact.email", read_only=True, default=None)
+    phone_number = serializers.CharField(source="contact.phone_number", read_only=True, default=None)
+
+    class Meta:
+        model = Student
+        fields = (
+            "id",
+            "matricule",
+            "first_name",
+            "middle_name",
+            "last_name",
+            "gender",
+            "marital_status",
+            "birth_place",
+            "birth_date",
+            "nationality",
+            "email",
+            "phone_number",
+        )
+
+
+class EnrollmentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    matricule = serializers.CharField(source="student.matricule", read_only=True)
+    year_code = serializers.CharField(source="year.code", read_only=True)
+    semester_code = serializers.CharField(source="semester.code", read_only=True)
+    faculty_code = serializers.CharField(source="faculty.code", read_only=True)
+    department_code = serializers.CharField(source="department.code", read_only=True, default=None)
+
+    class Meta:
+        model = Enrollment
+        fields = (
+            "id",
+            "student",
+            "matricule",
+            "year",
+            "year_code",
+            "semester",
+            "semester_code",
+            "faculty",
+            "faculty_code",
+            "department",
+            "department_code",
+            "promotion",
+            "admission_exam",
+            "mutual_affiliate",
+        )
+
+
+class CourseSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Course
+        fields = ("id", "course_name", "course_code", "credits", "cm_hours", "td_hours", "tp_hours", "description")
+
+
+class CourseOfferingSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    course_code = serializers.CharField(source="course.course_code", read_only=True)
+    year_code = serializers.CharField(source="academic_year.code", read_only=True)
+    semester_code = serializers.CharField(source="semester.code", read_only=True)
+
+    class Meta:
+        model = CourseOffering
+        fields = (
+            "id",
+            "course",
+            "course_code",
+            "academic_year",
+            "year_code",
+            "semester",
+            "semester_code",
+            "department",
+            "promotion_name",
+        )
+
+
+class GradeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    matricule = serializers.CharField(source="enrollment.student.matricule", read_only=True)
+    course_code = serializers.CharField(source="course_offering.course.course_code", read_only=True)
+    assessment = serializers.CharField(source="assessment_type.name", read_only=True)
+
+    class Meta:
+        model = Grade
+        fields = (
+            "id",
+            "enrollment",
+            "matricule",
+            "course_offering",
+            "course_code",
+            "assessment_type",
+            "assessment",
+            "score",
+            "grading_date",
+        )
+
+
+class AcademicFeeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    category_name = serializers.CharField(source="category.name", read_only=True)
+    year_code = serializers.CharField(source="year.code", read_only=True)
+    semester_code = serializers.CharField(source="semester.code", read_only=True)
+
+    class Meta:
+        model = AcademicFee
+        fields = ("id", "category", "category_name", "year", "year_code", "semester", "semester_code", "amount")
+
+
+class PaymentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    matricule = serializers.CharField(source="enrollment.student.matricule", read_only=True)
+
+    class Meta:
+        model = Payment
+        fields = (
+            "id",
+            "enrollment",
+            "matricule",
+            "academic_fee",
+            "amount_paid",
+            "payment_method",
+            "payment_date",
+            "receipt_number",
+        )
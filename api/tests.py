@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class ApiDocsAccessTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.staff = User.objects.create_user(
+            email="finance@ums.local", password=None, first_name="A", last_name="B", role="FINANCE"
+        )
+        cls.student = User.objects.create_user(
+            email="etudiant@ums.local", password=None, first_name="C", last_name="D", role="STUDENT"
+        )
+
+    def test_anonymous_and_students_are_refused(self):
+        for name in ("api:schema", "api:docs"):
+            self.assertIn(self.client.get(reverse(name)).status_code, (401, 403))
+        self.client.force_login(self.student)
+        for name in ("api:schema", "api:docs"):
+            self.assertEqual(self.client.get(reverse(name)).status_code, 403)
+
+    def test_staff_reads_docs_by_session_or_token(self):
+        token = RefreshToken.for_user(self.staff).access_token
+        response = self.client.get(reverse("api:schema"), headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(response.status_code, 200)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(reverse("api:docs")).status_code, 200)
+        self.assertEqual(self.client.get(reverse("api:schema")).status_code, 200)
@@ -0,0 +1,35 @@
+from django.urls import include, path
+from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.routers import DefaultRouter
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+
+from . import views
+from .permissions import HasRole
+
+app_name = "api"
+
+router = DefaultRouter()
+router.register("students", views.StudentViewSet)
+router.register("enrollments", views.EnrollmentViewSet)
+router.register("courses", views.CourseViewSet)
+router.register("course-offerings", views.CourseOfferingViewSet)
+router.register("grades", views.GradeViewSet)
+router.register("fees", views.AcademicFeeViewSet)
+router.register("payments", views.PaymentViewSet)
+
+# Schéma et documentation réservés au personnel : jeton JWT, ou session du
+# site pour la page Swagger ouverte dans le navigateur
+DOCS_ACCESS = {
+    "authentication_classes": [JWTAuthentication, SessionAuthentication],
+    "permission_classes": [HasRole],
+}
+
+urlpatterns = [
+    path("auth/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
+    path("auth/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("schema/", SpectacularAPIView.as_view(**DOCS_ACCESS), name="schema"),
+    path("docs/", SpectacularSwaggerView.as_view(url_name="api:schema", **DOCS_ACCESS), name="docs"),
+    path("", include(router.urls)),
+]
@@ -0,0 +1,82 @@
+from rest_framework import viewsets
+
+from courses.models import Course, CourseOffering
+from enrollment.models import Enrollment
+from fees.models import AcademicFee
+from grades.models import Grade
+from payments.models import Payment
+from students.models import Student
+from ums.mixins import RoleGroups
+
+from .pagination import IdCursorPagination
+from .permissions import HasRole
+from .serializers import (
+    AcademicFeeSerializer,
+    CourseOfferingSerializer,
+    CourseSerializer,
+    EnrollmentSerializer,
+    GradeSerializer,
+    PaymentSerializer,
+    StudentSerializer,
+)
+
+
+class BaseReadOnlyViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Lecture seule, paginée par curseur. Les objets liés lus par le
+    sérialiseur sont chargés dans la même requête (`select_related`).
+    """
+
+    permission_classes = [HasRole]
+    pagination_class = IdCursorPagination
+    allowed_roles = RoleGroups.ALL_STAFF
+    query_budget = 4
+
+
+class StudentViewSet(BaseReadOnlyViewSet):
+    queryset = Student.objects.select_related("contact")
+    serializer_class = StudentSerializer
+    allowed_roles = RoleGroups.ACADEMIC
+    filterset_fields = ("matricule", "gender", "nationality")
+
+
+class EnrollmentViewSet(BaseReadOnlyViewSet):
+    queryset = Enrollment.objects.select_related("student", "year", "semester", "faculty", "department")
+    serializer_class = EnrollmentSerializer
+    allowed_roles = RoleGroups.ACADEMIC
+    filterset_fields = ("student", "year", "semester", "faculty", "department", "promotion")
+
+
+class CourseViewSet(BaseReadOnlyViewSet):
+    queryset = Course.objects.all()
+    serializer_class = CourseSerializer
+    allowed_roles = RoleGroups.ACADEMIC
+    filterset_fields = ("course_code",)
+
+
+class CourseOfferingViewSet(BaseReadOnlyViewSet):
+    queryset = CourseOffering.objects.select_related("course", "academic_year", "semester")
+    serializer_class = CourseOfferingSerializer
+    allowed_roles = RoleGroups.ACADEMIC
+    filterset_fields = ("course", "academic_year", "semester", "department", "promotion_name")
+
+
+class GradeViewSet(BaseReadOnlyViewSet):
+    queryset = Grade.objects.select_related("enrollment__student", "course_offering__course", "assessment_type")
+    serializer_class = GradeSerializer
+    allowed_roles = RoleGroups.ACADEMIC
+    filterset_fields = ("enrollment", "course_offering", "assessment_type")
+
+
+class AcademicFeeViewSet(BaseReadOnlyViewSet):
+    queryset = AcademicFee.objects.select_related("category", "year", "semester")
+    serializer_class = AcademicFeeSerializer
+    allowed_roles = RoleGroups.FINANCE
+    filterset_fields = ("category", "year", "semester")
+
+
+class PaymentViewSet(BaseReadOnlyViewSet):
+    queryset = Payment.objects.select_related("enrollment__student")
+    serializer_class = PaymentSerializer
+    allowed_roles = RoleGroups.FINANCE
+    filterset_fields = ("enrollment", "academic_fee", "payment_method", "receipt_number")
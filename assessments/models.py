@@ -5,6 +5,8 @@ class AssessmentType(models.Model):
     name = models.CharField(max_length=50, unique=True)
     is_major = models.BooleanField()
 
+    str_fields = ("name",)
+
     def __str__(self):
         return self.name
 
@@ -16,3 +18,10 @@ class AssessmentWeighting(models.Model):
 
     class Meta:
         unique_together = ("course_offering", "assessment_type")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Cours offert enregistré, pour recalculer l'ancien si la pondération est déplacée
+        instance._saved_course_offering_id = instance.__dict__.get("course_offering_id")
+        return instance
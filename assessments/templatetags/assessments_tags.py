@@ -1,11 +1,10 @@
 from django import template
 
-from assessments.models import AssessmentType
+from core.kpi import kpi_value
 
 register = template.Library()
 
 
 @register.simple_tag
 def total_assessment_types():
-    return AssessmentType.objects.count()
-
+    return kpi_value("total_assessment_types")
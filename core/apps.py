@@ -6,4 +6,7 @@ class CoreConfig(AppConfig):
     name = 'core'
 
     def ready(self):
-        from . import signals  # noqa: F401
\ No newline at end of file
+        from . import signals  # noqa: F401
+        from .kpi import connect_signals
+
+        connect_signals()
@@ -0,0 +1,287 @@
+"""
+Banc d'essai des vues : nombre de requêtes SQL, durée et pic mémoire de
+chaque URL de `ums/urls.py`, mesurés sur un jeu de données de test.
+
+Une vue déclare son plafond de requêtes par l'attribut `query_budget`
+(`DEFAULT_QUERY_BUDGET` sinon). Le plafond ne dépend pas du volume : une
+page de liste ou un PDF qui charge ses objets liés un par un le dépasse dès
+que le jeu de données compte plus de lignes qu'une page. Une réponse en
+erreur (code ≥ 400) fait échouer le banc comme un dépassement.
+
+Chaque URL est appelée à froid (caches vidés) par un super-utilisateur :
+une fois pour compter les requêtes et chronométrer, une seconde fois sous
+`tracemalloc` pour le pic mémoire. Les rapports mis en file (PDF, imports)
+sont rendus dans la requête (`REPORT_JOBS_ASYNC` désactivé) : leur coût est
+compté dans celui de la vue qui les demande.
+"""
+
+from __future__ import annotations
+
+import io
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Iterator, NamedTuple
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, reset_queries
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+DEFAULT_QUERY_BUDGET = 20
+
+SKIPPED_NAMESPACES = ("admin",)
+# Déconnexion : ferme la session du banc ; activation : jeton à usage unique.
+SKIPPED_URLS = ("users:logout", "users:activate")
+
+# Modèle de l'objet passé en `pk` aux vues qui ne déclarent pas `model`.
+PK_MODELS = {
+    "students:student_exit_pdf": "students.Student",
+    "enrollment:enrollment_registration_pdf": "enrollment.Enrollment",
+    "enrollment:enrollment_bulletin_pdf": "enrollment.Enrollment",
+    "payments:payment_receipt_pdf": "payments.Payment",
+    "reports:job_status": "reports.ReportJob",
+    "reports:job_download": "reports.ReportJob",
+}
+KWARG_MODELS = {
+    "offering": "courses.CourseOffering",
+    "assessment": "assessments.AssessmentType",
+}
+
+
+def _promotion_params() -> dict:
+    year = apps.get_model("core.AcademicYear").objects.order_by("pk").first()
+    return {"year": year.pk if year else "", "promotion": "L1"}
+
+
+QUERY_PARAMS: dict[str, Callable[[], dict]] = {
+    "grades:proclamations_pdf": _promotion_params,
+    "enrollment:enrollment_bulletin_batch": _promotion_params,
+}
+
+
+class UrlCase(NamedTuple):
+    name: str
+    path: str
+    view_class: type | None
+    params: dict
+
+
+class Measure(NamedTuple):
+    name: str
+    path: str
+    status: int
+    queries: int
+    budget: int
+    duration_ms: float
+    peak_kib: float
+
+    @property
+    def over_budget(self) -> bool:
+        return self.queries > self.budget
+
+    @property
+    def failed(self) -> bool:
+        """Erreur HTTP : une page en erreur ne mesure rien de ce qu'elle devrait servir."""
+
+        return self.status >= 400
+
+
+def _walk(patterns, namespace: str | None = None) -> Iterator[tuple[str, URLPattern]]:
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _walk(pattern.url_patterns, pattern.namespace or namespace)
+        elif pattern.name:
+            yield (f"{namespace}:{pattern.name}" if namespace else pattern.name), pattern
+
+
+def _view_class(pattern: URLPattern) -> type | None:
+    callback = pattern.callback
+    return getattr(callback, "view_class", None) or getattr(callback, "cls", None)
+
+
+def _handles_get(pattern: URLPattern, view_class: type | None) -> bool:
+    actions = getattr(pattern.callback, "actions", None)
+    if actions is not None:  # ViewSet DRF
+        return "get" in actions
+    return view_class is None or hasattr(view_class, "get")
+
+
+def _object_pk(label: str) -> int | None:
+    return apps.get_model(label).objects.order_by("pk").values_list("pk", flat=True).first()
+
+
+def _kwargs(name: str, pattern: URLPattern, view_class: type | None) -> dict | None:
+    """Arguments de l'URL, pris parmi les objets existants ; None si impossible."""
+
+    kwargs = {}
+    for key in pattern.pattern.regex.groupindex:
+        if key == "format":
+            return None  # variante à suffixe de format des routes DRF
+        if key == "pk":
+            model = PK_MODELS.get(name) or getattr(view_class, "model", None)
+            if model is None and getattr(view_class, "queryset", None) is not None:
+                model = view_class.queryset.model
+            label = model if isinstance(model, str) or model is None else model._meta.label
+        else:
+            label = KWARG_MODELS.get(key)
+        value = _object_pk(label) if label else None
+        if value is None:
+            return None
+        kwargs[key] = value
+    return kwargs
+
+
+def url_cases(only: str | None = None) -> tuple[list[UrlCase], list[str]]:
+    """URL mesurables (méthode GET, arguments résolus) et noms des URL ignorées."""
+
+    cases, skipped = [], []
+    for name, pattern in _walk(get_resolver().url_patterns):
+        if name.split(":")[0] in SKIPPED_NAMESPACES or name in SKIPPED_URLS:
+            continue
+        if only and only not in name:
+            continue
+        view_class = _view_class(pattern)
+        if not _handles_get(pattern, view_class):
+            continue
+        kwargs = _kwargs(name, pattern, view_class)
+        if kwargs is None:
+            if "format" not in pattern.pattern.regex.groupindex:
+                skipped.append(name)
+            continue
+        params = QUERY_PARAMS[name]() if name in QUERY_PARAMS else {}
+        cases.append(UrlCase(name, reverse(name, kwargs=kwargs), view_class, params))
+    return cases, skipped
+
+
+def query_budget(case: UrlCase) -> int:
+    budget = getattr(case.view_class, "query_budget", None)
+    return DEFAULT_QUERY_BUDGET if budget is None else budget
+
+
+def _get(client: Client, case: UrlCase):
+    response = client.get(case.path, case.params)
+    if getattr(response, "streaming", False):
+        for _ in response.streaming_content:
+            pass
+    response.close()
+    return response
+
+
+def measure(client: Client, case: UrlCase, cache_root: str, trace_memory: bool = True) -> Measure:
+    """Mesure une URL ; sans `trace_memory`, pas de second appel et un pic mémoire nul."""
+
+    # Le journal des requêtes est borné : plein, il ne compterait plus rien.
+    reset_queries()
+    cache.clear()
+    with override_settings(PDF_CACHE_DIR=tempfile.mkdtemp(dir=cache_root), REPORT_JOBS_ASYNC=False):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = _get(client, case)
+            duration = time.perf_counter() - start
+
+    peak = 0
+    if trace_memory:
+        cache.clear()
+        with override_settings(PDF_CACHE_DIR=tempfile.mkdtemp(dir=cache_root), REPORT_JOBS_ASYNC=False):
+            tracemalloc.start()
+            try:
+                _get(client, case)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+    return Measure(
+        name=case.name,
+        path=case.path,
+        status=response.status_code,
+        queries=len(queries.captured_queries),
+        budget=query_budget(case),
+        duration_ms=duration * 1000,
+        peak_kib=peak / 1024,
+    )
+
+
+def _superuser():
+    User = get_user_model()
+    user = User.objects.filter(is_superuser=True).order_by("pk").first()
+    if user is None:
+        user = User.objects.create_superuser(
+            email="benchmark@ums.local", password=None, first_name="Banc", last_name="Essai"
+        )
+    return user
+
+
+def benchmark_client() -> Client:
+    """Client connecté en super-utilisateur, par session et par jeton JWT (API)."""
+
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    user = _superuser()
+    client = Client(headers={"Authorization": f"Bearer {RefreshToken.for_user(user).access_token}"})
+    client.force_login(user)
+    return client
+
+
+def build_dataset(students: int = 40) -> None:
+    """
+    Jeu de données de test réduit mais complet : celui de `core.seeding` (une
+    promotion, chaque liste dépasse une page), complété de ce que le
+    générateur ne crée pas, pour que chaque vue de détail ou PDF ait un objet
+    lié à tous ses modèles.
+    """
+
+    from enrollment.models import Document, Enrollment, SecondaryChoice
+    from payments.models import Payment
+    from payments.reconciliation import reconcile_statement
+    from reports.jobs import enqueue
+    from students.models import Sponsor, StudentSponsor
+
+    from .seeding import SeedVolumes, seed
+
+    admin = _superuser()
+    seed(
+        SeedVolumes(
+            faculties=1,
+            departments=1,
+            promotions=1,
+            courses=3,
+            students=students,
+            payments=2,
+            expenses=students,
+            professors=1,
+            cashiers=1,
+        )
+    )
+    enrollments = list(Enrollment.objects.order_by("pk"))
+    sponsor = Sponsor.objects.create(
+        sponsor_type="Entreprise", organization="Mécène", phone_number="0800000000", address="Kinshasa"
+    )
+    StudentSponsor.objects.bulk_create(
+        [StudentSponsor(student_id=student_id, sponsor=sponsor) for student_id in {e.student_id for e in enrollments}]
+    )
+    SecondaryChoice.objects.bulk_create(
+        [
+            SecondaryChoice(
+                enrollment=enrollment,
+                faculty_id=enrollment.faculty_id,
+                department_id=enrollment.department_id,
+                promotion=enrollment.promotion,
+            )
+            for enrollment in enrollments
+        ]
+    )
+    Document.objects.bulk_create(
+        [Document(enrollment=enrollment, document_name="Diplôme", is_required=True) for enrollment in enrollments]
+    )
+    with override_settings(REPORT_JOBS_ASYNC=False):
+        enqueue("proclamation", _promotion_params(), admin)
+
+    statement = "date;amount;reference\n" + "".join(
+        f"{payment.payment_date:%Y-%m-%d};{payment.amount_paid};{payment.receipt_number}\n"
+        for payment in Payment.objects.order_by("pk")
+    )
+    reconcile_statement(io.BytesIO(statement.encode()), "releve.csv", imported_by=admin)
@@ -0,0 +1,117 @@
+"""
+Compteurs du tableau de bord (KPI) servis depuis le cache.
+
+Chaque indicateur déclare les modèles dont il dépend : un enregistrement ou
+une suppression sur l'un d'eux efface la valeur en cache au commit de la
+transaction, et la prochaine lecture la recalcule. `KPI_CACHE_TIMEOUT` borne
+l'obsolescence pour les écritures qui ne déclenchent pas de signal
+(`update()`, `bulk_create()`) et pour les caches locaux à un processus.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, NamedTuple
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from ums.db_router import use_replica
+
+CACHE_PREFIX = "kpi:"
+
+
+class KPI(NamedTuple):
+    compute: Callable[[], object]
+    models: tuple[str, ...]
+    # Partie variable de la clé (ex. l'année pour un cumul annuel)
+    vary: Callable[[], object] | None = None
+
+    def cache_key(self, name: str) -> str:
+        if self.vary is None:
+            return f"{CACHE_PREFIX}{name}"
+        return f"{CACHE_PREFIX}{name}:{self.vary()}"
+
+
+def _count(model_label: str) -> Callable[[], int]:
+    return lambda: apps.get_model(model_label).objects.count()
+
+
+def _total(model_label: str, field: str) -> Callable[[], object]:
+    return lambda: apps.get_model(model_label).objects.aggregate(total=Sum(field))["total"] or 0
+
+
+def _payments_current_year():
+    now = timezone.now()
+    start = now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    total = (
+        apps.get_model("payments.Payment")
+        .objects.filter(payment_date__gte=start)
+        .aggregate(total=Sum("amount_paid"))["total"]
+    )
+    return total or 0
+
+
+KPIS: dict[str, KPI] = {
+    "total_academic_years": KPI(_count("core.AcademicYear"), ("core.AcademicYear",)),
+    "total_semesters": KPI(_count("core.Semester"), ("core.Semester",)),
+    "total_faculties": KPI(_count("core.Faculty"), ("core.Faculty",)),
+    "total_departments": KPI(_count("core.Department"), ("core.Department",)),
+    "total_students": KPI(_count("students.Student"), ("students.Student",)),
+    "total_courses": KPI(_count("courses.Course"), ("courses.Course",)),
+    "total_course_offerings": KPI(_count("courses.CourseOffering"), ("courses.CourseOffering",)),
+    "total_enrollments": KPI(_count("enrollment.Enrollment"), ("enrollment.Enrollment",)),
+    "total_assessment_types": KPI(_count("assessments.AssessmentType"), ("assessments.AssessmentType",)),
+    "total_grades": KPI(_count("grades.Grade"), ("grades.Grade",)),
+    "total_assignments": KPI(_count("staff.CourseAssignment"), ("staff.CourseAssignment",)),
+    "total_academic_fee_records": KPI(_count("fees.AcademicFee"), ("fees.AcademicFee",)),
+    "total_academic_fee_amount": KPI(_total("fees.AcademicFee", "amount"), ("fees.AcademicFee",)),
+    "total_expenses_amount": KPI(_total("expenses.Expense", "amount"), ("expenses.Expense",)),
+    "total_payments": KPI(_count("payments.Payment"), ("payments.Payment",)),
+    "payments_current_year": KPI(
+        _payments_current_year, ("payments.Payment",), vary=lambda: timezone.now().year
+    ),
+    "total_users": KPI(lambda: get_user_model().objects.count(), (settings.AUTH_USER_MODEL,)),
+}
+
+
+def kpi_value(name: str):
+    """Valeur de l'indicateur `name`, recalculée (sur le réplica) seulement si absente du cache."""
+
+    kpi = KPIS[name]
+    key = kpi.cache_key(name)
+    value = cache.get(key)
+    if value is None:
+        with use_replica():
+            value = kpi.compute()
+        cache.set(key, value, settings.KPI_CACHE_TIMEOUT)
+    return value
+
+
+def invalidate(*names: str) -> None:
+    cache.delete_many([KPIS[name].cache_key(name) for name in names])
+
+
+def _dependents() -> dict[type, tuple[str, ...]]:
+    dependents: dict[type, list[str]] = {}
+    for name, kpi in KPIS.items():
+        for label in kpi.models:
+            dependents.setdefault(apps.get_model(label), []).append(name)
+    return {model: tuple(names) for model, names in dependents.items()}
+
+
+def connect_signals() -> None:
+    """Branche l'invalidation sur chaque modèle suivi (appelé depuis `CoreConfig.ready`)."""
+
+    for model, names in _dependents().items():
+
+        def handler(sender, names=names, **kwargs):
+            transaction.on_commit(lambda: invalidate(*names))
+
+        post_save.connect(handler, sender=model, weak=False, dispatch_uid=f"kpi:{model._meta.label}:save")
+        post_delete.connect(handler, sender=model, weak=False, dispatch_uid=f"kpi:{model._meta.label}:delete")
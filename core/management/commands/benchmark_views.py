@@ -0,0 +1,74 @@
+import json
+import shutil
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.benchmark import benchmark_client, build_dataset, measure, url_cases
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure chaque vue (requêtes SQL, durée, pic mémoire) sur une base de test "
+        "jetable et échoue si une vue répond en erreur ou dépasse son plafond de requêtes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--only", help="Ne mesure que les URL dont le nom contient ce texte.")
+        parser.add_argument(
+            "--students", type=int, default=40, help="Étudiants du jeu de données (défaut : 40)."
+        )
+        parser.add_argument("--json", help="Fichier où écrire les mesures au format JSON.")
+
+    def handle(self, *args, **options):
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        workdir = tempfile.mkdtemp(prefix="ums-benchmark-")
+        setup_test_environment()
+        databases = runner.setup_databases()
+        try:
+            with override_settings(MEDIA_ROOT=workdir):
+                build_dataset(students=options["students"])
+                cases, skipped = url_cases(options["only"])
+                client = benchmark_client()
+                client.get("/")  # chargement des modules et des gabarits hors mesure
+                results = [measure(client, case, workdir) for case in cases]
+        finally:
+            runner.teardown_databases(databases)
+            teardown_test_environment()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        width = max((len(result.name) for result in results), default=10)
+        self.stdout.write(f"{'vue':<{width}}  code  requêtes       ms      Kio")
+        for result in results:
+            line = (
+                f"{result.name:<{width}}  {result.status:>4}  {result.queries:>3}/{result.budget:<4}"
+                f"  {result.duration_ms:>7.1f}  {result.peak_kib:>7.0f}"
+            )
+            self.stdout.write(self.style.ERROR(line) if result.over_budget or result.failed else line)
+        if skipped:
+            self.stdout.write(f"Non mesurées (aucun objet pour les arguments) : {', '.join(skipped)}")
+
+        if options["json"]:
+            with open(options["json"], "w", encoding="utf-8") as output:
+                json.dump(
+                    [
+                        {**result._asdict(), "over_budget": result.over_budget, "failed": result.failed}
+                        for result in results
+                    ],
+                    output,
+                    indent=2,
+                )
+
+        errors = []
+        failed = [f"{result.name} ({result.status})" for result in results if result.failed]
+        if failed:
+            errors.append(f"Réponse en erreur : {', '.join(failed)}.")
+        over = [result.name for result in results if result.over_budget]
+        if over:
+            errors.append(f"Plafond de requêtes dépassé : {', '.join(over)}.")
+        if errors:
+            raise CommandError(" ".join(errors))
+        self.stdout.write(self.style.SUCCESS(f"{len(results)} vue(s) dans leur plafond de requêtes."))
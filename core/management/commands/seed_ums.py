@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.seeding import PROMOTIONS, SeedVolumes, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère un jeu de données synthétique (étudiants, inscriptions, notes, paiements, "
+        "dépenses) pour les tests de charge. Ex. : --students 100000 produit environ 5M de notes."
+    )
+
+    def add_arguments(self, parser):
+        defaults = SeedVolumes()
+        parser.add_argument("--seed", type=int, default=42, help="Graine du tirage (défaut : 42).")
+        parser.add_argument("--students", type=int, default=defaults.students, help="Nombre d'étudiants.")
+        parser.add_argument(
+            "--years", type=int, default=defaults.years, help="Années académiques, jusqu'à la courante."
+        )
+        parser.add_argument("--faculties", type=int, default=defaults.faculties, help="Nombre de facultés.")
+        parser.add_argument(
+            "--departments", type=int, default=defaults.departments, help="Départements par faculté."
+        )
+        parser.add_argument("--promotions", type=int, default=defaults.promotions, help="Promotions (L1 à M2).")
+        parser.add_argument(
+            "--courses", type=int, default=defaults.courses, help="Cours par département, promotion et semestre."
+        )
+        parser.add_argument(
+            "--payments", type=int, default=defaults.payments, help="Paiements par inscription, au plus."
+        )
+        parser.add_argument("--expenses", type=int, default=defaults.expenses, help="Dépenses par année.")
+        parser.add_argument("--professors", type=int, default=defaults.professors, help="Comptes enseignants.")
+        parser.add_argument("--cashiers", type=int, default=defaults.cashiers, help="Comptes caissiers.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Étudiants écrits par transaction.")
+
+    def handle(self, *args, **options):
+        volumes = SeedVolumes(**{field: options[field] for field in SeedVolumes._fields})
+        if any(value < 0 for value in volumes) or not 1 <= volumes.promotions <= len(PROMOTIONS):
+            raise CommandError(f"Volumes invalides : valeurs positives, de 1 à {len(PROMOTIONS)} promotions.")
+        required = ("years", "faculties", "departments", "courses", "professors", "cashiers")
+        if any(getattr(volumes, field) < 1 for field in required):
+            raise CommandError(f"Au moins une unité requise pour : {', '.join(required)}.")
+
+        self.stdout.write(f"Génération de {volumes.students} étudiant(s) et {volumes.grades} note(s)…")
+        started = time.perf_counter()
+        counts = seed(volumes, random_seed=options["seed"], batch_size=options["batch_size"], log=self.stdout.write)
+        for label, count in counts.items():
+            self.stdout.write(f"  {label} : {count}")
+        self.stdout.write(self.style.SUCCESS(f"Jeu de données généré en {time.perf_counter() - started:.0f} s."))
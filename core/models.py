@@ -4,6 +4,8 @@ class AcademicYear(models.Model):
     name = models.CharField(max_length=100, unique=True)
     code = models.CharField(max_length=5, unique=True)
 
+    str_fields = ("name",)
+
     def __str__(self):
         return self.name
 
@@ -12,6 +14,8 @@ class Semester(models.Model):
     name = models.CharField(max_length=100, unique=True)
     code = models.CharField(max_length=5, unique=True)
 
+    str_fields = ("name",)
+
     def __str__(self):
         return self.name
 
@@ -20,6 +24,8 @@ class Faculty(models.Model):
     name = models.CharField(max_length=100, unique=True)
     code = models.CharField(max_length=5, unique=True)
 
+    str_fields = ("name",)
+
     def __str__(self):
         return self.name
 
@@ -32,5 +38,7 @@ class Department(models.Model):
     class Meta:
         unique_together = ("faculty", "name")
 
+    str_fields = ("name", "faculty")
+
     def __str__(self):
         return f"{self.name} - {self.faculty}"
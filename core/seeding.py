@@ -0,0 +1,458 @@
+"""
+Jeu de données synthétique pour les tests de charge et le profilage
+(`manage.py seed_ums`).
+
+Les données de référence (années, facultés, cours offerts, frais, comptes
+des enseignants et caissiers) sont retrouvées ou créées : relancer la
+commande les réutilise. Les volumes (étudiants et leurs fiches, inscriptions,
+notes, paiements, dépenses) sont ajoutés par lots d'étudiants, un lot par
+transaction, en `bulk_create`.
+
+`bulk_create` ne passe ni par `save()` ni par les signaux : les matricules et
+les numéros de reçu sont réservés sur leurs compteurs, et les résultats LMD
+et les soldes des inscriptions du lot sont recalculés avant le lot suivant.
+Les comptes des étudiants ne sont pas créés (`manage.py provision_accounts`).
+
+Le tirage est déterministe : la même graine sur une base vide produit les
+mêmes données.
+"""
+
+from __future__ import annotations
+
+import datetime
+import random
+from collections import Counter, defaultdict
+from decimal import Decimal
+from typing import Callable, NamedTuple
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from assessments.models import AssessmentType, AssessmentWeighting
+from courses.models import Course, CourseOffering
+from enrollment.models import Enrollment
+from expenses.models import Expense, ExpenseCategory
+from fees.models import AcademicFee, FeeCategory
+from grades.models import Grade
+from grades.results import refresh_results
+from payments.balances import refresh_balances
+from payments.models import Payment, receipt_prefix, reserve_receipt_numbers
+from staff.models import CourseAssignment
+from students.models import Address, Contact, Diploma, Parent, Student, reserve_matricules
+
+from .kpi import KPIS, invalidate
+from .models import AcademicYear, Department, Faculty, Semester
+
+PROMOTIONS = ("L1", "L2", "L3", "M1", "M2")
+SEMESTERS = (("Semestre 1", "S1"), ("Semestre 2", "S2"))
+# Nom, examen principal, pondération (%)
+ASSESSMENTS = (("Travaux pratiques", False, 40), ("Examen", True, 60))
+FEES = (("Minerval", 350), ("Frais de laboratoire", 60), ("Enrôlement", 25))
+EXPENSE_CATEGORIES = ("Fournitures", "Entretien", "Salaires", "Énergie", "Missions")
+PAYMENT_METHODS = ("Banque", "Mobile money", "Caisse")
+
+FIRST_NAMES = (
+    "Grâce", "Patrick", "Merveille", "Jonathan", "Divine", "Christian", "Exaucée", "Junior",
+    "Sarah", "Glody", "Ruth", "Emmanuel", "Prisca", "Dieumerci", "Naomie", "Héritier",
+)
+LAST_NAMES = (
+    "Mbuyi", "Kasongo", "Ilunga", "Mukendi", "Kalala", "Ngoy", "Mutombo", "Kabongo",
+    "Nzuzi", "Makiese", "Lukusa", "Mbala", "Tshibanda", "Kanku", "Lusamba", "Bokele",
+)
+COMMUNES = ("Gombe", "Lemba", "Limete", "Ngaliema", "Kintambo", "Matete", "Bandalungwa", "Masina")
+
+# Notes par demi-point, tirées autour de 58/100
+SCORES = [Decimal(value) / 2 for value in range(201)]
+PAYMENT_AMOUNTS = [Decimal(value) for value in (25, 50, 75, 100, 150, 200)]
+
+
+class SeedVolumes(NamedTuple):
+    years: int = 1
+    faculties: int = 4
+    departments: int = 3  # par faculté
+    promotions: int = 3
+    courses: int = 12  # par département, promotion et semestre
+    students: int = 1000
+    payments: int = 3  # par inscription, au plus
+    expenses: int = 500  # par année
+    professors: int = 40
+    cashiers: int = 4
+
+    @property
+    def grades(self) -> int:
+        """Nombre de notes produites (chaque étudiant est inscrit à chaque semestre de chaque année)."""
+
+        return self.students * self.years * len(SEMESTERS) * self.courses * len(ASSESSMENTS)
+
+
+def _ensure(model, key_fields: tuple[str, ...], rows: list[dict]) -> list:
+    """
+    Objets de référence, dans l'ordre de `rows` (valeurs par nom de colonne) :
+    ceux dont la clé `key_fields` existe déjà sont relus, les autres créés en
+    une requête.
+    """
+
+    def key(values) -> tuple:
+        return tuple(values[field] for field in key_fields)
+
+    first = key_fields[0]
+    existing = model.objects.filter(**{f"{first}__in": {values[first] for values in rows}})
+    objects = {tuple(getattr(obj, field) for field in key_fields): obj for obj in existing}
+    missing = [model(**values) for values in rows if key(values) not in objects]
+    for obj in model.objects.bulk_create(missing):
+        objects[tuple(getattr(obj, field) for field in key_fields)] = obj
+    return [objects[key(values)] for values in rows]
+
+
+def _users(role: str, label: str, count: int) -> list:
+    """Comptes sans mot de passe utilisable, retrouvés par adresse."""
+
+    rows = [
+        {
+            "email": f"{label}{index:03d}@seed.ums.local",
+            "password": make_password(None),
+            "first_name": label.title(),
+            "last_name": f"{index:03d}",
+            "role": role,
+        }
+        for index in range(1, count + 1)
+    ]
+    return _ensure(get_user_model(), ("email",), rows)
+
+
+class Reference(NamedTuple):
+    years: list
+    semesters: list
+    departments: list
+    offerings: dict  # (année, semestre, département, promotion) -> [(cours offert, enseignant)]
+    assessment_types: list
+    fees: dict  # (année, semestre) -> [frais]
+    expense_categories: list
+    cashiers: list
+
+
+def reference_data(volumes: SeedVolumes) -> Reference:
+    now = timezone.now()
+    current = now.year if now.month >= 8 else now.year - 1
+    years = _ensure(
+        AcademicYear,
+        ("code",),
+        [
+            {"code": f"{start % 100:02d}{(start + 1) % 100:02d}", "name": f"{start}-{start + 1}"}
+            for start in range(current - volumes.years + 1, current + 1)
+        ],
+    )
+    semesters = _ensure(Semester, ("code",), [{"code": code, "name": name} for name, code in SEMESTERS])
+    faculties = _ensure(
+        Faculty,
+        ("code",),
+        [{"code": f"F{index:02d}", "name": f"Faculté {index:02d}"} for index in range(1, volumes.faculties + 1)],
+    )
+    departments = _ensure(
+        Department,
+        ("faculty_id", "name"),
+        [
+            {
+                "faculty_id": faculty.pk,
+                "name": f"Département {faculty.code}-{index:02d}",
+                "code": f"{faculty.code[1:]}{index:02d}",
+            }
+            for faculty in faculties
+            for index in range(1, volumes.departments + 1)
+        ],
+    )
+    promotions = PROMOTIONS[: volumes.promotions]
+    # Un cours par département, promotion, semestre et rang ; offert chaque année.
+    slots = [
+        (department, promotion, semester, f"{department.code}{promotion}{semester.code}{index:02d}")
+        for department in departments
+        for promotion in promotions
+        for semester in semesters
+        for index in range(1, volumes.courses + 1)
+    ]
+    courses = _ensure(
+        Course,
+        ("course_code",),
+        [
+            {"course_code": code, "course_name": f"Cours {code}", "credits": 2 + int(code[-2:]) % 5, "cm_hours": 30}
+            for _, _, _, code in slots
+        ],
+    )
+    offerings = _ensure(
+        CourseOffering,
+        ("course_id", "academic_year_id", "semester_id", "department_id", "promotion_name"),
+        [
+            {
+                "course_id": course.pk,
+                "academic_year_id": year.pk,
+                "semester_id": semester.pk,
+                "department_id": department.pk,
+                "promotion_name": promotion,
+            }
+            for year in years
+            for (department, promotion, semester, _), course in zip(slots, courses)
+        ],
+    )
+
+    assessment_types = _ensure(
+        AssessmentType, ("name",), [{"name": name, "is_major": is_major} for name, is_major, _ in ASSESSMENTS]
+    )
+    weights = {name: weight for name, _, weight in ASSESSMENTS}
+    AssessmentWeighting.objects.bulk_create(
+        [
+            AssessmentWeighting(
+                course_offering=offering,
+                assessment_type=assessment_type,
+                weight_percentage=weights[assessment_type.name],
+            )
+            for offering in offerings
+            for assessment_type in assessment_types
+        ],
+        ignore_conflicts=True,
+    )
+
+    professors = _users("PROFESSOR", "professeur", volumes.professors)
+    teachers = {offering.pk: professors[index % len(professors)].pk for index, offering in enumerate(offerings)}
+    CourseAssignment.objects.bulk_create(
+        [
+            CourseAssignment(course_offering_id=offering_id, teacher_id=teacher_id, assignment_role="Titulaire")
+            for offering_id, teacher_id in teachers.items()
+        ],
+        ignore_conflicts=True,
+    )
+    by_group = defaultdict(list)
+    for offering in offerings:
+        key = (offering.academic_year_id, offering.semester_id, offering.department_id, offering.promotion_name)
+        by_group[key].append((offering.pk, teachers[offering.pk]))
+
+    categories = _ensure(FeeCategory, ("name",), [{"name": name} for name, _ in FEES])
+    fees = defaultdict(list)
+    fee_rows = [
+        {"category_id": category.pk, "year_id": year.pk, "semester_id": semester.pk, "amount": amount}
+        for category, (_, amount) in zip(categories, FEES)
+        for year in years
+        for semester in semesters
+    ]
+    for fee in _ensure(AcademicFee, ("category_id", "year_id", "semester_id"), fee_rows):
+        fees[(fee.year_id, fee.semester_id)].append(fee)
+
+    return Reference(
+        years=years,
+        semesters=semesters,
+        departments=departments,
+        offerings=dict(by_group),
+        assessment_types=assessment_types,
+        fees=dict(fees),
+        expense_categories=_ensure(ExpenseCategory, ("name",), [{"name": name} for name in EXPENSE_CATEGORIES]),
+        cashiers=_users("FINANCE", "caissier", volumes.cashiers),
+    )
+
+
+def _start_year(year: AcademicYear) -> int:
+    """Année civile de la rentrée, d'après le code ('2526' pour 2025-2026)."""
+
+    return 2000 + int(year.code[:2])
+
+
+def _matricule_year(year: AcademicYear) -> str:
+    return f"{year.code[:2]}/{year.code[2:]}"
+
+
+def _grading_date(year: AcademicYear, semester_index: int) -> datetime.date:
+    return datetime.date(_start_year(year) + 1, 1 if semester_index == 0 else 6, 25)
+
+
+def _students(rng: random.Random, count: int, year: AcademicYear, counts: Counter) -> list[Student]:
+    matricules = reserve_matricules(count, _matricule_year(year))
+    addresses, contacts, diplomas, fathers, mothers = [], [], [], [], []
+    for matricule in matricules:
+        last_name = rng.choice(LAST_NAMES)
+        commune = rng.choice(COMMUNES)
+        addresses.append(Address(street=f"Avenue {rng.randint(1, 300)}", quarter="Quartier 1", city_commune=commune))
+        contacts.append(
+            Contact(phone_number=f"08{rng.randrange(10**8):08d}", email=f"{matricule.replace('/', '-')}@seed.ums.local")
+        )
+        diplomas.append(
+            Diploma(
+                institution=f"Institut {commune}",
+                obtaining_year=str(_start_year(year) - rng.randint(0, 2)),
+                diploma_number=f"EX{rng.randrange(10**7):07d}",
+                section=rng.choice(("Scientifique", "Commerciale", "Littéraire", "Pédagogique")),
+                percentage=Decimal(rng.randint(5000, 8500)) / 100,
+            )
+        )
+        for parents, first_names in ((fathers, FIRST_NAMES[1::2]), (mothers, FIRST_NAMES[::2])):
+            parents.append(
+                Parent(
+                    first_name=rng.choice(first_names),
+                    middle_name="",
+                    last_name=last_name,
+                    origin_country="RDC",
+                    province="Kinshasa",
+                    address=commune,
+                    phone_number=f"09{rng.randrange(10**8):08d}",
+                )
+            )
+    for model, objects in ((Address, addresses), (Contact, contacts), (Diploma, diplomas), (Parent, fathers + mothers)):
+        model.objects.bulk_create(objects)
+        counts[model._meta.label] += len(objects)
+
+    students = [
+        Student(
+            matricule=matricule,
+            first_name=rng.choice(FIRST_NAMES),
+            middle_name=rng.choice(LAST_NAMES),
+            last_name=father.last_name,
+            gender=rng.choice(("masculin", "feminin")),
+            marital_status="Célibataire",
+            birth_place="Kinshasa",
+            birth_date=datetime.date(_start_year(year) - 18, 1, 1) - datetime.timedelta(days=rng.randrange(2500)),
+            address=address,
+            contact=contact,
+            diploma=diploma,
+            father=father,
+            mother=mother,
+        )
+        for matricule, address, contact, diploma, father, mother in zip(
+            matricules, addresses, contacts, diplomas, fathers, mothers
+        )
+    ]
+    Student.objects.bulk_create(students)
+    counts[Student._meta.label] += len(students)
+    return students
+
+
+def _payments(
+    rng: random.Random, enrollments: list[Enrollment], reference: Reference, per_enrollment: int
+) -> list[Payment]:
+    by_cashier: dict[tuple[str, int], list[Payment]] = defaultdict(list)
+    codes = {year.pk: year.code for year in reference.years}
+    for enrollment in enrollments:
+        fees = reference.fees[(enrollment.year_id, enrollment.semester_id)]
+        for _ in range(rng.randint(0, per_enrollment)):
+            cashier = rng.choice(reference.cashiers)
+            payment = Payment(
+                enrollment=enrollment,
+                academic_fee=rng.choice(fees),
+                amount_paid=rng.choice(PAYMENT_AMOUNTS),
+                payment_method=rng.choice(PAYMENT_METHODS),
+                recorded_by=cashier,
+            )
+            by_cashier[(codes[enrollment.year_id], cashier.pk)].append(payment)
+    payments = []
+    for (code, cashier_id), batch in sorted(by_cashier.items()):
+        for payment, number in zip(batch, reserve_receipt_numbers(receipt_prefix(code, cashier_id), len(batch))):
+            payment.receipt_number = number
+        payments += batch
+    return payments
+
+
+def _spread_payment_dates(rng: random.Random, payments: list[Payment], years: dict[int, AcademicYear]) -> None:
+    """`payment_date` est posé à l'insertion : les dates sont réparties ensuite, une requête par jour."""
+
+    by_day: dict[datetime.datetime, list[int]] = defaultdict(list)
+    for payment in payments:
+        start = _start_year(years[payment.academic_fee.year_id])
+        day = datetime.datetime(start, 9, 1, 10) + datetime.timedelta(days=rng.randrange(300))
+        by_day[timezone.make_aware(day)].append(payment.pk)
+    for day, ids in by_day.items():
+        Payment.objects.filter(pk__in=ids).update(payment_date=day)
+
+
+def seed(
+    volumes: SeedVolumes,
+    random_seed: int = 42,
+    batch_size: int = 1000,
+    log: Callable[[str], None] | None = None,
+) -> Counter:
+    """Génère le jeu de données ; retourne le nombre de lignes créées par modèle."""
+
+    rng = random.Random(random_seed)
+    counts: Counter[str] = Counter()
+    with transaction.atomic():
+        reference = reference_data(volumes)
+    years = {year.pk: year for year in reference.years}
+    semester_indexes = {semester.pk: index for index, semester in enumerate(reference.semesters)}
+    promotions = PROMOTIONS[: volumes.promotions]
+
+    for start in range(0, volumes.students, batch_size):
+        size = min(batch_size, volumes.students - start)
+        with transaction.atomic():
+            students = _students(rng, size, reference.years[0], counts)
+            enrollments = []
+            for student in students:
+                department = rng.choice(reference.departments)
+                level = rng.randrange(len(promotions))
+                for year_index, year in enumerate(reference.years):
+                    for semester in reference.semesters:
+                        enrollments.append(
+                            Enrollment(
+                                student=student,
+                                year=year,
+                                semester=semester,
+                                faculty_id=department.faculty_id,
+                                department=department,
+                                promotion=promotions[min(level + year_index, len(promotions) - 1)],
+                                how_known=rng.choice(("Radio", "Ancien étudiant", "Internet", "Église")),
+                                why_chosen="Vocation",
+                                commitments_accepted=True,
+                            )
+                        )
+            Enrollment.objects.bulk_create(enrollments)
+
+            grades = []
+            for enrollment in enrollments:
+                grading_date = _grading_date(years[enrollment.year_id], semester_indexes[enrollment.semester_id])
+                key = (enrollment.year_id, enrollment.semester_id, enrollment.department_id, enrollment.promotion)
+                ability = rng.gauss(116, 20)
+                for offering_id, teacher_id in reference.offerings[key]:
+                    for assessment_type in reference.assessment_types:
+                        grades.append(
+                            Grade(
+                                enrollment_id=enrollment.pk,
+                                course_offering_id=offering_id,
+                                assessment_type_id=assessment_type.pk,
+                                score=SCORES[min(200, max(0, int(rng.gauss(ability, 25))))],
+                                grading_date=grading_date,
+                                recorded_by_id=teacher_id,
+                            )
+                        )
+            Grade.objects.bulk_create(grades, batch_size=batch_size * 5)
+
+            payments = _payments(rng, enrollments, reference, volumes.payments)
+            Payment.objects.bulk_create(payments, batch_size=batch_size * 5)
+            _spread_payment_dates(rng, payments, years)
+
+            enrollment_ids = [enrollment.pk for enrollment in enrollments]
+            refresh_results(enrollment_ids)
+            refresh_balances(enrollment_ids)
+
+        counts[Enrollment._meta.label] += len(enrollments)
+        counts[Grade._meta.label] += len(grades)
+        counts[Payment._meta.label] += len(payments)
+        if log:
+            log(f"{start + size}/{volumes.students} étudiants, {counts[Grade._meta.label]} notes")
+
+    for year in reference.years:
+        prefix = f"DEP-{year.code}-"
+        offset = Expense.objects.filter(reference_number__startswith=prefix).count()
+        start_year = _start_year(year)
+        expenses = [
+            Expense(
+                category=rng.choice(reference.expense_categories),
+                year=year,
+                expense_date=datetime.date(start_year, 9, 1) + datetime.timedelta(days=rng.randrange(300)),
+                amount=Decimal(rng.randint(1000, 500000)) / 100,
+                description="Dépense générée",
+                reference_number=f"{prefix}{offset + index:06d}",
+                beneficiary=rng.choice(reference.cashiers),
+            )
+            for index in range(1, volumes.expenses + 1)
+        ]
+        Expense.objects.bulk_create(expenses, batch_size=batch_size)
+        counts[Expense._meta.label] += len(expenses)
+
+    invalidate(*KPIS)
+    return counts
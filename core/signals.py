@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
 from django.db.models.signals import pre_save
 from django.dispatch import receiver
 
@@ -32,3 +34,13 @@ def department_pre_save(sender, instance, **kwargs):
     if instance.name:
         instance.name = instance.name.strip()
 
+
+@receiver(connection_created)
+def sqlite_connection_created(sender, connection, **kwargs):
+    """Réglages `SQLITE_PRAGMAS` (WAL, attente du verrou…) de chaque nouvelle connexion SQLite."""
+
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
@@ -1,26 +1,25 @@
 from django import template
 
-from core.models import AcademicYear, Department, Faculty, Semester
+from core.kpi import kpi_value
 
 register = template.Library()
 
 
 @register.simple_tag
 def total_academic_years():
-    return AcademicYear.objects.count()
+    return kpi_value("total_academic_years")
 
 
 @register.simple_tag
 def total_semesters():
-    return Semester.objects.count()
+    return kpi_value("total_semesters")
 
 
 @register.simple_tag
 def total_faculties():
-    return Faculty.objects.count()
+    return kpi_value("total_faculties")
 
 
 @register.simple_tag
 def total_departments():
-    return Department.objects.count()
-
+    return kpi_value("total_departments")
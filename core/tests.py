@@ -1,3 +1,414 @@
-from django.test import TestCase
+import io
+import os
+import runpy
+import shutil
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+import django
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connection, connections, models, transaction
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from openpyxl import load_workbook
+
+from core.benchmark import benchmark_client, build_dataset, measure, url_cases
+from core.kpi import KPIS, kpi_value
+from core.models import Faculty
+from core.seeding import SeedVolumes, seed
+from enrollment.models import Enrollment
+from expenses.models import Expense
+from grades.models import Grade
+from payments.models import Payment
+from students.models import Student
+from ums import pdf_cache
+from ums.db_router import SESSION_KEY, ReplicaPinningMiddleware, ReplicaRouter, replica_alias, use_replica
+from ums.exports import iter_csv, write_xlsx
+from ums.mixins import related_projection, str_dependencies
+from ums.profiling import ProfileRecord, ProfileStore, ProfilingMiddleware, store
+
+
+class PdfCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.settings_override = override_settings(PDF_CACHE_DIR=directory.name, PDF_CACHE_MAX_BYTES=1000)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.root = directory.name
+        pdf_cache._usage = pdf_cache._Usage()
+
+    def render(self, size=300):
+        return lambda: b"%" * size
+
+    def test_second_request_is_served_from_cache(self):
+        key = pdf_cache.cache_key("receipt", 1)
+        with pdf_cache.open_or_render(key, self.render()) as handle:
+            self.assertEqual(len(handle.read()), 300)
+        render = mock.Mock(return_value=b"")
+        with pdf_cache.open_or_render(key, render) as handle:
+            self.assertEqual(len(handle.read()), 300)
+        render.assert_not_called()
+
+    def test_eviction_keeps_cache_under_limit_without_scanning_each_write(self):
+        with mock.patch.object(pdf_cache, "evict", wraps=pdf_cache.evict) as evict:
+            for number in range(6):
+                pdf_cache.open_or_render(pdf_cache.cache_key("receipt", number), self.render()).close()
+        sizes = [entry.stat().st_size for folder in os.scandir(self.root) for entry in os.scandir(folder)]
+        self.assertLessEqual(sum(sizes), 1000)
+        # Premier parcours, puis seulement quand l'estimation dépasse le plafond
+        self.assertLess(evict.call_count, 6)
+
+    def test_file_evicted_between_lookup_and_read_is_rendered_again(self):
+        key = pdf_cache.cache_key("receipt", 1)
+        pdf_cache.open_or_render(key, self.render()).close()
+        os.remove(pdf_cache._cache_path(key))
+        with pdf_cache.open_or_render(key, self.render(10)) as handle:
+            self.assertEqual(len(handle.read()), 10)
+
+    def test_open_handle_survives_concurrent_eviction(self):
+        key = pdf_cache.cache_key("receipt", 1)
+        pdf_cache.open_or_render(key, self.render()).close()
+        with pdf_cache.open_or_render(key, self.render()) as handle:
+            pdf_cache.evict(0)
+            self.assertEqual(len(handle.read()), 300)
+
+
+class ExportTests(SimpleTestCase):
+    ROWS = [["=1+1", "+243 81", "-2", "@SUM(A1)", "Kabila", -2]]
+
+    def test_csv_neutralizes_formulas(self):
+        content = "".join(iter_csv(["a", "b", "c", "d", "e", "f"], self.ROWS))
+        self.assertEqual(content.splitlines()[1], "'=1+1;'+243 81;'-2;'@SUM(A1);Kabila;-2")
+
+    def test_xlsx_writes_formulas_as_text(self):
+        output = io.BytesIO()
+        write_xlsx(output, "Export", ["a", "b", "c", "d", "e", "f"], self.ROWS)
+        output.seek(0)
+        cells = next(load_workbook(output).active.iter_rows(min_row=2))
+        self.assertEqual([cell.data_type for cell in cells], ["s", "s", "s", "s", "s", "n"])
+        self.assertEqual(cells[0].value, self.ROWS[0][0])
+
+
+class DatabaseSettingsTests(SimpleTestCase):
+    # Connexion à une base SQLite temporaire, hors de la base de test
+    databases = {DEFAULT_DB_ALIAS}
+
+    def load(self, version=(5, 2), **env):
+        """Paramètres de `ums/settings.py` évalués avec cet environnement et cette version de Django."""
+
+        with mock.patch.dict(os.environ, env, clear=True), mock.patch.object(django, "VERSION", version):
+            return runpy.run_path(os.path.join(settings.BASE_DIR, "ums", "settings.py"))
+
+    def test_sqlite_profile_enables_wal_by_default(self):
+        loaded = self.load()
+        self.assertEqual(loaded["SQLITE_PRAGMAS"]["journal_mode"], "WAL")
+        self.assertEqual(loaded["SQLITE_PRAGMAS"]["synchronous"], "NORMAL")
+        self.assertNotIn("journal_mode", self.load(SQLITE_WAL="0")["SQLITE_PRAGMAS"])
+
+    def test_transaction_mode_requires_django_5_1(self):
+        self.assertEqual(self.load()["DATABASES"]["default"]["OPTIONS"], {"transaction_mode": "IMMEDIATE"})
+        self.assertEqual(self.load(version=(5, 0))["DATABASES"]["default"]["OPTIONS"], {})
+
+    def test_pool_requires_django_5_1_and_psycopg_pool(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.load(version=(5, 0), DB_ENGINE="postgresql", DB_POOL="1")
+        with mock.patch("importlib.util.find_spec", return_value=None), self.assertRaises(ImproperlyConfigured):
+            self.load(DB_ENGINE="postgresql", DB_POOL="1")
+        with mock.patch("importlib.util.find_spec", return_value=object()):
+            default = self.load(DB_ENGINE="postgresql", DB_POOL="1")["DATABASES"]["default"]
+        self.assertEqual((default["CONN_MAX_AGE"], default["OPTIONS"]["pool"]["max_size"]), (0, 10))
+
+    @override_settings(SQLITE_PRAGMAS={"busy_timeout": 1234, "journal_mode": "WAL", "synchronous": "NORMAL"})
+    def test_pragmas_are_applied_to_new_connections(self):
+        default = connections[DEFAULT_DB_ALIAS]
+        if default.vendor != "sqlite":
+            self.skipTest("SQLite")
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        wrapper = default.__class__({**default.settings_dict, "NAME": os.path.join(directory.name, "db.sqlite3")})
+        self.addCleanup(wrapper.close)
+        with wrapper.cursor() as cursor:
+            values = [cursor.execute(f"PRAGMA {pragma}").fetchone()[0] for pragma in settings.SQLITE_PRAGMAS]
+        self.assertEqual(values, [1234, "wal", 1])
+
+
+class KpiCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_cached_value_is_invalidated_on_commit(self):
+        self.assertEqual(kpi_value("total_faculties"), 0)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Faculty.objects.create(name="Sciences", code="SC")
+        with self.assertNumQueries(0):
+            self.assertEqual(kpi_value("total_faculties"), 0)
+        self.assertEqual(cache.get(KPIS["total_faculties"].cache_key("total_faculties")), 0)
+
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(cache.get(KPIS["total_faculties"].cache_key("total_faculties")))
+        self.assertEqual(kpi_value("total_faculties"), 1)
+
+    def test_rolled_back_write_keeps_cached_value(self):
+        kpi_value("total_faculties")
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                Faculty.objects.create(name="Sciences", code="SC")
+                transaction.set_rollback(True)
+        self.assertEqual(callbacks, [])
+        with self.assertNumQueries(0):
+            self.assertEqual(kpi_value("total_faculties"), 0)
+
+
+class SeedingTests(TestCase):
+    VOLUMES = SeedVolumes(
+        faculties=1, departments=1, promotions=2, courses=2, students=6, payments=2, expenses=3, professors=2, cashiers=1
+    )
+    # Colonnes comparées d'un run à l'autre ; les clés primaires n'en font pas partie
+    SNAPSHOT = {
+        Student: ("matricule", "first_name", "last_name", "gender", "birth_date"),
+        Enrollment: (
+            "student__matricule", "year__code", "semester__name", "department__code", "promotion", "how_known"
+        ),
+        Grade: (
+            "enrollment__student__matricule",
+            "enrollment__semester__name",
+            "course_offering__course__course_code",
+            "assessment_type__name",
+            "score",
+        ),
+        Payment: (
+            "receipt_number", "enrollment__student__matricule", "amount_paid", "payment_date", "payment_method"
+        ),
+        Expense: ("reference_number", "category__name", "expense_date", "amount"),
+    }
+
+    def run_seed(self, random_seed):
+        """Données générées par `seed`, puis effacées : chaque run part de la même base."""
+
+        with transaction.atomic():
+            seed(self.VOLUMES, random_seed=random_seed)
+            snapshot = {
+                model: list(model.objects.order_by(*fields).values_list(*fields))
+                for model, fields in self.SNAPSHOT.items()
+            }
+            transaction.set_rollback(True)
+        return snapshot
+
+    def test_same_seed_generates_same_data(self):
+        first = self.run_seed(7)
+        self.assertTrue(all(first.values()))
+        self.assertEqual(self.run_seed(7), first)
+        self.assertNotEqual(self.run_seed(8)[Grade], first[Grade])
+
+
+class ListProjectionTests(TestCase):
+    # Listes dont les colonnes affichent des objets liés
+    RELATED_LISTS = (
+        "courses:offering_list",
+        "assessments:weighting_list",
+        "staff:assignment_list",
+        "enrollment:enrollment_list",
+        "enrollment:secondary_choice_list",
+        "students:student_list",
+        "students:student_sponsor_list",
+        "fees:academic_fee_list",
+        "expenses:expense_list",
+        "grades:grade_list",
+        "payments:payment_list",
+        "payments:debtor_list",
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        build_dataset()
+
+    def test_declared_str_fields_cover_str(self):
+        for model in apps.get_models():
+            local = model._meta.app_config.path.startswith(str(settings.BASE_DIR))
+            if not local or model.__str__ is models.Model.__str__:
+                continue
+            with self.subTest(model.__name__):
+                fields = str_dependencies(model)
+                self.assertIsNotNone(fields, "str_fields manquant")
+                related, columns = related_projection(model, fields)
+                obj = model.objects.select_related(*related).only(*columns).order_by("pk").first()
+                if obj is not None:
+                    with self.assertNumQueries(0):
+                        str(obj)
+
+    def test_list_queries_do_not_grow_with_rows(self):
+        client = benchmark_client()
+        for name in self.RELATED_LISTS:
+            with self.subTest(name):
+                url = reverse(name)
+                view_class = resolve(url).func.view_class
+                with mock.patch.object(view_class, "paginate_by", 1), CaptureQueriesContext(connection) as one_row:
+                    client.get(url)
+                with mock.patch.object(view_class, "paginate_by", 20), self.assertNumQueries(len(one_row)):
+                    response = client.get(url)
+                self.assertGreater(len(response.context["object_list"]), 1)
+
+
+class ViewBudgetTests(TestCase):
+    """Version `manage.py test` de `manage.py benchmark_views`."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.workdir = tempfile.mkdtemp(prefix="ums-benchmark-")
+        cls.addClassCleanup(shutil.rmtree, cls.workdir, True)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=cls.workdir))
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        build_dataset()
+
+    def test_every_view_answers_within_its_query_budget(self):
+        cases, _ = url_cases()
+        self.assertTrue(cases)
+        client = benchmark_client()
+        for case in cases:
+            with self.subTest(case.name):
+                result = measure(client, case, self.workdir, trace_memory=False)
+                self.assertFalse(result.failed, f"{case.path} : {result.status}")
+                self.assertLessEqual(result.queries, result.budget, case.path)
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=0.5)
+class ProfilingTests(TestCase):
+    def setUp(self):
+        store.clear()
+        self.addCleanup(store.clear)
+        self.url = reverse("core:profiling")
+
+    def login(self, role):
+        user = get_user_model().objects.create_user(
+            email=f"{role.lower()}@ums.local", password=None, first_name="P", last_name="Q", role=role
+        )
+        self.client.force_login(user)
+
+    def get(self, path, sample=0.1):
+        with mock.patch("ums.profiling.random.random", return_value=sample):
+            return self.client.get(path)
+
+    def test_middleware_is_removed_when_disabled(self):
+        with override_settings(PROFILING_ENABLED=False), self.assertRaises(MiddlewareNotUsed):
+            ProfilingMiddleware(lambda request: None)
+
+    def test_only_sampled_requests_are_profiled(self):
+        self.login("ADMIN")
+        response = self.get(self.url, sample=0.9)
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(store.records(), [])
+        self.get(f"{settings.STATIC_URL}ums.css")
+        self.assertEqual(store.records(), [])
+
+        self.get(self.url)
+        [record] = store.records()
+        self.assertEqual((record.view, record.status), ("core:profiling", 200))
+        self.assertGreater(record.sql_count, 0)
+
+    def test_staff_receive_server_timing(self):
+        self.login("ADMIN")
+        response = self.get(self.url)
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r'^sql;dur=[\d.]+;desc="SQL \(\d+\)"')
+        self.assertIn("render;dur=", timing)
+        self.assertIn("total;dur=", timing)
+
+    def test_other_users_are_profiled_without_header(self):
+        self.login("STUDENT")
+        response = self.get(self.url)
+        self.assertEqual(response.status_code, 403)
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual([record.status for record in store.records()], [403])
+
+        self.client.logout()
+        self.assertNotIn("Server-Timing", self.get(reverse("users:login")))
+
+    def test_stats_view_lists_profiled_requests(self):
+        self.login("ADMIN")
+        self.get(self.url)
+        response = self.get(self.url)
+        [stats] = response.context["views"]
+        self.assertEqual((stats.view, stats.count), ("core:profiling", 1))
+        self.assertEqual(len(response.context["recent"]), 1)
+        self.assertEqual(response.context["sample_rate"], 50)
+
+    def test_store_keeps_latest_records(self):
+        history = ProfileStore(2)
+        for view, duration in (("a", 30.0), ("b", 5.0), ("b", 15.0)):
+            history.add(
+                ProfileRecord(
+                    timestamp=None, method="GET", path="/", view=view, status=200, duration_ms=duration,
+                    sql_count=int(duration), sql_ms=0.0, render_ms=0.0, pdf_ms=0.0, repeated=(),
+                )
+            )
+        self.assertEqual([record.duration_ms for record in history.records()], [15.0, 5.0])
+        [stats] = history.by_view()
+        self.assertEqual((stats.view, stats.count, stats.avg_ms, stats.max_ms, stats.max_sql), ("b", 2, 10.0, 15.0, 15))
+        history.clear()
+        self.assertEqual(history.records(), [])
+
+
+@override_settings(REPLICA_DATABASE="replica", REPLICA_STICKY_SECONDS=15)
+class ReplicaRoutingTests(SimpleTestCase):
+    def test_marked_reads_go_to_replica(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(None), DEFAULT_DB_ALIAS)
+        with use_replica():
+            self.assertEqual(router.db_for_read(None), "replica")
+            self.assertEqual(router.db_for_write(None), DEFAULT_DB_ALIAS)
+        with use_replica(pinned=True):
+            self.assertEqual(router.db_for_read(None), DEFAULT_DB_ALIAS)
+        with override_settings(REPLICA_DATABASE=None), use_replica():
+            self.assertEqual(router.db_for_read(None), DEFAULT_DB_ALIAS)
+
+    def request(self, method, session, change_session=False):
+        """Passe une requête dans le middleware ; retourne la base de lecture vue par la vue."""
+
+        seen = []
+
+        def view(request):
+            if change_session:
+                request.session["_auth_user_id"] = "1"
+            seen.append(replica_alias())
+
+        request = getattr(RequestFactory(), method)("/")
+        request.session = session
+        ReplicaPinningMiddleware(view)(request)
+        return seen[0]
+
+    def test_write_pins_session_for_sticky_window(self):
+        session = SessionStore(session_key="existante")
+        self.assertEqual(self.request("post", session), "replica")
+        self.assertGreater(session[SESSION_KEY], time.time())
+        self.assertEqual(self.request("get", session), DEFAULT_DB_ALIAS)
+
+        session[SESSION_KEY] = time.time() - 1
+        self.assertEqual(self.request("get", session), "replica")
+
+    def test_session_opened_by_the_write_is_pinned(self):
+        session = SessionStore()
+        self.request("post", session, change_session=True)
+        self.assertIn(SESSION_KEY, session)
+
+    def test_sessionless_api_write_gets_no_session(self):
+        session = SessionStore()
+        self.request("post", session)
+        self.assertFalse(session.modified)
+        self.assertNotIn(SESSION_KEY, session)
+
+    def test_middleware_is_removed_without_replica(self):
+        with override_settings(REPLICA_DATABASE=None), self.assertRaises(MiddlewareNotUsed):
+            ReplicaPinningMiddleware(lambda request: None)
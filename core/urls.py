@@ -6,6 +6,7 @@ app_name = "core"
 
 urlpatterns = [
     path("", views.DashboardView.as_view(), name="dashboard"),
+    path("profiling/", views.ProfilingStatsView.as_view(), name="profiling"),
     path("academic-years/", views.AcademicYearListView.as_view(), name="academic_year_list"),
     path("academic-years/create/", views.AcademicYearCreateView.as_view(), name="academic_year_create"),
     path("academic-years/<int:pk>/", views.AcademicYearDetailView.as_view(), name="academic_year_detail"),
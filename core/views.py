@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.views.generic import TemplateView
 
 from ums.mixins import (
@@ -9,6 +10,8 @@ from ums.mixins import (
     RoleGroups,
     RolePermissionMixin,
 )
+from ums.profiling import PROFILING_ROLES, store
+
 from .forms import AcademicYearForm, DepartmentForm, FacultyForm, SemesterForm
 from .models import AcademicYear, Department, Faculty, Semester
 
@@ -18,6 +21,27 @@ class DashboardView(RolePermissionMixin, TemplateView):
     allowed_roles = RoleGroups.ALL_STAFF
 
 
+class ProfilingStatsView(RolePermissionMixin, TemplateView):
+    """Statistiques des requêtes profilées par ce processus (`ums.profiling`)."""
+
+    template_name = "core/profiling.html"
+    allowed_roles = PROFILING_ROLES
+    recent_count = 50
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(
+            {
+                "page_title": "Profilage des requêtes",
+                "enabled": settings.PROFILING_ENABLED,
+                "sample_rate": settings.PROFILING_SAMPLE_RATE * 100,
+                "views": store.by_view(),
+                "recent": store.records()[: self.recent_count],
+            }
+        )
+        return context
+
+
 class RectorateAccessMixin:
     allowed_roles = RoleGroups.MANAGEMENT
 
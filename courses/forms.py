@@ -17,6 +17,7 @@ class CourseOfferingForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         for name, field in self.fields.items():
-            if hasattr(field, "queryset"):
+            # Seuls les modèles de référence (année, faculté...) ont un champ `name`.
+            if hasattr(field, "queryset") and any(f.name == "name" for f in field.queryset.model._meta.fields):
                 field.queryset = field.queryset.order_by("name")
 
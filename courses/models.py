@@ -12,6 +12,8 @@ class Course(models.Model):
 
     description = models.TextField(null=True, blank=True)
 
+    str_fields = ("course_name",)
+
     def __str__(self):
         return self.course_name
 
@@ -1,16 +1,15 @@
 from django import template
 
-from courses.models import Course, CourseOffering
+from core.kpi import kpi_value
 
 register = template.Library()
 
 
 @register.simple_tag
 def total_courses():
-    return Course.objects.count()
+    return kpi_value("total_courses")
 
 
 @register.simple_tag
 def total_course_offerings():
-    return CourseOffering.objects.count()
-
+    return kpi_value("total_course_offerings")
@@ -0,0 +1,272 @@
+"""
+Génération des bulletins LMD, à l'unité ou par promotion entière.
+
+Les données d'un bulletin sont collectées en quelques requêtes pour tout un
+lot d'inscriptions, puis rendues par ReportLab dans un pool de processus :
+`render_bulletin` ne touche pas la base et ne reçoit que des données simples.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from typing import Iterable, Iterator, NamedTuple
+
+from django.conf import settings
+from django.db.models import QuerySet
+from reportlab.platypus import PageBreak
+
+from .models import Enrollment
+from core.models import AcademicYear, Department, Semester
+from grades.models import Grade
+from grades.results import load_course_scores, result_reads
+from ums.pdf import Paragraph, Spacer, build_table, get_pdf_styles, iter_zip, render_pdf
+
+# À incrémenter à chaque modification de la mise en page (invalide le cache PDF).
+BULLETIN_TEMPLATE_VERSION = 1
+
+
+class BulletinCourse(NamedTuple):
+    course_name: str
+    course_code: str
+    credits: int
+    details: str
+    score: Decimal
+    validated: bool
+
+
+class BulletinData(NamedTuple):
+    enrollment_id: int
+    student: str
+    year: str
+    semester: str
+    courses: list[BulletinCourse]
+    average: Decimal | None
+    total_credits: int
+    validated_credits: int
+    mention: str
+    decision: str
+
+    @property
+    def filename(self) -> str:
+        return f"bulletin-{self.enrollment_id}.pdf"
+
+
+def promotion_enrollments(year, semester=None, department=None, promotion=None) -> QuerySet:
+    """Inscriptions d'une promotion (année obligatoire, autres critères optionnels)."""
+
+    enrollments = Enrollment.objects.filter(year=year)
+    if semester is not None:
+        enrollments = enrollments.filter(semester=semester)
+    if department is not None:
+        enrollments = enrollments.filter(department=department)
+    if promotion:
+        enrollments = enrollments.filter(promotion=promotion)
+    return enrollments
+
+
+def bulletin_fingerprint(enrollments: QuerySet) -> list[tuple]:
+    """
+    Empreinte des bulletins pour la clé du cache PDF, en une requête : identité
+    de l'étudiant, période et horodatage du résultat matérialisé, recalculé à
+    chaque modification des notes, des pondérations ou des crédits.
+    """
+
+    with result_reads(enrollments):
+        return list(
+            enrollments.order_by("pk").values_list(
+                "pk",
+                "student__first_name",
+                "student__last_name",
+                "student__matricule",
+                "year__name",
+                "semester__name",
+                "result__computed_at",
+            )
+        )
+
+
+def collect_bulletins(enrollments: QuerySet) -> list[BulletinData]:
+    """
+    Prépare les données de bulletin de toutes les inscriptions de
+    `enrollments` avec un nombre constant de requêtes.
+    """
+
+    with result_reads(enrollments):
+        details = defaultdict(list)
+        grade_rows = (
+            Grade.objects.filter(enrollment__in=enrollments)
+            .order_by("assessment_type__name")
+            .values_list("enrollment_id", "course_offering_id", "assessment_type__name", "score")
+        )
+        for enrollment_id, course_offering_id, assessment_name, score in grade_rows:
+            details[enrollment_id, course_offering_id].append(f"{assessment_name} {score:.2f}")
+
+        courses = defaultdict(list)
+        for score in load_course_scores(enrollments):
+            courses[score.enrollment_id].append(
+                BulletinCourse(
+                    course_name=score.course_name,
+                    course_code=score.course_code,
+                    credits=score.credits,
+                    details=" / ".join(details[score.enrollment_id, score.course_offering_id]),
+                    score=score.score,
+                    validated=score.validated,
+                )
+            )
+
+        rows = enrollments.order_by("student__last_name", "student__first_name").values_list(
+            "pk",
+            "student__first_name",
+            "student__last_name",
+            "student__matricule",
+            "year__name",
+            "semester__name",
+            "result__average",
+            "result__total_credits",
+            "result__validated_credits",
+            "result__mention",
+            "result__decision",
+        )
+        return [
+            BulletinData(
+                enrollment_id=pk,
+                student=f"{first_name} {last_name} ({matricule})",
+                year=year,
+                semester=semester,
+                courses=courses.get(pk, []),
+                average=average,
+                total_credits=total_credits,
+                validated_credits=validated_credits,
+                mention=mention,
+                decision=decision,
+            )
+            for (
+                pk,
+                first_name,
+                last_name,
+                matricule,
+                year,
+                semester,
+                average,
+                total_credits,
+                validated_credits,
+                mention,
+                decision,
+            ) in rows
+        ]
+
+
+def bulletin_flowables(bulletin: BulletinData, styles) -> list:
+    flow = [
+        Paragraph("BULLETIN LMD", styles["Title"]),
+        Paragraph(f"{bulletin.student} - {bulletin.year} / {bulletin.semester}", styles["Heading2"]),
+        Spacer(1, 8),
+    ]
+    data = [["Cours", "Code", "Crédits", "Évaluations", "Note", "Résultat"]]
+    for course in bulletin.courses:
+        data.append(
+            [
+                course.course_name,
+                course.course_code,
+                course.credits,
+                course.details,
+                f"{course.score:.2f}",
+                "Validé" if course.validated else "Ajourné",
+            ]
+        )
+
+    if len(data) == 1:
+        data.append(["Aucune note encodée", "-", "-", "-", "-", "-"])
+
+    flow.append(build_table(data, header=True))
+
+    avg = bulletin.average
+    flow.append(Spacer(1, 12))
+    flow.append(
+        build_table(
+            [
+                ["Moyenne générale", f"{avg:.2f}" if avg is not None else "N/A"],
+                ["Crédits validés", f"{bulletin.validated_credits} / {bulletin.total_credits}"],
+                ["Mention LMD", bulletin.mention],
+                ["Décision", bulletin.decision],
+            ],
+            col_widths=[200, 200],
+        )
+    )
+    flow.append(Spacer(1, 18))
+    flow.append(
+        Paragraph(
+            "La moyenne minimale pour la validation d'une unité d'enseignement est fixée à 50% conformément "
+            "aux directives nationales en vigueur au sein du système LMD.",
+            styles["BodyText"],
+        )
+    )
+    return flow
+
+
+def render_bulletin(bulletin: BulletinData) -> tuple[str, bytes]:
+    styles = get_pdf_styles()
+    return bulletin.filename, render_pdf(lambda: bulletin_flowables(bulletin, styles))
+
+
+def render_merged_bulletins(bulletins: Iterable[BulletinData], output) -> None:
+    """Rend tous les bulletins dans un seul document, un bulletin par page."""
+
+    styles = get_pdf_styles()
+
+    def build():
+        flow = []
+        for bulletin in bulletins:
+            if flow:
+                flow.append(PageBreak())
+            flow.extend(bulletin_flowables(bulletin, styles))
+        return flow
+
+    render_pdf(build, output=output)
+
+
+def iter_rendered_bulletins(bulletins: list[BulletinData], workers: int | None = None) -> Iterator[tuple[str, bytes]]:
+    """
+    Rend les bulletins dans un pool de processus et les restitue dans l'ordre.
+    Le nombre de rendus en attente est borné pour garder une mémoire constante
+    lorsque le consommateur (réponse HTTP, fichier) est plus lent.
+    """
+
+    if workers is None:
+        workers = settings.BULLETIN_RENDER_WORKERS
+    if workers <= 1 or len(bulletins) <= 1:
+        for bulletin in bulletins:
+            yield render_bulletin(bulletin)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for bulletin in bulletins:
+            pending.append(pool.submit(render_bulletin, bulletin))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def render_bulletin_batch(params: dict, output) -> str:
+    """
+    Gestionnaire du worker de rapports : écrit les bulletins d'une promotion
+    dans `output`, en ZIP ou en PDF fusionné selon `params["format"]`.
+    """
+
+    year = AcademicYear.objects.get(pk=params["year"])
+    semester = Semester.objects.get(pk=params["semester"]) if params.get("semester") else None
+    department = Department.objects.get(pk=params["department"]) if params.get("department") else None
+    promotion = params.get("promotion")
+    bulletins = collect_bulletins(promotion_enrollments(year, semester, department, promotion))
+
+    basename = f"bulletins-{year.code}" + (f"-{promotion}" if promotion else "")
+    if params.get("format") == "pdf":
+        render_merged_bulletins(bulletins, output)
+        return f"{basename}.pdf"
+    for chunk in iter_zip(iter_rendered_bulletins(bulletins)):
+        output.write(chunk)
+    return f"{basename}.zip"
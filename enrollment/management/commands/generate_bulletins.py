@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import AcademicYear, Department, Semester
+from enrollment.bulletins import (
+    collect_bulletins,
+    iter_rendered_bulletins,
+    promotion_enrollments,
+    render_merged_bulletins,
+)
+from ums.pdf import iter_zip
+
+
+class Command(BaseCommand):
+    help = "Génère les bulletins LMD d'une promotion dans une archive ZIP ou un PDF fusionné."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", required=True, help="Code de l'année académique (ex. 2526).")
+        parser.add_argument("--semester", help="Code du semestre.")
+        parser.add_argument("--department", type=int, help="Identifiant du département.")
+        parser.add_argument("--promotion", help="Intitulé de la promotion.")
+        parser.add_argument("--output", required=True, help="Fichier de sortie (.zip ou .pdf).")
+        parser.add_argument("--workers", type=int, help="Processus de rendu (défaut : BULLETIN_RENDER_WORKERS).")
+
+    def handle(self, *args, **options):
+        try:
+            year = AcademicYear.objects.get(code=options["year"].upper())
+            semester = Semester.objects.get(code=options["semester"].upper()) if options["semester"] else None
+            department = Department.objects.get(pk=options["department"]) if options["department"] else None
+        except (AcademicYear.DoesNotExist, Semester.DoesNotExist, Department.DoesNotExist) as exc:
+            raise CommandError(str(exc))
+
+        bulletins = collect_bulletins(promotion_enrollments(year, semester, department, options["promotion"]))
+        if not bulletins:
+            raise CommandError("Aucune inscription pour les critères fournis.")
+
+        output = options["output"]
+        with open(output, "wb") as handle:
+            if output.lower().endswith(".pdf"):
+                render_merged_bulletins(bulletins, handle)
+            else:
+                for chunk in iter_zip(iter_rendered_bulletins(bulletins, options["workers"])):
+                    handle.write(chunk)
+
+        self.stdout.write(self.style.SUCCESS(f"{len(bulletins)} bulletin(s) écrit(s) dans {output}."))
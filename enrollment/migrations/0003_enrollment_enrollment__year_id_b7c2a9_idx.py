@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('enrollment', '0002_initial'),
+        ('students', '0003_alter_student_last_name'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['year', 'promotion', 'department'], name='enrollment__year_id_b7c2a9_idx'),
+        ),
+    ]
@@ -21,6 +21,9 @@ class Enrollment(models.Model):
 
     class Meta:
         unique_together = ("student", "year", "semester")
+        indexes = [models.Index(fields=["year", "promotion", "department"])]
+
+    str_fields = ("student",)
 
     def __str__(self):
         return f"Enrollment {self.student}"
@@ -32,6 +35,8 @@ class SecondaryChoice(models.Model):
     department = models.ForeignKey(Department, on_delete=models.SET_NULL, null=True)
     promotion = models.CharField(max_length=100)
 
+    str_fields = ("enrollment",)
+
     def __str__(self):
         return f"Choice for {self.enrollment}"
 
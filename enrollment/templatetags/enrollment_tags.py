@@ -1,11 +1,10 @@
 from django import template
 
-from enrollment.models import Enrollment
+from core.kpi import kpi_value
 
 register = template.Library()
 
 
 @register.simple_tag
 def total_enrollments():
-    return Enrollment.objects.count()
-
+    return kpi_value("total_enrollments")
@@ -1,3 +1,89 @@
-from django.test import TestCase
+import io
+import re
+import tempfile
+import zipfile
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.benchmark import benchmark_client
+from core.seeding import SeedVolumes, seed
+from grades.models import Grade
+from ums.pdf import iter_zip
+
+from .bulletins import collect_bulletins, iter_rendered_bulletins, render_merged_bulletins
+from .models import Enrollment
+
+SMALL = SeedVolumes(faculties=1, departments=1, promotions=1, courses=2, students=2, professors=1, cashiers=1)
+
+
+def page_count(pdf: bytes) -> int:
+    return len(re.findall(rb"/Type /Page\b", pdf))
+
+
+class BulletinBatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(SMALL)
+
+    def setUp(self):
+        self.bulletins = collect_bulletins(Enrollment.objects.all())
+        self.assertGreater(len(self.bulletins), 1)
+
+    def test_zip_holds_one_bulletin_per_enrollment(self):
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(iter_zip(iter_rendered_bulletins(self.bulletins, workers=1)))))
+        self.assertEqual(archive.namelist(), [bulletin.filename for bulletin in self.bulletins])
+        for name in archive.namelist():
+            self.assertTrue(archive.read(name).startswith(b"%PDF"))
+
+    def test_process_pool_renders_like_the_inline_fallback(self):
+        inline = list(iter_rendered_bulletins(self.bulletins, workers=1))
+        pooled = list(iter_rendered_bulletins(self.bulletins, workers=2))
+        self.assertEqual([name for name, _ in pooled], [name for name, _ in inline])
+        self.assertEqual([page_count(pdf) for _, pdf in pooled], [page_count(pdf) for _, pdf in inline])
+
+    def test_merged_pdf_has_every_bulletin_page(self):
+        output = io.BytesIO()
+        render_merged_bulletins(self.bulletins, output)
+        pages = [page_count(pdf) for _, pdf in iter_rendered_bulletins(self.bulletins, workers=1)]
+        self.assertTrue(all(pages))
+        self.assertEqual(page_count(output.getvalue()), sum(pages))
+
+
+class BulletinCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(SMALL)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(PDF_CACHE_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = benchmark_client()
+        self.enrollment = Enrollment.objects.order_by("pk").first()
+        self.url = reverse("enrollment:enrollment_bulletin_pdf", args=[self.enrollment.pk])
+
+    def get_pdf(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content)
+
+    def test_cache_hit_skips_bulletin_collection(self):
+        first = self.get_pdf()
+        with self.assertNumQueries(5):
+            self.assertEqual(self.get_pdf(), first)
+
+    def test_grade_change_renders_new_bulletin(self):
+        self.get_pdf()
+        grade = Grade.objects.filter(enrollment=self.enrollment).order_by("pk").first()
+        with self.captureOnCommitCallbacks(execute=True):
+            grade.score = Decimal("0") if grade.score else Decimal("100")
+            grade.save()
+        with mock.patch("enrollment.views.collect_bulletins", wraps=collect_bulletins) as collect:
+            self.get_pdf()
+            self.get_pdf()
+        self.assertEqual(collect.call_count, 1)
@@ -22,5 +22,6 @@ urlpatterns = [
     path("documents/<int:pk>/delete/", views.DocumentDeleteView.as_view(), name="document_delete"),
     path("<int:pk>/fiche/pdf/", views.EnrollmentRegistrationPDFView.as_view(), name="enrollment_registration_pdf"),
     path("<int:pk>/bulletin/pdf/", views.EnrollmentBulletinPDFView.as_view(), name="enrollment_bulletin_pdf"),
+    path("bulletins/batch/", views.EnrollmentBulletinBatchView.as_view(), name="enrollment_bulletin_batch"),
 ]
 
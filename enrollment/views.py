@@ -1,8 +1,9 @@
-from django.db.models import Avg
-from django.shortcuts import get_object_or_404
+from django.http import Http404
+from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
 from django.views import View
 
+from ums.db_router import ReplicaReadMixin
 from ums.mixins import (
     BaseCreateView,
     BaseDeleteView,
@@ -18,13 +19,20 @@ from ums.pdf import (
     build_pdf_response,
     build_table,
     get_pdf_styles,
-    lmd_decision,
-    lmd_mention,
 )
-
+from ums.pdf_cache import cache_key, cached_pdf_response
+
+from .bulletins import (
+    BULLETIN_TEMPLATE_VERSION,
+    bulletin_fingerprint,
+    collect_bulletins,
+    promotion_enrollments,
+    render_bulletin,
+)
 from .forms import DocumentForm, EnrollmentForm, SecondaryChoiceForm
 from .models import Document, Enrollment, SecondaryChoice
-from grades.models import Grade
+from core.models import AcademicYear, Department, Semester
+from reports.jobs import enqueue
 
 
 class AcademicAccessMixin:
@@ -35,6 +43,9 @@ class EnrollmentListView(AcademicAccessMixin, BaseListView):
     model = Enrollment
     list_display = ("student", "year", "semester", "faculty", "promotion")
     page_title = "Inscriptions"
+    keyset_field = "pk"
+    search_fields = ("=student__matricule", "^student__last_name")
+    list_filter = ("year", "semester", "department", "promotion")
     create_url_name = "enrollment:enrollment_create"
     detail_url_name = "enrollment:enrollment_detail"
     update_url_name = "enrollment:enrollment_update"
@@ -145,9 +156,10 @@ class DocumentDeleteView(AcademicAccessMixin, BaseDeleteView):
 
 class EnrollmentPDFBaseView(RolePermissionMixin, View):
     allowed_roles = RoleGroups.ACADEMIC
+    query_budget = 12
 
 
-class EnrollmentRegistrationPDFView(EnrollmentPDFBaseView):
+class EnrollmentRegistrationPDFView(ReplicaReadMixin, EnrollmentPDFBaseView):
     """
     Fiche d'inscription détaillée conforme aux usages des secrétariats académiques.
     """
@@ -233,64 +245,55 @@ class EnrollmentBulletinPDFView(EnrollmentPDFBaseView):
     """
 
     def get(self, request, pk):
-        enrollment = get_object_or_404(
-            Enrollment.objects.select_related("student", "year", "semester", "faculty", "department"),
-            pk=pk,
+        enrollment = get_object_or_404(Enrollment, pk=pk)
+        enrollments = Enrollment.objects.filter(pk=enrollment.pk)
+        # La clé se calcule en une requête : les données complètes ne sont lues qu'en l'absence du PDF.
+        return cached_pdf_response(
+            f"bulletin-{enrollment.pk}.pdf",
+            cache_key("bulletin", BULLETIN_TEMPLATE_VERSION, bulletin_fingerprint(enrollments)),
+            lambda: render_bulletin(collect_bulletins(enrollments)[0])[1],
         )
-        grades = (
-            Grade.objects.filter(enrollment=enrollment)
-            .select_related("course_offering__course", "assessment_type")
-            .order_by("course_offering__course__course_name")
-        )
-        styles = get_pdf_styles()
-
-        def build():
-            student = enrollment.student
-            flow = [
-                Paragraph("BULLETIN LMD", styles["Title"]),
-                Paragraph(f"{student} - {enrollment.year.name} / {enrollment.semester.name}", styles["Heading2"]),
-                Spacer(1, 8),
-            ]
-            data = [["Cours", "Code", "Crédits", "Évaluation", "Note", "Résultat"]]
-            for grade in grades:
-                course = grade.course_offering.course
-                data.append(
-                    [
-                        course.course_name,
-                        course.course_code,
-                        course.credits,
-                        grade.assessment_type.name,
-                        f"{grade.score:.2f}",
-                        "Validé" if grade.score >= 50 else "Ajourné",
-                    ]
-                )
 
-            if len(data) == 1:
-                data.append(["Aucune note encodée", "-", "-", "-", "-", "-"])
 
-            flow.append(build_table(data, header=True))
+class EnrollmentBulletinBatchView(EnrollmentPDFBaseView):
+    """
+    Bulletins de toute une promotion, sous forme d'archive ZIP (un PDF par
+    étudiant) ou d'un seul PDF fusionné (`?format=pdf`). Le rendu est confié
+    au worker de rapports.
+    """
 
-            avg = grades.aggregate(avg=Avg("score"))["avg"]
-            flow.append(Spacer(1, 12))
-            flow.append(
-                build_table(
-                    [
-                        ["Moyenne générale", f"{avg:.2f}" if avg is not None else "N/A"],
-                        ["Mention LMD", lmd_mention(avg)],
-                        ["Décision", lmd_decision(avg)],
-                    ],
-                    col_widths=[200, 200],
-                )
-            )
-            flow.append(Spacer(1, 18))
-            flow.append(
-                Paragraph(
-                    "La moyenne minimale pour la validation d'une unité d'enseignement est fixée à 50% conformément "
-                    "aux directives nationales en vigueur au sein du système LMD.",
-                    styles["BodyText"],
-                )
-            )
-            return flow
+    query_budget = 16
+
+    def get(self, request):
+        year_id = request.GET.get("year")
+        if not year_id:
+            raise Http404("Le paramètre year est requis.")
+        try:
+            year = get_object_or_404(AcademicYear, pk=int(year_id))
+            semester = self._optional(Semester, request.GET.get("semester"))
+            department = self._optional(Department, request.GET.get("department"))
+        except ValueError:
+            raise Http404("Identifiant invalide.")
+        promotion = request.GET.get("promotion")
+
+        if not promotion_enrollments(year, semester, department, promotion).exists():
+            raise Http404("Aucune inscription pour les critères fournis.")
+
+        job = enqueue(
+            "bulletins",
+            {
+                "year": year.pk,
+                "semester": semester.pk if semester else None,
+                "department": department.pk if department else None,
+                "promotion": promotion,
+                "format": "pdf" if request.GET.get("format") == "pdf" else "zip",
+            },
+            request.user,
+        )
+        return redirect("reports:job_detail", pk=job.pk)
 
-        filename = f"bulletin-{enrollment.pk}.pdf"
-        return build_pdf_response(filename, build)
+    @staticmethod
+    def _optional(model, pk):
+        if not pk:
+            return None
+        return get_object_or_404(model, pk=int(pk))
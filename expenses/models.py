@@ -6,6 +6,8 @@ class ExpenseCategory(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(null=True, blank=True)
 
+    str_fields = ("name",)
+
     def __str__(self):
         return self.name
 
@@ -23,5 +25,7 @@ class Expense(models.Model):
 
     payment_status = models.CharField(max_length=50, default="Payé")
 
+    str_fields = ("category", "amount")
+
     def __str__(self):
         return f"{self.category} - {self.amount}"
@@ -1,12 +1,10 @@
 from django import template
-from django.db.models import Sum
 
-from expenses.models import Expense
+from core.kpi import kpi_value
 
 register = template.Library()
 
 
 @register.simple_tag
 def total_expenses_amount():
-    return Expense.objects.aggregate(total=Sum("amount"))["total"] or 0
-
+    return kpi_value("total_expenses_amount")
@@ -5,6 +5,8 @@ class FeeCategory(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(null=True, blank=True)
 
+    str_fields = ("name",)
+
     def __str__(self):
         return self.name
 
@@ -17,3 +19,8 @@ class AcademicFee(models.Model):
 
     class Meta:
         unique_together = ("category", "year", "semester")
+
+    str_fields = ("category", "year", "semester")
+
+    def __str__(self):
+        return f"{self.category} {self.year} ({self.semester})"
@@ -1,17 +1,15 @@
 from django import template
-from django.db.models import Sum
 
-from fees.models import AcademicFee
+from core.kpi import kpi_value
 
 register = template.Library()
 
 
 @register.simple_tag
 def total_academic_fee_records():
-    return AcademicFee.objects.count()
+    return kpi_value("total_academic_fee_records")
 
 
 @register.simple_tag
 def total_academic_fee_amount():
-    return AcademicFee.objects.aggregate(total=Sum("amount"))["total"] or 0
-
+    return kpi_value("total_academic_fee_amount")
@@ -0,0 +1,163 @@
+"""
+Calculs LMD partagés : note pondérée par cours et moyenne semestrielle
+pondérée par les crédits.
+
+Les notes sont agrégées dans la base (une ligne par inscription × cours) ;
+la consolidation par inscription se fait ensuite en une passe sur ces lignes,
+sans requête supplémentaire.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Iterable, NamedTuple
+
+from django.db.models import (
+    Avg,
+    Count,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Q,
+    QuerySet,
+    Subquery,
+    Sum,
+)
+
+from assessments.models import AssessmentWeighting
+
+from .models import Grade
+
+PASSING_SCORE = Decimal("50")
+TWO_PLACES = Decimal("0.01")
+
+
+class CourseScore(NamedTuple):
+    enrollment_id: int
+    course_offering_id: int
+    course_name: str
+    course_code: str
+    credits: int
+    score: Decimal
+
+    @property
+    def validated(self) -> bool:
+        return self.score >= PASSING_SCORE
+
+
+class ResultSummary(NamedTuple):
+    average: Decimal | None
+    total_credits: int
+    validated_credits: int
+
+
+def _quantize(value: Decimal) -> Decimal:
+    return value.quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
+
+
+def course_scores(grades: QuerySet | None = None) -> list[CourseScore]:
+    """
+    Retourne la note pondérée de chaque couple (inscription, cours offert)
+    présent dans `grades`, en une seule requête groupée.
+
+    La note d'un cours est Σ(note × poids) / Σ(poids) selon les
+    `AssessmentWeighting` du cours. Un cours sans pondération, ou dont une
+    évaluation notée n'a pas de pondération, retombe sur la moyenne simple de
+    ses évaluations : une note n'est jamais ignorée faute de poids.
+    """
+
+    if grades is None:
+        grades = Grade.objects.all()
+    weight = Subquery(
+        AssessmentWeighting.objects.filter(
+            course_offering=OuterRef("course_offering"),
+            assessment_type=OuterRef("assessment_type"),
+        ).values("weight_percentage")[:1]
+    )
+    rows = (
+        grades.annotate(weight=weight)
+        .values(
+            "enrollment_id",
+            "course_offering_id",
+            "course_offering__course__course_name",
+            "course_offering__course__course_code",
+            "course_offering__course__credits",
+        )
+        .annotate(
+            weighted_total=Sum(
+                ExpressionWrapper(
+                    F("score") * F("weight"),
+                    output_field=DecimalField(max_digits=12, decimal_places=4),
+                )
+            ),
+            weight_total=Sum("weight"),
+            unweighted=Count("pk", filter=Q(weight__isnull=True)),
+            plain_average=Avg("score"),
+        )
+        .order_by("enrollment_id", "course_offering__course__course_name")
+    )
+
+    scores = []
+    for row in rows:
+        if row["weight_total"] and not row["unweighted"]:
+            score = Decimal(row["weighted_total"]) / Decimal(row["weight_total"])
+        else:
+            score = Decimal(row["plain_average"])
+        scores.append(
+            CourseScore(
+                enrollment_id=row["enrollment_id"],
+                course_offering_id=row["course_offering_id"],
+                course_name=row["course_offering__course__course_name"],
+                course_code=row["course_offering__course__course_code"],
+                credits=row["course_offering__course__credits"],
+                score=_quantize(score),
+            )
+        )
+    return scores
+
+
+def summarize(scores: Iterable[CourseScore]) -> ResultSummary:
+    """
+    Moyenne pondérée par les crédits d'un ensemble de cours (un semestre,
+    ou tout un parcours pour l'état de sortie).
+    """
+
+    weighted = Decimal("0")
+    plain = Decimal("0")
+    count = 0
+    total_credits = 0
+    validated_credits = 0
+    for score in scores:
+        weighted += score.score * score.credits
+        plain += score.score
+        count += 1
+        total_credits += score.credits
+        if score.validated:
+            validated_credits += score.credits
+
+    if not count:
+        return ResultSummary(average=None, total_credits=0, validated_credits=0)
+    average = weighted / total_credits if total_credits else plain / count
+    return ResultSummary(
+        average=_quantize(average),
+        total_credits=total_credits,
+        validated_credits=validated_credits,
+    )
+
+
+def summarize_by_enrollment(scores: Iterable[CourseScore]) -> dict[int, ResultSummary]:
+    grouped: dict[int, list[CourseScore]] = defaultdict(list)
+    for score in scores:
+        grouped[score.enrollment_id].append(score)
+    return {enrollment_id: summarize(items) for enrollment_id, items in grouped.items()}
+
+
+def enrollment_summaries(enrollments: QuerySet) -> dict[int, ResultSummary]:
+    """
+    Synthèse LMD de toutes les inscriptions de `enrollments`, en une requête.
+    Les inscriptions sans note n'apparaissent pas dans le dictionnaire.
+    """
+
+    return summarize_by_enrollment(course_scores(Grade.objects.filter(enrollment__in=enrollments)))
@@ -1,4 +1,11 @@
+from decimal import Decimal
+
 from django import forms
+from django.utils import timezone
+
+from assessments.models import AssessmentType
+from core.models import AcademicYear, Semester
+from courses.models import CourseOffering
 
 from .models import Grade
 
@@ -8,3 +15,79 @@ class GradeForm(forms.ModelForm):
         model = Grade
         fields = "__all__"
 
+
+
+class GradeSheetSelectForm(forms.Form):
+    course_offering = forms.ModelChoiceField(queryset=CourseOffering.objects.none(), label="Cours offert")
+    assessment_type = forms.ModelChoiceField(queryset=AssessmentType.objects.all(), label="Évaluation")
+
+    def __init__(self, *args, offerings=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if offerings is not None:
+            self.fields["course_offering"].queryset = offerings
+        self.fields["course_offering"].label_from_instance = lambda offering: (
+            f"{offering.course} — {offering.promotion_name} {offering.department} "
+            f"({offering.academic_year}, {offering.semester})"
+        )
+        for field in self.fields.values():
+            field.widget.attrs["class"] = "form-select"
+
+
+class GradeSheetForm(forms.Form):
+    """
+    Une case de note par inscription (`score_<id>`). Seules les cases
+    modifiées sont renvoyées par `changed_scores`.
+    """
+
+    grading_date = forms.DateField(
+        label="Date d'évaluation",
+        widget=forms.DateInput(attrs={"type": "date", "class": "form-control"}),
+    )
+
+    def __init__(self, *args, enrollments=(), scores=None, **kwargs):
+        scores = scores or {}
+        initial = kwargs.setdefault("initial", {})
+        initial.setdefault("grading_date", timezone.localdate())
+        super().__init__(*args, **kwargs)
+        self.rows = []
+        for enrollment in enrollments:
+            name = f"score_{enrollment.pk}"
+            self.fields[name] = forms.DecimalField(
+                required=False,
+                min_value=0,
+                max_value=100,
+                max_digits=5,
+                decimal_places=2,
+                initial=scores.get(enrollment.pk),
+                widget=forms.NumberInput(attrs={"class": "form-control form-control-sm", "step": "0.01"}),
+            )
+            self.rows.append((enrollment, self[name]))
+
+    def changed_scores(self) -> dict[int, Decimal | None]:
+        return {
+            int(name.removeprefix("score_")): self.cleaned_data[name]
+            for name in self.changed_data
+            if name.startswith("score_")
+        }
+
+
+class GradeImportUploadForm(forms.Form):
+    year = forms.ModelChoiceField(queryset=AcademicYear.objects.all(), label="Année académique")
+    semester = forms.ModelChoiceField(queryset=Semester.objects.all(), label="Semestre")
+    file = forms.FileField(
+        label="Feuille de notes",
+        help_text=(
+            "Classeur .xlsx ou fichier .csv : colonnes matricule et course_code, puis soit "
+            "assessment et score, soit une colonne par type d'évaluation."
+        ),
+    )
+    dry_run = forms.BooleanField(
+        label="Simulation (rapport sans enregistrement)",
+        required=False,
+    )
+
+    def clean_file(self):
+        upload = self.cleaned_data["file"]
+        if not upload.name.lower().endswith((".xlsx", ".csv")):
+            raise forms.ValidationError("Format non pris en charge : utilisez un fichier .xlsx ou .csv.")
+        return upload
@@ -0,0 +1,326 @@
+"""
+Import de feuilles de notes (Excel ou CSV) avec pandas.
+
+Deux présentations sont acceptées :
+
+* « longue » : une ligne par note, colonnes `matricule`, `course_code`,
+  `assessment` et `score` ;
+* « large » : colonnes `matricule` et `course_code`, puis une colonne par type
+  d'évaluation (en-tête = nom du type), remise en forme longue par `melt`.
+  Une case vide n'est pas une note.
+
+Une colonne `grading_date` facultative donne la date d'évaluation (date du
+jour sinon). Les matricules, codes de cours et types d'évaluation sont
+résolus par des dictionnaires chargés en quelques requêtes pour l'année et
+le semestre choisis ; la validation se fait colonne par colonne sur tout le
+tableau. Un enseignant n'importe que les notes des cours qui lui sont
+attribués (`editable_offerings`, comme la saisie en grille). Les notes
+valides sont écrites par `bulk_create` avec mise à jour sur la clé unique,
+puis les résultats des inscriptions touchées sont recalculés. Le rapport
+liste les notes créées, modifiées et rejetées.
+"""
+
+from __future__ import annotations
+
+import io
+from decimal import Decimal
+from typing import IO, NamedTuple
+
+import numpy as np
+import pandas as pd
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from assessments.models import AssessmentType
+from core.kpi import invalidate
+from core.models import AcademicYear, Semester
+from courses.models import CourseOffering
+from enrollment.models import Enrollment
+from ums.exports import neutralize_formula
+
+from .models import Grade
+from .results import refresh_results
+from .sheets import editable_offerings
+
+ID_COLUMNS = ("matricule", "course_code")
+LONG_COLUMNS = ("assessment", "score")
+KEY = ["enrollment_id", "course_offering_id", "assessment_type_id"]
+
+CREATED, UPDATED, UNCHANGED, REJECTED = "créée", "modifiée", "inchangée", "rejetée"
+
+REPORT_COLUMNS = {
+    "line": "ligne",
+    "matricule": "matricule",
+    "course_code": "cours",
+    "assessment": "évaluation",
+    "old_score": "ancienne note",
+    "new_score": "nouvelle note",
+    "status": "statut",
+    "error": "erreur",
+}
+
+
+class GradeImportReport(NamedTuple):
+    created: int
+    updated: int
+    unchanged: int
+    rejected: int
+    # Une ligne par note créée, modifiée ou rejetée (colonnes de REPORT_COLUMNS)
+    diff: pd.DataFrame
+
+    def summary(self) -> str:
+        return (
+            f"{self.created} note(s) créée(s), {self.updated} modifiée(s), "
+            f"{self.unchanged} inchangée(s), {self.rejected} rejetée(s)"
+        )
+
+    def write_csv(self, output: IO[str]) -> None:
+        diff = self.diff.rename(columns=REPORT_COLUMNS).map(neutralize_formula)
+        diff.to_csv(output, sep=";", index=False, lineterminator="\n")
+        output.write(f";total;{self.summary()}\n")
+
+
+def _normalize(value) -> str:
+    return str(value or "").strip().lower().replace(" ", "_")
+
+
+def read_sheet(file: IO[bytes], filename: str) -> pd.DataFrame:
+    """Charge la première feuille (ou le CSV) en texte, avec le numéro de ligne d'origine."""
+
+    if filename.lower().endswith(".xlsx"):
+        frame = pd.read_excel(file, dtype=str, engine="openpyxl")
+    else:
+        frame = pd.read_csv(file, dtype=str, sep=None, engine="python", encoding="utf-8-sig")
+    frame.columns = [_normalize(column) for column in frame.columns]
+    frame.insert(0, "line", frame.index + 2)
+    return frame
+
+
+def to_long(frame: pd.DataFrame, assessment_names: set[str]) -> pd.DataFrame:
+    """Ramène une feuille large à une ligne par note ; une feuille longue est renvoyée telle quelle."""
+
+    missing = [column for column in ID_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Colonnes manquantes : {', '.join(missing)}.")
+    extra = ["grading_date"] if "grading_date" in frame.columns else []
+
+    if all(column in frame.columns for column in LONG_COLUMNS):
+        return frame[["line", *ID_COLUMNS, *LONG_COLUMNS, *extra]]
+
+    value_columns = [column for column in frame.columns if column in assessment_names]
+    if not value_columns:
+        raise ValueError(
+            "Aucune colonne de notes : utilisez les colonnes assessment et score, "
+            "ou une colonne par type d'évaluation."
+        )
+    long = frame.melt(
+        id_vars=["line", *ID_COLUMNS, *extra],
+        value_vars=value_columns,
+        var_name="assessment",
+        value_name="score",
+    )
+    long = long[long["score"].notna() & (long["score"].str.strip() != "")]
+    return long.sort_values(["line", "assessment"], kind="stable").reset_index(drop=True)
+
+
+def _enrollment_lookups(year: AcademicYear, semester: Semester, matricules) -> tuple[dict, dict, dict]:
+    rows = Enrollment.objects.filter(year=year, semester=semester, student__matricule__in=matricules).values_list(
+        "student__matricule", "pk", "department_id", "promotion"
+    )
+    enrollment_ids, departments, promotions = {}, {}, {}
+    for matricule, pk, department_id, promotion in rows:
+        enrollment_ids[matricule] = pk
+        departments[matricule] = department_id
+        promotions[matricule] = promotion.strip().lower()
+    return enrollment_ids, departments, promotions
+
+
+def _offering_key(course_codes: pd.Series, departments: pd.Series, promotions: pd.Series) -> pd.Series:
+    return course_codes + "|" + departments.astype("Int64").astype(str) + "|" + promotions
+
+
+def _offering_lookup(year: AcademicYear, semester: Semester, course_codes) -> dict[str, int]:
+    rows = CourseOffering.objects.filter(
+        academic_year=year, semester=semester, course__course_code__in=course_codes
+    ).values_list("course__course_code", "department_id", "promotion_name", "pk")
+    return {
+        f"{code.upper()}|{department_id}|{promotion.strip().lower()}": pk
+        for code, department_id, promotion, pk in rows
+    }
+
+
+def validate(
+    grades: pd.DataFrame, year: AcademicYear, semester: Semester, types: dict[str, int], user=None
+) -> pd.DataFrame:
+    """
+    Résout les clés et contrôle les notes sur tout le tableau. Ajoute les
+    colonnes d'identifiants, `new_score`, `grading_date` et `error` (vide si
+    la note est valide). Les cours que `user` ne peut pas noter sont rejetés.
+    """
+
+    grades = grades.copy()
+    grades["matricule"] = grades["matricule"].fillna("").str.strip()
+    grades["course_code"] = grades["course_code"].fillna("").str.strip().str.upper()
+    grades["assessment"] = grades["assessment"].fillna("").str.strip()
+
+    enrollment_ids, departments, promotions = _enrollment_lookups(year, semester, grades["matricule"].unique().tolist())
+    grades["enrollment_id"] = grades["matricule"].map(enrollment_ids).astype("Int64")
+    offerings = _offering_lookup(year, semester, grades["course_code"].unique().tolist())
+    keys = _offering_key(
+        grades["course_code"],
+        grades["matricule"].map(departments),
+        grades["matricule"].map(promotions).fillna(""),
+    )
+    grades["course_offering_id"] = keys.map(offerings).astype("Int64")
+    editable = editable_offerings(user).filter(pk__in=set(offerings.values())).values_list("pk", flat=True)
+    unassigned = grades["course_offering_id"].notna() & ~grades["course_offering_id"].isin(list(editable))
+    grades["assessment_type_id"] = grades["assessment"].map(_normalize).map(types).astype("Int64")
+
+    scores = grades["score"].fillna("").str.strip().str.replace(",", ".", regex=False)
+    grades["new_score"] = pd.to_numeric(scores, errors="coerce").round(2)
+
+    today = pd.Timestamp(timezone.localdate())
+    if "grading_date" in grades.columns:
+        raw_dates = grades["grading_date"].fillna("").str.strip()
+        dates = pd.to_datetime(raw_dates, errors="coerce", dayfirst=True, format="mixed")
+        bad_date = (raw_dates != "") & dates.isna()
+        grades["grading_date"] = dates.fillna(today)
+    else:
+        bad_date = pd.Series(False, index=grades.index)
+        grades["grading_date"] = today
+
+    resolved = grades[KEY].notna().all(axis=1)
+    duplicated = resolved & grades.duplicated(KEY, keep=False)
+
+    conditions = [
+        grades["enrollment_id"].isna(),
+        grades["assessment_type_id"].isna(),
+        grades["course_offering_id"].isna(),
+        unassigned,
+        grades["new_score"].isna(),
+        (grades["new_score"] < 0) | (grades["new_score"] > 100),
+        bad_date,
+        duplicated,
+    ]
+    messages = [
+        "Matricule sans inscription pour l'année et le semestre choisis.",
+        "Type d'évaluation inconnu.",
+        "Cours non offert à la promotion de l'étudiant.",
+        "Cours non attribué à l'enseignant.",
+        "Note absente ou non numérique.",
+        "Note hors de l'intervalle 0 à 100.",
+        "Date d'évaluation invalide.",
+        "Note en double dans le fichier.",
+    ]
+    grades["error"] = np.select(conditions, messages, default="")
+    return grades
+
+
+def compare(grades: pd.DataFrame) -> pd.DataFrame:
+    """Ajoute l'ancienne note et le statut de chaque ligne valide (créée, modifiée, inchangée)."""
+
+    valid = grades["error"] == ""
+    existing = pd.DataFrame.from_records(
+        Grade.objects.filter(
+            course_offering_id__in=grades.loc[valid, "course_offering_id"].unique().tolist(),
+            assessment_type_id__in=grades.loc[valid, "assessment_type_id"].unique().tolist(),
+        ).values_list(*KEY, "score"),
+        columns=[*KEY, "old_score"],
+    )
+    existing = existing.astype({column: "Int64" for column in KEY})
+    existing["old_score"] = existing["old_score"].astype(float)
+
+    grades = grades.merge(existing, on=KEY, how="left")
+    grades["status"] = np.select(
+        [~valid.to_numpy(), grades["old_score"].isna(), grades["old_score"] == grades["new_score"]],
+        [REJECTED, CREATED, UNCHANGED],
+        default=UPDATED,
+    )
+    return grades
+
+
+def _write(grades: pd.DataFrame, recorded_by, batch_size: int) -> None:
+    changed = grades[grades["status"].isin([CREATED, UPDATED])]
+    objects = [
+        Grade(
+            enrollment_id=enrollment_id,
+            course_offering_id=course_offering_id,
+            assessment_type_id=assessment_type_id,
+            score=Decimal(f"{score:.2f}"),
+            grading_date=grading_date.date(),
+            recorded_by=recorded_by,
+        )
+        for enrollment_id, course_offering_id, assessment_type_id, score, grading_date in changed[
+            [*KEY, "new_score", "grading_date"]
+        ].itertuples(index=False)
+    ]
+    enrollment_ids = changed["enrollment_id"].unique().tolist()
+
+    with transaction.atomic():
+        Grade.objects.bulk_create(
+            objects,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=["enrollment", "course_offering", "assessment_type"],
+            update_fields=["score", "grading_date", "recorded_by"],
+        )
+        # `bulk_create` ne déclenche pas les signaux de `Grade`.
+        for start in range(0, len(enrollment_ids), batch_size):
+            refresh_results(enrollment_ids[start:start + batch_size])
+    if objects:
+        invalidate("total_grades")
+
+
+def import_grades(
+    frame: pd.DataFrame,
+    year: AcademicYear,
+    semester: Semester,
+    recorded_by=None,
+    dry_run: bool = False,
+    batch_size: int = 1000,
+) -> GradeImportReport:
+    """
+    Valide et enregistre les notes de la feuille ; `dry_run` produit le
+    rapport sans écrire. `recorded_by` limite l'import aux cours qu'il peut noter.
+    """
+
+    types = {_normalize(name): pk for pk, name in AssessmentType.objects.values_list("pk", "name")}
+    grades = compare(validate(to_long(frame, set(types)), year, semester, types, recorded_by))
+    if not dry_run:
+        _write(grades, recorded_by, batch_size)
+
+    counts = grades["status"].value_counts()
+    diff = grades.loc[grades["status"] != UNCHANGED].copy()
+    # Pour une note illisible, le rapport reprend la valeur saisie.
+    diff["new_score"] = diff["new_score"].astype(object).where(diff["new_score"].notna(), diff["score"])
+    diff = diff[list(REPORT_COLUMNS)]
+    return GradeImportReport(
+        created=int(counts.get(CREATED, 0)),
+        updated=int(counts.get(UPDATED, 0)),
+        unchanged=int(counts.get(UNCHANGED, 0)),
+        rejected=int(counts.get(REJECTED, 0)),
+        diff=diff,
+    )
+
+
+def run_grade_import(params: dict, output) -> str:
+    """
+    Gestionnaire du worker de rapports : importe la feuille déposée dans le
+    stockage et écrit le rapport des différences (CSV) dans `output`.
+    """
+
+    path = params["path"]
+    year = AcademicYear.objects.get(pk=params["year"])
+    semester = Semester.objects.get(pk=params["semester"])
+    user = get_user_model().objects.filter(pk=params.get("user")).first()
+    with default_storage.open(path, "rb") as file:
+        frame = read_sheet(file, path)
+    report = import_grades(frame, year, semester, recorded_by=user, dry_run=params.get("dry_run", False))
+
+    text = io.TextIOWrapper(output, encoding="utf-8-sig", newline="")
+    report.write_csv(text)
+    text.flush()
+    text.detach()
+    return f"import-notes-{timezone.localdate():%Y%m%d}.csv"
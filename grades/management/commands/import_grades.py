@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import AcademicYear, Semester
+from grades.importers import import_grades, read_sheet
+
+
+class Command(BaseCommand):
+    help = "Importe des notes depuis une feuille .xlsx ou .csv (présentation longue ou large)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="Feuille à importer (.xlsx ou .csv), une ligne d'en-tête.")
+        parser.add_argument("--year", required=True, help="Code de l'année académique.")
+        parser.add_argument("--semester", required=True, help="Code du semestre.")
+        parser.add_argument("--dry-run", action="store_true", help="Produit le rapport sans enregistrer les notes.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Notes écrites par requête.")
+        parser.add_argument("--report", help="Fichier CSV où écrire le rapport des différences (défaut : sortie standard).")
+
+    def handle(self, *args, **options):
+        path = options["file"]
+        if not path.lower().endswith((".xlsx", ".csv")):
+            raise CommandError("Format non pris en charge : utilisez un fichier .xlsx ou .csv.")
+        try:
+            year = AcademicYear.objects.get(code=options["year"])
+            semester = Semester.objects.get(code=options["semester"])
+        except (AcademicYear.DoesNotExist, Semester.DoesNotExist):
+            raise CommandError("Année académique ou semestre introuvable.")
+        try:
+            with open(path, "rb") as file:
+                frame = read_sheet(file, path)
+            report = import_grades(
+                frame, year, semester, dry_run=options["dry_run"], batch_size=options["batch_size"]
+            )
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        if options["report"]:
+            with open(options["report"], "w", encoding="utf-8-sig", newline="") as output:
+                report.write_csv(output)
+        elif not report.diff.empty:
+            report.write_csv(self.stdout)
+
+        prefix = "Simulation : " if options["dry_run"] else ""
+        self.stdout.write(self.style.SUCCESS(f"{prefix}{report.summary()}."))
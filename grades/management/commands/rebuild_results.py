@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from grades.results import rebuild_all_results
+
+
+class Command(BaseCommand):
+    help = "Reconstruit en masse la table des résultats LMD précalculés."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Nombre d'inscriptions recalculées par lot (défaut : 1000).",
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild_all_results(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"{count} inscription(s) recalculée(s)."))
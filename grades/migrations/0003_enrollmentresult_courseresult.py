@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+        ('enrollment', '0002_initial'),
+        ('grades', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnrollmentResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('average', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('total_credits', models.PositiveIntegerField(default=0)),
+                ('validated_credits', models.PositiveIntegerField(default=0)),
+                ('mention', models.CharField(max_length=50)),
+                ('decision', models.CharField(max_length=50)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('enrollment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='result', to='enrollment.enrollment')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CourseResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('credits', models.PositiveIntegerField(default=0)),
+                ('validated', models.BooleanField(default=False)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('course_offering', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='courses.courseoffering')),
+                ('enrollment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='course_results', to='enrollment.enrollment')),
+            ],
+            options={
+                'unique_together': {('enrollment', 'course_offering')},
+            },
+        ),
+    ]
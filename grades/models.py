@@ -15,3 +15,41 @@ class Grade(models.Model):
 
     class Meta:
         unique_together = ("enrollment", "course_offering", "assessment_type")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Inscription enregistrée, pour invalider l'ancienne si la note est réaffectée
+        instance._saved_enrollment_id = instance.__dict__.get("enrollment_id")
+        return instance
+
+
+class EnrollmentResult(models.Model):
+    """Synthèse LMD précalculée d'une inscription (moyenne, crédits, décision)."""
+
+    enrollment = models.OneToOneField(Enrollment, on_delete=models.CASCADE, related_name="result")
+    average = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    total_credits = models.PositiveIntegerField(default=0)
+    validated_credits = models.PositiveIntegerField(default=0)
+    mention = models.CharField(max_length=50)
+    decision = models.CharField(max_length=50)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    str_fields = ("enrollment",)
+
+    def __str__(self):
+        return f"Résultat {self.enrollment}"
+
+
+class CourseResult(models.Model):
+    """Note pondérée précalculée d'une inscription pour un cours offert."""
+
+    enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE, related_name="course_results")
+    course_offering = models.ForeignKey(CourseOffering, on_delete=models.CASCADE)
+    score = models.DecimalField(max_digits=5, decimal_places=2)
+    credits = models.PositiveIntegerField(default=0)
+    validated = models.BooleanField(default=False)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("enrollment", "course_offering")
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import NamedTuple
+
+from django.db.models import QuerySet
+
+from .results import result_reads
+
+
+class ProclamationEntry(NamedTuple):
+    enrollment_id: int
+    student: str
+    department: str
+    average: Decimal | None
+    validated_credits: int
+    mention: str
+    decision: str
+
+
+def compute_proclamation(enrollments: QuerySet) -> list[ProclamationEntry]:
+    """
+    Lit moyenne pondérée, crédits validés, mention et décision de chaque
+    inscription dans les résultats précalculés, avec un nombre constant de
+    requêtes quel que soit l'effectif.
+    """
+
+    with result_reads(enrollments):
+        rows = enrollments.order_by("department__name", "student__last_name").values_list(
+            "pk",
+            "student__first_name",
+            "student__last_name",
+            "student__matricule",
+            "department__name",
+            "result__average",
+            "result__validated_credits",
+            "result__mention",
+            "result__decision",
+        )
+        return [
+            ProclamationEntry(
+                enrollment_id=pk,
+                student=f"{first_name} {last_name} ({matricule})",
+                department=department or "-",
+                average=average,
+                validated_credits=validated_credits,
+                mention=mention,
+                decision=decision,
+            )
+            for pk, first_name, last_name, matricule, department, average, validated_credits, mention, decision in rows
+        ]
@@ -0,0 +1,65 @@
+"""
+Rendu de la liste de proclamation, exécuté par le worker de rapports.
+"""
+
+from __future__ import annotations
+
+from django.db.models import QuerySet
+
+from core.models import AcademicYear, Department
+from enrollment.models import Enrollment
+from ums.pdf import Paragraph, Spacer, build_table, get_pdf_styles, render_pdf
+
+from .proclamation import ProclamationEntry, compute_proclamation
+
+
+def proclamation_enrollments(year, promotion: str, department=None) -> QuerySet:
+    enrollments = Enrollment.objects.filter(year=year, promotion=promotion)
+    if department is not None:
+        enrollments = enrollments.filter(department=department)
+    return enrollments
+
+
+def proclamation_flowables(year, promotion: str, department, entries: list[ProclamationEntry]) -> list:
+    styles = get_pdf_styles()
+    flow = [
+        Paragraph("LISTE DE PROCLAMATION", styles["Title"]),
+        Paragraph(
+            f"Promotion: {promotion} | Année: {year.name}"
+            + (f" | Département: {department.name}" if department else ""),
+            styles["Heading2"],
+        ),
+        Spacer(1, 12),
+    ]
+    data = [["Étudiant", "Département", "Moyenne", "Crédits validés", "Mention", "Décision"]]
+
+    for entry in entries:
+        data.append(
+            [
+                entry.student,
+                entry.department,
+                f"{entry.average:.2f}" if entry.average is not None else "N/A",
+                entry.validated_credits,
+                entry.mention,
+                entry.decision,
+            ]
+        )
+
+    flow.append(build_table(data, header=True))
+    flow.append(Spacer(1, 18))
+    flow.append(
+        Paragraph(
+            "La présente liste fait office de procès-verbal de proclamation conformément aux exigences LMD.",
+            styles["BodyText"],
+        )
+    )
+    return flow
+
+
+def render_proclamation(params: dict, output) -> str:
+    year = AcademicYear.objects.get(pk=params["year"])
+    department = Department.objects.get(pk=params["department"]) if params.get("department") else None
+    promotion = params["promotion"]
+    entries = compute_proclamation(proclamation_enrollments(year, promotion, department))
+    render_pdf(lambda: proclamation_flowables(year, promotion, department, entries), output=output)
+    return f"proclamation-{promotion}-{year.code}.pdf"
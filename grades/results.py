@@ -0,0 +1,160 @@
+"""
+Table de résultats matérialisée (`EnrollmentResult` / `CourseResult`).
+
+Les rapports lisent ces lignes au lieu d'agréger `Grade` à chaque requête ;
+les signaux ne recalculent que les inscriptions touchées, une fois par
+transaction (`ums.deferred`).
+
+Le recalcul lit toujours le primaire : appelé depuis un rapport lu sur le
+réplica, il y lirait des notes en retard et écraserait des résultats frais.
+"""
+
+from __future__ import annotations
+
+from typing import ContextManager, Iterable
+
+from django.db import transaction
+from django.db.models import QuerySet
+
+from enrollment.models import Enrollment
+from ums.db_router import use_primary, use_replica
+from ums.deferred import DeferredBatch
+from ums.pdf import lmd_decision, lmd_mention
+
+from .computation import CourseScore, ResultSummary, course_scores, summarize, summarize_by_enrollment
+from .models import CourseResult, EnrollmentResult, Grade
+
+
+def refresh_results(enrollment_ids: Iterable[int]) -> None:
+    """
+    Recalcule les résultats des inscriptions données en un nombre constant
+    de requêtes (un calcul groupé, puis écritures en masse).
+    """
+
+    enrollment_ids = set(enrollment_ids)
+    if not enrollment_ids:
+        return
+    with use_primary():
+        _refresh_results(enrollment_ids)
+
+
+def _refresh_results(enrollment_ids: set[int]) -> None:
+    # Les inscriptions supprimées entre-temps (cascade) n'ont plus de résultat.
+    enrollment_ids = list(Enrollment.objects.filter(pk__in=enrollment_ids).values_list("pk", flat=True))
+    if not enrollment_ids:
+        return
+
+    scores = course_scores(Grade.objects.filter(enrollment_id__in=enrollment_ids))
+    summaries = summarize_by_enrollment(scores)
+    empty = ResultSummary(average=None, total_credits=0, validated_credits=0)
+
+    with transaction.atomic():
+        CourseResult.objects.filter(enrollment_id__in=enrollment_ids).delete()
+        CourseResult.objects.bulk_create(
+            [
+                CourseResult(
+                    enrollment_id=score.enrollment_id,
+                    course_offering_id=score.course_offering_id,
+                    score=score.score,
+                    credits=score.credits,
+                    validated=score.validated,
+                )
+                for score in scores
+            ]
+        )
+        EnrollmentResult.objects.bulk_create(
+            [
+                EnrollmentResult(
+                    enrollment_id=enrollment_id,
+                    average=summary.average,
+                    total_credits=summary.total_credits,
+                    validated_credits=summary.validated_credits,
+                    mention=lmd_mention(summary.average),
+                    decision=lmd_decision(summary.average),
+                )
+                for enrollment_id in enrollment_ids
+                for summary in [summaries.get(enrollment_id, empty)]
+            ],
+            update_conflicts=True,
+            unique_fields=["enrollment"],
+            update_fields=["average", "total_credits", "validated_credits", "mention", "decision", "computed_at"],
+        )
+
+
+def rebuild_all_results(batch_size: int = 1000) -> int:
+    """Reconstruit toute la table par lots d'inscriptions. Retourne le nombre traité."""
+
+    ids = list(Enrollment.objects.order_by("pk").values_list("pk", flat=True))
+    for start in range(0, len(ids), batch_size):
+        refresh_results(ids[start:start + batch_size])
+    return len(ids)
+
+
+_pending = DeferredBatch("grades_results", refresh_results)
+
+
+def schedule_refresh(enrollment_ids: Iterable[int]) -> None:
+    """
+    Regroupe les inscriptions à rafraîchir et les recalcule en une fois au
+    commit de la transaction courante (immédiatement en autocommit).
+    """
+
+    _pending.add(enrollment_ids)
+
+
+def ensure_results(enrollments: QuerySet) -> bool:
+    """
+    Calcule à la volée, sur le primaire, les résultats encore absents de la
+    table. Retourne vrai s'il a fallu en écrire.
+    """
+
+    with use_primary():
+        missing = list(enrollments.filter(result__isnull=True).values_list("pk", flat=True))
+    refresh_results(missing)
+    return bool(missing)
+
+
+def result_reads(enrollments: QuerySet) -> ContextManager:
+    """
+    Assure les résultats de `enrollments`, puis retourne le contexte où lire
+    les rapports qui en dépendent : le réplica, ou le primaire si des
+    résultats viennent d'y être écrits (le réplica ne les a pas encore).
+    Les requêtes doivent être évaluées dans le bloc.
+    """
+
+    return use_primary() if ensure_results(enrollments) else use_replica()
+
+
+def load_summaries(enrollments: QuerySet) -> dict[int, EnrollmentResult]:
+    """Résultats précalculés des inscriptions, indexés par identifiant d'inscription."""
+
+    with result_reads(enrollments):
+        return {
+            result.enrollment_id: result
+            for result in EnrollmentResult.objects.filter(enrollment__in=enrollments)
+        }
+
+
+def load_course_scores(enrollments: QuerySet) -> list[CourseScore]:
+    """Notes par cours précalculées, au format de `grades.computation`."""
+
+    with result_reads(enrollments):
+        rows = (
+            CourseResult.objects.filter(enrollment__in=enrollments)
+            .order_by("enrollment_id", "course_offering__course__course_name")
+            .values_list(
+                "enrollment_id",
+                "course_offering_id",
+                "course_offering__course__course_name",
+                "course_offering__course__course_code",
+                "credits",
+                "score",
+            )
+        )
+        return [CourseScore(*row) for row in rows]
+
+
+def load_summary(enrollments: QuerySet) -> ResultSummary:
+    """Synthèse consolidée de plusieurs inscriptions (parcours complet)."""
+
+    return summarize(load_course_scores(enrollments))
@@ -0,0 +1,111 @@
+"""
+Saisie des notes en grille : une feuille par cours offert et type d'évaluation.
+
+La feuille liste les inscriptions de la promotion du cours offert. Toutes les
+notes saisies sont enregistrées en une requête (`bulk_create` avec mise à jour
+sur la clé unique inscription × cours offert × évaluation) ; les notes
+effacées sont supprimées. `bulk_create` ne déclenche pas les signaux de
+`Grade` : les résultats des inscriptions touchées sont recalculés ici.
+"""
+
+from __future__ import annotations
+
+import datetime
+from decimal import Decimal
+from typing import NamedTuple
+
+from django.db import transaction
+from django.db.models import QuerySet
+
+from assessments.models import AssessmentType
+from core.kpi import invalidate
+from courses.models import CourseOffering
+from enrollment.models import Enrollment
+from staff.models import CourseAssignment
+
+from .models import Grade
+from .results import refresh_results
+
+
+class SheetResult(NamedTuple):
+    saved: int
+    deleted: int
+
+
+def offering_enrollments(offering: CourseOffering) -> QuerySet:
+    """Inscriptions de la promotion concernée par le cours offert, par ordre alphabétique."""
+
+    return (
+        Enrollment.objects.filter(
+            year_id=offering.academic_year_id,
+            semester_id=offering.semester_id,
+            department_id=offering.department_id,
+            promotion__iexact=offering.promotion_name,
+        )
+        .select_related("student")
+        .order_by("student__last_name", "student__first_name", "pk")
+    )
+
+
+def sheet_scores(offering: CourseOffering, assessment_type: AssessmentType) -> dict[int, Decimal]:
+    """Notes déjà enregistrées sur la feuille, par identifiant d'inscription."""
+
+    return dict(
+        Grade.objects.filter(course_offering=offering, assessment_type=assessment_type).values_list(
+            "enrollment_id", "score"
+        )
+    )
+
+
+def editable_offerings(user) -> QuerySet:
+    """Cours offerts accessibles : un enseignant ne voit que ses attributions."""
+
+    offerings = CourseOffering.objects.select_related("course", "academic_year", "semester", "department")
+    if getattr(user, "role", None) == "PROFESSOR" and not user.is_superuser:
+        assigned = CourseAssignment.objects.filter(teacher=user).values("course_offering_id")
+        offerings = offerings.filter(pk__in=assigned)
+    return offerings.order_by("-academic_year__code", "course__course_name", "promotion_name")
+
+
+def save_sheet(
+    offering: CourseOffering,
+    assessment_type: AssessmentType,
+    scores: dict[int, Decimal | None],
+    grading_date: datetime.date,
+    recorded_by,
+) -> SheetResult:
+    """
+    Enregistre la feuille : `scores` associe chaque inscription à sa note, ou
+    à `None` si la case est vide (la note existante est alors supprimée).
+    """
+
+    filled = {enrollment_id: score for enrollment_id, score in scores.items() if score is not None}
+    cleared = [enrollment_id for enrollment_id, score in scores.items() if score is None]
+
+    with transaction.atomic():
+        Grade.objects.bulk_create(
+            [
+                Grade(
+                    enrollment_id=enrollment_id,
+                    course_offering=offering,
+                    assessment_type=assessment_type,
+                    score=max(0, min(score, 100)),
+                    grading_date=grading_date,
+                    recorded_by=recorded_by,
+                )
+                for enrollment_id, score in filled.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["enrollment", "course_offering", "assessment_type"],
+            update_fields=["score", "grading_date", "recorded_by"],
+        )
+        refresh_results(filled)
+        deleted = 0
+        if cleared:
+            # La suppression passe par les signaux de `Grade`, qui recalculent au commit.
+            deleted, _ = Grade.objects.filter(
+                course_offering=offering, assessment_type=assessment_type, enrollment_id__in=cleared
+            ).delete()
+
+    invalidate("total_grades")
+    return SheetResult(saved=len(filled), deleted=deleted)
@@ -1,11 +1,48 @@
-from django.db.models.signals import pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
-from .models import Grade
+from assessments.models import AssessmentWeighting
+from courses.models import Course
+
+from .models import CourseResult, Grade
+from .results import schedule_refresh
 
 
 @receiver(pre_save, sender=Grade)
 def grade_pre_save(sender, instance, **kwargs):
     if instance.score is not None:
         instance.score = max(0, min(instance.score, 100))
+    # Une note réaffectée à une autre inscription invalide aussi l'ancienne.
+    previous = getattr(instance, "_saved_enrollment_id", None)
+    if previous and previous != instance.enrollment_id:
+        schedule_refresh([previous])
+
+
+@receiver(post_save, sender=Grade)
+@receiver(post_delete, sender=Grade)
+def grade_changed(sender, instance, **kwargs):
+    instance._saved_enrollment_id = instance.enrollment_id
+    schedule_refresh([instance.enrollment_id])
+
+
+@receiver(post_save, sender=AssessmentWeighting)
+@receiver(post_delete, sender=AssessmentWeighting)
+def weighting_changed(sender, instance, **kwargs):
+    # Une pondération déplacée vers un autre cours offert invalide aussi l'ancien.
+    offerings = {instance.course_offering_id, getattr(instance, "_saved_course_offering_id", None)} - {None}
+    instance._saved_course_offering_id = instance.course_offering_id
+    schedule_refresh(
+        Grade.objects.filter(course_offering_id__in=offerings)
+        .values_list("enrollment_id", flat=True)
+        .distinct()
+    )
+
 
+@receiver(post_save, sender=Course)
+def course_credits_changed(sender, instance, **kwargs):
+    schedule_refresh(
+        CourseResult.objects.filter(course_offering__course=instance)
+        .exclude(credits=instance.credits)
+        .values_list("enrollment_id", flat=True)
+        .distinct()
+    )
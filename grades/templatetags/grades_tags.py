@@ -1,11 +1,10 @@
 from django import template
 
-from grades.models import Grade
+from core.kpi import kpi_value
 
 register = template.Library()
 
 
 @register.simple_tag
 def total_grades():
-    return Grade.objects.count()
-
+    return kpi_value("total_grades")
@@ -1,3 +1,274 @@
-from django.test import TestCase
+import io
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from assessments.models import AssessmentWeighting
+from core.models import AcademicYear, Semester
+from core.seeding import SeedVolumes, seed
+from courses.models import CourseOffering
+from enrollment.models import Enrollment
+from staff.models import CourseAssignment
+from ums.db_router import ReplicaRouter, use_replica
+
+from .computation import CourseScore, course_scores, summarize, summarize_by_enrollment
+from .importers import import_grades, read_sheet
+from .models import EnrollmentResult, Grade
+from .proclamation import compute_proclamation
+from .results import schedule_refresh
+from .sheets import save_sheet
+
+SMALL = SeedVolumes(
+    faculties=1, departments=1, promotions=1, courses=2, students=3, payments=1, expenses=1, professors=1, cashiers=1
+)
+
+
+class ResultsTestMixin:
+    @classmethod
+    def setUpTestData(cls):
+        seed(SMALL)
+
+    def assertResultUpToDate(self, enrollment_id):
+        expected = summarize_by_enrollment(course_scores(Grade.objects.filter(enrollment_id=enrollment_id)))
+        result = EnrollmentResult.objects.get(enrollment_id=enrollment_id)
+        summary = expected.get(enrollment_id)
+        self.assertEqual(result.average, summary.average if summary else None)
+        self.assertEqual(result.validated_credits, summary.validated_credits if summary else 0)
+
+
+class CourseScoreTests(ResultsTestMixin, TestCase):
+    def setUp(self):
+        grade = Grade.objects.order_by("pk").first()
+        offering_id = grade.course_offering_id
+        self.grades = Grade.objects.filter(enrollment_id=grade.enrollment_id, course_offering_id=offering_id)
+        first, second, *others = self.grades.order_by("assessment_type_id")
+        Grade.objects.filter(pk__in=[other.pk for other in others]).delete()
+        Grade.objects.filter(pk=first.pk).update(score=Decimal("40"))
+        Grade.objects.filter(pk=second.pk).update(score=Decimal("80"))
+        AssessmentWeighting.objects.filter(course_offering_id=offering_id).delete()
+        self.weightings = [
+            AssessmentWeighting.objects.create(
+                course_offering_id=offering_id, assessment_type_id=item.assessment_type_id, weight_percentage=weight
+            )
+            for item, weight in ((first, Decimal("75")), (second, Decimal("25")))
+        ]
+
+    def score(self):
+        [score] = course_scores(self.grades)
+        return score.score
+
+    def test_course_score_is_weighted_by_assessment(self):
+        self.assertEqual(self.score(), Decimal("50.00"))
+
+    def test_incomplete_weighting_falls_back_to_plain_average(self):
+        self.weightings[1].delete()
+        self.assertEqual(self.score(), Decimal("60.00"))
+        self.weightings[0].delete()
+        self.assertEqual(self.score(), Decimal("60.00"))
+
+    def test_average_is_weighted_by_credits(self):
+        scores = [
+            CourseScore(1, 1, "Analyse", "MAT101", 4, Decimal("50")),
+            CourseScore(1, 2, "Algèbre", "MAT102", 2, Decimal("80")),
+            CourseScore(1, 3, "Physique", "PHY101", 2, Decimal("30")),
+        ]
+        self.assertEqual(summarize(scores), (Decimal("52.50"), 8, 6))
+        self.assertEqual(summarize([]).average, None)
+
+
+class ResultRefreshTests(ResultsTestMixin, TestCase):
+    def test_grade_save_refreshes_result_on_commit(self):
+        grade = Grade.objects.order_by("pk").first()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            grade.score = Decimal("0") if grade.score else Decimal("100")
+            grade.save()
+            grade.save()
+        self.assertEqual(callbacks.count(connection.deferred_grades_results), 1)
+        self.assertResultUpToDate(grade.enrollment_id)
+
+    def test_grade_delete_refreshes_result(self):
+        grade = Grade.objects.order_by("pk").first()
+        with self.captureOnCommitCallbacks(execute=True):
+            Grade.objects.filter(enrollment_id=grade.enrollment_id).delete()
+        self.assertResultUpToDate(grade.enrollment_id)
+        self.assertIsNone(EnrollmentResult.objects.get(enrollment_id=grade.enrollment_id).average)
+
+    def test_reassigned_grade_refreshes_both_enrollments(self):
+        grade = Grade.objects.order_by("pk").first()
+        previous = grade.enrollment_id
+        other = Enrollment.objects.filter(semester_id=grade.enrollment.semester_id).exclude(pk=previous).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            Grade.objects.filter(enrollment=other, course_offering_id=grade.course_offering_id).delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            grade.enrollment = other
+            grade.save()
+        self.assertResultUpToDate(previous)
+        self.assertResultUpToDate(other.pk)
+
+    def test_moved_weighting_refreshes_both_offerings(self):
+        weighting = AssessmentWeighting.objects.order_by("pk").first()
+        previous = weighting.course_offering_id
+        other = CourseOffering.objects.exclude(pk=previous).order_by("pk").first()
+        with self.captureOnCommitCallbacks(execute=True):
+            AssessmentWeighting.objects.filter(
+                course_offering=other, assessment_type=weighting.assessment_type
+            ).delete()
+            Grade.objects.filter(course_offering=other).delete()
+        with self.captureOnCommitCallbacks() as callbacks:
+            weighting.course_offering = other
+            weighting.save()
+        expected = set(Grade.objects.filter(course_offering_id=previous).values_list("enrollment_id", flat=True))
+        self.assertTrue(expected)
+        self.assertEqual(callbacks, [connection.deferred_grades_results])
+        self.assertEqual(connection.deferred_grades_results.ids, expected)
+
+    def test_rolled_back_refresh_is_discarded(self):
+        enrollment_ids = list(Enrollment.objects.order_by("pk").values_list("pk", flat=True))
+        with self.captureOnCommitCallbacks() as callbacks:
+            try:
+                with transaction.atomic():
+                    schedule_refresh([enrollment_ids[0]])
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            schedule_refresh([enrollment_ids[1]])
+        self.assertEqual(callbacks, [connection.deferred_grades_results])
+        self.assertEqual(connection.deferred_grades_results.ids, {enrollment_ids[1]})
+
+
+class ProclamationTests(ResultsTestMixin, TestCase):
+    def test_query_count_does_not_grow_with_enrollments(self):
+        enrollments = Enrollment.objects.all()
+        compute_proclamation(enrollments)
+        single = enrollments.filter(pk=enrollments.order_by("pk").first().pk)
+        with CaptureQueriesContext(connection) as one:
+            compute_proclamation(single)
+        with self.assertNumQueries(len(one)):
+            entries = compute_proclamation(enrollments)
+        self.assertEqual(len(entries), enrollments.count())
+
+        expected = summarize_by_enrollment(course_scores(Grade.objects.all()))
+        for entry in entries:
+            summary = expected.get(entry.enrollment_id)
+            self.assertEqual(entry.average, summary.average if summary else None)
+
+
+@override_settings(REPLICA_DATABASE="replica")
+class ResultReplicaTests(ResultsTestMixin, TestCase):
+    def route_reads(self):
+        """Bases choisies par le routeur pendant le bloc ; les requêtes, elles, restent sur `default`."""
+
+        read = ReplicaRouter.db_for_read
+        routed = []
+
+        def record(router, model, **hints):
+            routed.append((model, read(router, model, **hints)))
+            return DEFAULT_DB_ALIAS
+
+        return routed, mock.patch.object(ReplicaRouter, "db_for_read", record)
+
+    def test_results_are_computed_from_primary_under_replica(self):
+        EnrollmentResult.objects.all().delete()
+        enrollments = Enrollment.objects.all()
+        routed, patch = self.route_reads()
+        with patch, use_replica():
+            compute_proclamation(enrollments)
+        self.assertTrue(EnrollmentResult.objects.exists())
+        self.assertIn(Grade, {model for model, _ in routed})
+        self.assertEqual({alias for _, alias in routed}, {DEFAULT_DB_ALIAS})
+
+        routed.clear()
+        with patch, use_replica():
+            compute_proclamation(enrollments)
+        self.assertEqual(routed[0], (Enrollment, DEFAULT_DB_ALIAS))
+        self.assertEqual({alias for _, alias in routed[1:]}, {"replica"})
+
+
+class GradeSheetTests(ResultsTestMixin, TestCase):
+    def test_save_sheet_writes_scores_and_results(self):
+        grade = Grade.objects.select_related("course_offering", "assessment_type").order_by("pk").first()
+        scores = dict(
+            Grade.objects.filter(
+                course_offering=grade.course_offering, assessment_type=grade.assessment_type
+            ).values_list("enrollment_id", "score")
+        )
+        first, *others = sorted(scores)
+        scores[first] = Decimal("120")
+        scores[others[0]] = None
+        with self.captureOnCommitCallbacks(execute=True):
+            result = save_sheet(
+                grade.course_offering, grade.assessment_type, scores, grade.grading_date, recorded_by=None
+            )
+
+        self.assertEqual((result.saved, result.deleted), (len(scores) - 1, 1))
+        saved = Grade.objects.get(
+            enrollment_id=first, course_offering=grade.course_offering, assessment_type=grade.assessment_type
+        )
+        self.assertEqual(saved.score, 100)
+        for enrollment_id in scores:
+            self.assertResultUpToDate(enrollment_id)
+
+
+class GradeImportTests(ResultsTestMixin, TestCase):
+    def sheet(self, grade, new_score):
+        matricule = grade.enrollment.student.matricule
+        course_code = grade.course_offering.course.course_code
+        sheet = (
+            "matricule;course_code;assessment;score\n"
+            f"{matricule};{course_code};{grade.assessment_type.name};{new_score}\n"
+            f"INCONNU;{course_code};{grade.assessment_type.name};12\n"
+        )
+        frame = read_sheet(io.BytesIO(sheet.encode()), "notes.csv")
+        year = AcademicYear.objects.get(pk=grade.enrollment.year_id)
+        semester = Semester.objects.get(pk=grade.enrollment.semester_id)
+        return frame, year, semester
+
+    def first_grade(self):
+        return Grade.objects.select_related(
+            "enrollment__student", "course_offering__course", "assessment_type"
+        ).order_by("pk").first()
+
+    def test_import_reports_differences(self):
+        grade = self.first_grade()
+        new_score = Decimal("0") if grade.score else Decimal("100")
+        frame, year, semester = self.sheet(grade, new_score)
+
+        dry_run = import_grades(frame, year, semester, dry_run=True)
+        self.assertEqual((dry_run.updated, dry_run.rejected, dry_run.created), (1, 1, 0))
+        grade.refresh_from_db()
+        self.assertNotEqual(grade.score, new_score)
+
+        report = import_grades(frame, year, semester)
+        self.assertEqual(list(report.diff["status"]), ["modifiée", "rejetée"])
+        self.assertEqual(report.diff.iloc[0]["old_score"], float(grade.score))
+        grade.refresh_from_db()
+        self.assertEqual(grade.score, new_score)
+        self.assertResultUpToDate(grade.enrollment_id)
+
+        output = io.StringIO()
+        report.write_csv(output)
+        self.assertIn("1 modifiée(s)", output.getvalue())
+
+    def test_professor_imports_only_assigned_courses(self):
+        grade = self.first_grade()
+        new_score = Decimal("0") if grade.score else Decimal("100")
+        frame, year, semester = self.sheet(grade, new_score)
+        professor = get_user_model().objects.create_user(
+            email="titulaire@ums.local", password=None, first_name="E", last_name="F", role="PROFESSOR"
+        )
+
+        report = import_grades(frame, year, semester, recorded_by=professor)
+        self.assertEqual((report.updated, report.rejected), (0, 2))
+        self.assertEqual(report.diff.iloc[0]["error"], "Cours non attribué à l'enseignant.")
+        grade.refresh_from_db()
+        self.assertNotEqual(grade.score, new_score)
+
+        CourseAssignment.objects.create(
+            course_offering=grade.course_offering, teacher=professor, assignment_role="Titulaire"
+        )
+        report = import_grades(frame, year, semester, recorded_by=professor)
+        self.assertEqual((report.updated, report.rejected), (1, 1))
@@ -7,6 +7,9 @@ app_name = "grades"
 urlpatterns = [
     path("", views.GradeListView.as_view(), name="grade_list"),
     path("create/", views.GradeCreateView.as_view(), name="grade_create"),
+    path("import/", views.GradeImportView.as_view(), name="grade_import"),
+    path("sheet/", views.GradeSheetSelectView.as_view(), name="grade_sheet_select"),
+    path("sheet/<int:offering>/<int:assessment>/", views.GradeSheetView.as_view(), name="grade_sheet"),
     path("<int:pk>/", views.GradeDetailView.as_view(), name="grade_detail"),
     path("<int:pk>/update/", views.GradeUpdateView.as_view(), name="grade_update"),
     path("<int:pk>/delete/", views.GradeDeleteView.as_view(), name="grade_delete"),
@@ -1,7 +1,10 @@
-from django.db.models import Avg
+from django.contrib import messages
+from django.core.files.storage import default_storage
 from django.http import Http404
-from django.shortcuts import get_object_or_404
+from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.text import get_valid_filename
 from django.views import View
+from django.views.generic import FormView
 
 from ums.mixins import (
     BaseCreateView,
@@ -12,20 +15,14 @@ from ums.mixins import (
     RoleGroups,
     RolePermissionMixin,
 )
-from ums.pdf import (
-    Paragraph,
-    Spacer,
-    build_pdf_response,
-    build_table,
-    get_pdf_styles,
-    lmd_decision,
-    lmd_mention,
-)
 
-from .forms import GradeForm
+from .forms import GradeForm, GradeImportUploadForm, GradeSheetForm, GradeSheetSelectForm
 from .models import Grade
+from .reports import proclamation_enrollments
+from .sheets import editable_offerings, offering_enrollments, save_sheet, sheet_scores
+from assessments.models import AssessmentType
 from core.models import AcademicYear, Department
-from enrollment.models import Enrollment
+from reports.jobs import enqueue
 
 
 class AcademicAccessMixin:
@@ -36,6 +33,9 @@ class GradeListView(AcademicAccessMixin, BaseListView):
     model = Grade
     list_display = ("enrollment", "course_offering", "assessment_type", "score", "grading_date")
     page_title = "Notes"
+    keyset_field = "pk"
+    search_fields = ("=enrollment__student__matricule", "^enrollment__student__last_name")
+    list_filter = ("course_offering", "assessment_type")
     create_url_name = "grades:grade_create"
     detail_url_name = "grades:grade_detail"
     update_url_name = "grades:grade_update"
@@ -65,8 +65,103 @@ class GradeDeleteView(AcademicAccessMixin, BaseDeleteView):
     success_url_name = "grades:grade_list"
 
 
+class GradeSheetSelectView(AcademicAccessMixin, RolePermissionMixin, View):
+    """Choix du cours offert et de l'évaluation à saisir en grille."""
+
+    template_name = "grades/grade_sheet_select.html"
+
+    def get(self, request):
+        form = GradeSheetSelectForm(request.GET or None, offerings=editable_offerings(request.user))
+        if form.is_valid():
+            return redirect(
+                "grades:grade_sheet",
+                offering=form.cleaned_data["course_offering"].pk,
+                assessment=form.cleaned_data["assessment_type"].pk,
+            )
+        return render(request, self.template_name, {"form": form, "page_title": "Saisie des notes"})
+
+
+class GradeSheetView(AcademicAccessMixin, RolePermissionMixin, View):
+    """
+    Feuille de notes d'un cours offert pour une évaluation : toutes les notes
+    de la promotion sont saisies et enregistrées en une seule soumission.
+    """
+
+    template_name = "grades/grade_sheet.html"
+
+    def get_form(self, data=None):
+        self.offering = get_object_or_404(editable_offerings(self.request.user), pk=self.kwargs["offering"])
+        self.assessment_type = get_object_or_404(AssessmentType, pk=self.kwargs["assessment"])
+        return GradeSheetForm(
+            data,
+            enrollments=offering_enrollments(self.offering),
+            scores=sheet_scores(self.offering, self.assessment_type),
+        )
+
+    def render_sheet(self, form):
+        context = {
+            "form": form,
+            "offering": self.offering,
+            "assessment_type": self.assessment_type,
+            "page_title": f"Notes — {self.offering.course} ({self.assessment_type})",
+        }
+        return render(self.request, self.template_name, context)
+
+    def get(self, request, offering, assessment):
+        return self.render_sheet(self.get_form())
+
+    def post(self, request, offering, assessment):
+        form = self.get_form(request.POST)
+        if not form.is_valid():
+            return self.render_sheet(form)
+        result = save_sheet(
+            self.offering,
+            self.assessment_type,
+            form.changed_scores(),
+            form.cleaned_data["grading_date"],
+            request.user,
+        )
+        messages.success(
+            request, f"{result.saved} note(s) enregistrée(s), {result.deleted} note(s) supprimée(s)."
+        )
+        return redirect("grades:grade_sheet", offering=offering, assessment=assessment)
+
+
+class GradeImportView(AcademicAccessMixin, RolePermissionMixin, FormView):
+    """
+    Dépôt d'une feuille de notes : l'import est exécuté par le worker de
+    rapports, qui produit le rapport des notes créées, modifiées et rejetées.
+    Un enseignant n'y importe que les notes des cours qui lui sont attribués.
+    """
+
+    form_class = GradeImportUploadForm
+    template_name = "generic/form.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["page_title"] = "Import de notes"
+        return context
+
+    def form_valid(self, form):
+        upload = form.cleaned_data["file"]
+        path = default_storage.save(f"imports/grades/{get_valid_filename(upload.name)}", upload)
+        job = enqueue(
+            "grade_import",
+            {
+                "path": path,
+                "year": form.cleaned_data["year"].pk,
+                "semester": form.cleaned_data["semester"].pk,
+                "dry_run": form.cleaned_data["dry_run"],
+                "user": self.request.user.pk,
+            },
+            self.request.user,
+        )
+        return redirect("reports:job_detail", pk=job.pk)
+
+
 class ProclamationListPDFView(RolePermissionMixin, View):
     allowed_roles = RoleGroups.ACADEMIC
+    query_budget = 12
 
     def get(self, request):
         year_id = request.GET.get("year")
@@ -86,54 +181,12 @@ class ProclamationListPDFView(RolePermissionMixin, View):
         if department_id:
             department = get_object_or_404(Department, pk=department_id)
 
-        enrollments = Enrollment.objects.filter(year=year, promotion=promotion)
-        if department:
-            enrollments = enrollments.filter(department=department)
-        enrollments = enrollments.select_related("student", "department").order_by(
-            "department__name",
-            "student__last_name",
-        )
-
-        if not enrollments.exists():
+        if not proclamation_enrollments(year, promotion, department).exists():
             raise Http404("Aucune inscription pour les critères fournis.")
 
-        styles = get_pdf_styles()
-
-        def build():
-            flow = [
-                Paragraph("LISTE DE PROCLAMATION", styles["Title"]),
-                Paragraph(
-                    f"Promotion: {promotion} | Année: {year.name}"
-                    + (f" | Département: {department.name}" if department else ""),
-                    styles["Heading2"],
-                ),
-                Spacer(1, 12),
-            ]
-            data = [["Étudiant", "Département", "Moyenne", "Mention", "Décision"]]
-
-            for enrollment in enrollments:
-                avg = (
-                    Grade.objects.filter(enrollment=enrollment).aggregate(avg=Avg("score"))["avg"]
-                )
-                data.append(
-                    [
-                        str(enrollment.student),
-                        enrollment.department.name if enrollment.department else "-",
-                        f"{avg:.2f}" if avg is not None else "N/A",
-                        lmd_mention(avg),
-                        lmd_decision(avg),
-                    ]
-                )
-
-            flow.append(build_table(data, header=True))
-            flow.append(Spacer(1, 18))
-            flow.append(
-                Paragraph(
-                    "La présente liste fait office de procès-verbal de proclamation conformément aux exigences LMD.",
-                    styles["BodyText"],
-                )
-            )
-            return flow
-
-        filename = f"proclamation-{promotion}-{year.code if hasattr(year, 'code') else year.pk}.pdf"
-        return build_pdf_response(filename, build)
+        job = enqueue(
+            "proclamation",
+            {"year": year.pk, "promotion": promotion, "department": department.pk if department else None},
+            request.user,
+        )
+        return redirect("reports:job_detail", pk=job.pk)
@@ -0,0 +1,130 @@
+"""
+Soldes financiers précalculés (`FeeBalance`) : dû, payé et reste à payer par
+inscription et par frais académique.
+
+Une inscription doit les frais de son année et de son semestre, ainsi que
+tout frais sur lequel elle a un paiement. Les paiements modifient le solde
+concerné par une mise à jour relative (`F()`) dans la transaction même de
+l'écriture ; un changement de montant d'un frais met à jour toutes ses lignes
+en une requête. Les changements de structure (nouveau frais, inscription
+créée ou déplacée, ligne encore absente) recalculent les inscriptions
+touchées, regroupées au commit comme pour `grades.results`
+(`ums.deferred`).
+"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import F, Q, Sum
+
+from enrollment.models import Enrollment
+from fees.models import AcademicFee
+from ums.deferred import DeferredBatch
+
+from .models import FeeBalance, Payment
+
+
+def refresh_balances(enrollment_ids: Iterable[int]) -> None:
+    """Recalcule les soldes des inscriptions données en un nombre constant de requêtes."""
+
+    enrollment_ids = set(enrollment_ids)
+    if not enrollment_ids:
+        return
+    # Les inscriptions supprimées entre-temps (cascade) n'ont plus de solde.
+    periods = list(Enrollment.objects.filter(pk__in=enrollment_ids).values_list("pk", "year_id", "semester_id"))
+    if not periods:
+        return
+    enrollments = [enrollment_id for enrollment_id, _, _ in periods]
+
+    paid: dict[tuple[int, int], Decimal] = {
+        (enrollment_id, fee_id): total
+        for enrollment_id, fee_id, total in Payment.objects.filter(enrollment_id__in=enrollments)
+        .values("enrollment_id", "academic_fee_id")
+        .annotate(total=Sum("amount_paid"))
+        .values_list("enrollment_id", "academic_fee_id", "total")
+        .order_by()
+    }
+    period_keys = {(year_id, semester_id) for _, year_id, semester_id in periods}
+    period_filter = Q(pk__in={fee_id for _, fee_id in paid})
+    for year_id, semester_id in period_keys:
+        period_filter |= Q(year_id=year_id, semester_id=semester_id)
+    fees = list(AcademicFee.objects.filter(period_filter).values_list("pk", "year_id", "semester_id", "amount"))
+    amounts = {fee_id: amount for fee_id, _, _, amount in fees}
+    fees_by_period: dict[tuple[int, int], list[int]] = {}
+    for fee_id, year_id, semester_id, _ in fees:
+        fees_by_period.setdefault((year_id, semester_id), []).append(fee_id)
+
+    keys = {
+        (enrollment_id, fee_id)
+        for enrollment_id, year_id, semester_id in periods
+        for fee_id in fees_by_period.get((year_id, semester_id), ())
+    }
+    keys.update(key for key in paid if key[1] in amounts)
+
+    with transaction.atomic():
+        FeeBalance.objects.filter(enrollment_id__in=enrollments).delete()
+        FeeBalance.objects.bulk_create(
+            [
+                FeeBalance(
+                    enrollment_id=enrollment_id,
+                    academic_fee_id=fee_id,
+                    due=amounts[fee_id],
+                    paid=paid.get((enrollment_id, fee_id), 0),
+                    outstanding=amounts[fee_id] - paid.get((enrollment_id, fee_id), 0),
+                )
+                for enrollment_id, fee_id in sorted(keys)
+            ]
+        )
+
+
+def rebuild_all_balances(batch_size: int = 1000) -> int:
+    """Reconstruit toute la table par lots d'inscriptions. Retourne le nombre traité."""
+
+    ids = list(Enrollment.objects.order_by("pk").values_list("pk", flat=True))
+    for start in range(0, len(ids), batch_size):
+        refresh_balances(ids[start:start + batch_size])
+    return len(ids)
+
+
+def _refresh_in_batches(enrollment_ids: set[int], batch_size: int = 1000) -> None:
+    ids = sorted(enrollment_ids)
+    for start in range(0, len(ids), batch_size):
+        refresh_balances(ids[start:start + batch_size])
+
+
+_pending = DeferredBatch("payments_balances", _refresh_in_batches)
+
+
+def schedule_refresh(enrollment_ids: Iterable[int]) -> None:
+    """Regroupe les inscriptions à recalculer et les traite en une fois au commit."""
+
+    _pending.add(enrollment_ids)
+
+
+def apply_payment(enrollment_id: int, academic_fee_id: int, amount: Decimal) -> None:
+    """Ajoute `amount` (négatif pour une annulation) au payé du solde concerné."""
+
+    if not amount:
+        return
+    balances = FeeBalance.objects.filter(enrollment_id=enrollment_id, academic_fee_id=academic_fee_id)
+    updated = balances.update(paid=F("paid") + amount, outstanding=F("outstanding") - amount)
+    if not updated:
+        schedule_refresh([enrollment_id])
+    elif amount < 0:
+        # Un frais hors de la période de l'inscription n'est dû que s'il a des paiements
+        balances.filter(paid=0).exclude(
+            academic_fee__year=F("enrollment__year"), academic_fee__semester=F("enrollment__semester")
+        ).delete()
+
+
+def apply_fee_amount(fee: AcademicFee) -> None:
+    """Reporte le nouveau montant d'un frais sur toutes ses lignes, en une requête."""
+
+    FeeBalance.objects.filter(academic_fee=fee).update(due=fee.amount, outstanding=fee.amount - F("paid"))
+
+
+def period_enrollments(year_id: int, semester_id: int):
+    return Enrollment.objects.filter(year_id=year_id, semester_id=semester_id).values_list("pk", flat=True)
@@ -0,0 +1,26 @@
+import django_filters
+
+from core.models import AcademicYear, Faculty
+from fees.models import AcademicFee
+
+from .models import FeeBalance
+
+
+class DebtorFilter(django_filters.FilterSet):
+    academic_fee = django_filters.ModelChoiceFilter(
+        queryset=AcademicFee.objects.select_related("category", "year", "semester"), label="Frais"
+    )
+    year = django_filters.ModelChoiceFilter(
+        field_name="enrollment__year", queryset=AcademicYear.objects.all(), label="Année académique"
+    )
+    faculty = django_filters.ModelChoiceFilter(
+        field_name="enrollment__faculty", queryset=Faculty.objects.all(), label="Faculté"
+    )
+    promotion = django_filters.CharFilter(field_name="enrollment__promotion", lookup_expr="iexact", label="Promotion")
+    min_outstanding = django_filters.NumberFilter(
+        field_name="outstanding", lookup_expr="gte", label="Reste à payer minimum"
+    )
+
+    class Meta:
+        model = FeeBalance
+        fields = ()
@@ -6,5 +6,39 @@ from .models import Payment
 class PaymentForm(forms.ModelForm):
     class Meta:
         model = Payment
-        fields = "__all__"
+        exclude = ("recorded_by",)
+        help_texts = {
+            "receipt_number": "Laisser vide pour attribuer le numéro suivant du caissier ; "
+            "saisir un numéro réservé pour un reçu établi hors ligne.",
+        }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            # Le numéro d'un reçu émis ne change plus
+            self.fields["receipt_number"].disabled = True
+            self.fields["receipt_number"].help_text = ""
+
+
+
+class StatementUploadForm(forms.Form):
+    file = forms.FileField(
+        label="Relevé",
+        help_text=(
+            "Fichier .csv ou .xlsx avec les colonnes date et amount, "
+            "et facultativement reference et description."
+        ),
+    )
+    name = forms.CharField(label="Libellé", max_length=255, required=False, help_text="Par défaut : nom du fichier.")
+    tolerance_days = forms.IntegerField(
+        label="Tolérance sur la date (jours)",
+        min_value=0,
+        max_value=7,
+        initial=1,
+    )
+
+    def clean_file(self):
+        upload = self.cleaned_data["file"]
+        if not upload.name.lower().endswith((".xlsx", ".csv")):
+            raise forms.ValidationError("Format non pris en charge : utilisez un fichier .xlsx ou .csv.")
+        return upload
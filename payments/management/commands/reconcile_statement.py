@@ -0,0 +1,39 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payments.reconciliation import reconcile_statement, summary, write_report
+
+
+class Command(BaseCommand):
+    help = "Rapproche un relevé bancaire ou mobile money (.csv ou .xlsx) avec les paiements enregistrés."
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="Relevé à importer : colonnes date, amount, reference, description.")
+        parser.add_argument("--name", help="Libellé de l'import (défaut : nom du fichier).")
+        parser.add_argument("--tolerance-days", type=int, default=1, help="Écart de dates accepté (défaut : 1 jour).")
+        parser.add_argument("--since", type=datetime.date.fromisoformat, help="Ignore les paiements antérieurs (AAAA-MM-JJ).")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Lignes du relevé traitées par bloc.")
+        parser.add_argument("--report", help="Fichier CSV où écrire les lignes à traiter (défaut : aucun).")
+
+    def handle(self, *args, **options):
+        path = options["file"]
+        if not path.lower().endswith((".xlsx", ".csv")):
+            raise CommandError("Format non pris en charge : utilisez un fichier .xlsx ou .csv.")
+        try:
+            with open(path, "rb") as file:
+                statement = reconcile_statement(
+                    file,
+                    path,
+                    name=options["name"],
+                    tolerance_days=options["tolerance_days"],
+                    since=options["since"],
+                    chunk_size=options["chunk_size"],
+                )
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        if options["report"]:
+            with open(options["report"], "w", encoding="utf-8-sig", newline="") as output:
+                write_report(statement, output)
+        self.stdout.write(self.style.SUCCESS(f"{summary(statement)}."))
@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import AcademicYear
+from payments.models import receipt_prefix, reserve_receipt_numbers
+
+
+class Command(BaseCommand):
+    help = "Réserve un bloc de numéros de reçus pour un caissier (carnet hors ligne, saisie par lot)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", required=True, help="Code de l'année académique.")
+        parser.add_argument("--cashier", required=True, help="Email du caissier.")
+        parser.add_argument("--count", type=int, default=50, help="Nombre de numéros à réserver (défaut : 50).")
+
+    def handle(self, *args, **options):
+        if options["count"] < 1:
+            raise CommandError("Le nombre de numéros doit être positif.")
+        if not AcademicYear.objects.filter(code=options["year"]).exists():
+            raise CommandError("Année académique introuvable.")
+        cashier = get_user_model().objects.filter(email__iexact=options["cashier"]).first()
+        if cashier is None:
+            raise CommandError("Caissier introuvable.")
+
+        numbers = reserve_receipt_numbers(receipt_prefix(options["year"], cashier.pk), options["count"])
+        for number in numbers:
+            self.stdout.write(number)
+        self.stdout.write(self.style.SUCCESS(f"{len(numbers)} numéro(s) réservé(s) : {numbers[0]} à {numbers[-1]}."))
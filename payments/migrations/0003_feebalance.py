@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enrollment', '0003_enrollment_enrollment__year_id_b7c2a9_idx'),
+        ('fees', '0001_initial'),
+        ('payments', '0002_payment_payments_pa_payment_e29aea_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeeBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('paid', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('outstanding', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('academic_fee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='fees.academicfee')),
+                ('enrollment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='enrollment.enrollment')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['outstanding', 'id'], name='payments_fe_outstan_e6f751_idx')],
+                'unique_together': {('enrollment', 'academic_fee')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0005_statementimport_statementline'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='statementline',
+            name='reference',
+            field=models.CharField(blank=True, db_index=True, max_length=100),
+        ),
+    ]
@@ -1,14 +1,148 @@
-from django.db import models
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
 from enrollment.models import Enrollment
 from fees.models import AcademicFee
 
+
+class ReceiptSequence(models.Model):
+    """Dernier numéro de reçu attribué, par préfixe (année académique et caissier)."""
+
+    prefix = models.CharField(max_length=20, unique=True)
+    last_value = models.PositiveIntegerField(default=0)
+
+    str_fields = ("prefix", "last_value")
+
+    def __str__(self):
+        return f"{self.prefix} : {self.last_value}"
+
+
+def receipt_prefix(year_code: str, cashier_id: int | None = None) -> str:
+    """Préfixe des reçus : code de l'année, puis numéro du caissier s'il est connu."""
+
+    if cashier_id is None:
+        return year_code
+    return f"{year_code}-{cashier_id:03d}"
+
+
+def reserve_receipt_numbers(prefix: str, count: int = 1) -> list[str]:
+    """
+    Réserve `count` numéros consécutifs pour `prefix` sans lire `Payment`.
+    Chaque caissier a sa propre ligne de compteur : l'incrément `F()` ne
+    bloque que les transactions du même caissier, jusqu'au commit. Un
+    paiement annulé rend son numéro, la séquence reste donc sans trou.
+    """
+
+    with transaction.atomic():
+        sequences = ReceiptSequence.objects.filter(prefix=prefix)
+        if not sequences.update(last_value=F("last_value") + count):
+            try:
+                with transaction.atomic():
+                    ReceiptSequence.objects.create(prefix=prefix, last_value=count)
+            except IntegrityError:  # compteur créé au même moment par une autre transaction
+                sequences.update(last_value=F("last_value") + count)
+        last_value = sequences.values_list("last_value", flat=True).get()
+    first_value = last_value - count + 1
+    return [f"{prefix}-{str(value).zfill(5)}" for value in range(first_value, last_value + 1)]
+
+
 class Payment(models.Model):
     enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE)
     academic_fee = models.ForeignKey(AcademicFee, on_delete=models.CASCADE)
     payment_date = models.DateTimeField(auto_now_add=True)
     amount_paid = models.DecimalField(max_digits=10, decimal_places=2)
     payment_method = models.CharField(max_length=50)
-    receipt_number = models.CharField(max_length=100, unique=True)
+    receipt_number = models.CharField(max_length=100, unique=True, blank=True)
+    recorded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
 
     class Meta:
         unique_together = ("enrollment", "academic_fee", "receipt_number")
+        indexes = [models.Index(fields=["payment_date", "id"])]
+
+    str_fields = ("receipt_number",)
+
+    def __str__(self):
+        return f"Reçu {self.receipt_number}"
+
+    def save(self, *args, **kwargs):
+        # Numéro attribué une fois, à la création : le vider ensuite ne doit
+        # pas consommer un nouveau numéro (trou dans la séquence).
+        if self.receipt_number or not self._state.adding:
+            return super().save(*args, **kwargs)
+        # Numéro attribué dans la transaction de l'enregistrement : il n'est
+        # consommé que si le paiement est écrit.
+        with transaction.atomic():
+            year_code = AcademicFee.objects.filter(pk=self.academic_fee_id).values_list("year__code", flat=True).get()
+            self.receipt_number = reserve_receipt_numbers(receipt_prefix(year_code, self.recorded_by_id))[0]
+            super().save(*args, **kwargs)
+
+
+class FeeBalance(models.Model):
+    """Solde précalculé d'une inscription pour un frais académique (dû, payé, reste à payer)."""
+
+    enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE, related_name="balances")
+    academic_fee = models.ForeignKey(AcademicFee, on_delete=models.CASCADE)
+    due = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    paid = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    outstanding = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ("enrollment", "academic_fee")
+        indexes = [models.Index(fields=["outstanding", "id"])]
+
+    str_fields = ("enrollment", "academic_fee")
+
+    def __str__(self):
+        return f"Solde {self.enrollment} — {self.academic_fee}"
+
+
+class StatementImport(models.Model):
+    """Relevé bancaire ou mobile money importé pour rapprochement avec les paiements."""
+
+    name = models.CharField(max_length=255)
+    imported_at = models.DateTimeField(auto_now_add=True)
+    imported_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    total_lines = models.PositiveIntegerField(default=0)
+    matched = models.PositiveIntegerField(default=0)
+    unmatched = models.PositiveIntegerField(default=0)
+    ambiguous = models.PositiveIntegerField(default=0)
+
+    str_fields = ("name", "imported_at")
+
+    def __str__(self):
+        return f"{self.name} ({self.imported_at:%d/%m/%Y})"
+
+
+class StatementLine(models.Model):
+    MATCHED = "MATCHED"
+    UNMATCHED = "UNMATCHED"
+    AMBIGUOUS = "AMBIGUOUS"
+    STATUS_CHOICES = [
+        (MATCHED, "Rapprochée"),
+        (UNMATCHED, "Non rapprochée"),
+        (AMBIGUOUS, "Ambiguë"),
+    ]
+
+    statement = models.ForeignKey(StatementImport, on_delete=models.CASCADE, related_name="lines")
+    line = models.PositiveIntegerField()
+    transaction_date = models.DateField(null=True, blank=True)
+    amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    reference = models.CharField(max_length=100, blank=True, db_index=True)
+    description = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    note = models.CharField(max_length=255, blank=True)
+    payment = models.OneToOneField(
+        Payment, on_delete=models.SET_NULL, null=True, blank=True, related_name="statement_line"
+    )
+
+    class Meta:
+        indexes = [models.Index(fields=["statement", "status"])]
+
+    str_fields = ("line", "statement")
+
+    def __str__(self):
+        return f"Ligne {self.line} — {self.statement}"
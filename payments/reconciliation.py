@@ -0,0 +1,289 @@
+"""
+Rapprochement des relevés bancaires et mobile money avec les paiements.
+
+Le relevé (CSV ou XLSX) est lu par blocs de lignes ; colonnes attendues :
+`date` et `amount`, plus `reference` et `description` facultatives. Les
+paiements pas encore rapprochés, à partir de la première date du relevé
+moins `tolerance_days`, sont chargés une fois et indexés en mémoire par
+numéro de reçu et par (montant, jour). Chaque ligne du relevé est ensuite
+résolue par quelques accès à ces index, en une seule passe :
+
+* un numéro de reçu trouvé dans la référence ou le libellé rapproche la
+  ligne si le montant concorde (ambiguë sinon) ;
+* à défaut, les paiements de même montant à `tolerance_days` jours près :
+  un seul candidat rapproche la ligne, plusieurs la rendent ambiguë.
+
+Un paiement rapproché est retiré des index. Les lignes et leur statut sont
+enregistrées par `bulk_create`, bloc par bloc. Un paiement rapproché entre-temps
+par un autre relevé (imports simultanés) laisse la ligne non rapprochée.
+"""
+
+from __future__ import annotations
+
+import datetime
+import io
+from collections import Counter, defaultdict
+from decimal import Decimal
+from itertools import islice
+from typing import IO, Iterator
+
+import pandas as pd
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from ums.exports import SafeCsvWriter
+
+from .models import Payment, StatementImport, StatementLine
+
+REQUIRED_COLUMNS = ("date", "amount")
+OPTIONAL_COLUMNS = ("reference", "description")
+
+
+def _normalize(value) -> str:
+    return str(value or "").strip().lower().replace(" ", "_")
+
+
+def iter_statement(file: IO[bytes], filename: str, chunk_size: int = 5000) -> Iterator[pd.DataFrame]:
+    """Produit le relevé par blocs de `chunk_size` lignes (texte), avec le numéro de ligne d'origine."""
+
+    if filename.lower().endswith(".xlsx"):
+        rows = load_workbook(file, read_only=True, data_only=True).active.iter_rows(values_only=True)
+        header = [_normalize(value) for value in next(rows, [])]
+        chunks = (
+            pd.DataFrame(chunk, columns=header, dtype=object).fillna("").astype(str)
+            for chunk in iter(lambda: list(islice(rows, chunk_size)), [])
+        )
+    else:
+        sample = file.readline().decode("utf-8-sig")
+        file.seek(0)
+        delimiter = ";" if sample.count(";") >= sample.count(",") else ","
+        chunks = pd.read_csv(
+            file,
+            sep=delimiter,
+            dtype=str,
+            keep_default_na=False,
+            encoding="utf-8-sig",
+            chunksize=chunk_size,
+        )
+
+    line = 2
+    for chunk in chunks:
+        chunk.columns = [_normalize(column) for column in chunk.columns]
+        missing = [column for column in REQUIRED_COLUMNS if column not in chunk.columns]
+        if missing:
+            raise ValueError(f"Colonnes manquantes : {', '.join(missing)}.")
+        for column in OPTIONAL_COLUMNS:
+            if column not in chunk.columns:
+                chunk[column] = ""
+        chunk.insert(0, "line", range(line, line + len(chunk)))
+        line += len(chunk)
+        yield chunk
+
+
+def _parse(chunk: pd.DataFrame) -> pd.DataFrame:
+    dates = pd.to_datetime(chunk["date"].str.strip(), errors="coerce", dayfirst=True, format="mixed")
+    amounts = (
+        chunk["amount"].str.replace(r"\s", "", regex=True).str.replace(",", ".", regex=False)
+    )
+    return pd.DataFrame(
+        {
+            "line": chunk["line"],
+            "date": dates.dt.date,
+            "amount": pd.to_numeric(amounts, errors="coerce").round(2),
+            "reference": chunk["reference"].str.strip().str[:100],
+            "description": chunk["description"].str.strip().str[:255],
+        }
+    )
+
+
+def statement_start(file: IO[bytes], filename: str, chunk_size: int = 5000) -> datetime.date | None:
+    """Première date lisible du relevé ; le fichier est ensuite rembobiné."""
+
+    start = None
+    for chunk in iter_statement(file, filename, chunk_size):
+        dates = _parse(chunk)["date"].dropna()
+        if not dates.empty:
+            start = min(filter(None, [start, dates.min()]))
+    file.seek(0)
+    return start
+
+
+class PaymentIndex:
+    """Paiements non rapprochés, indexés par numéro de reçu et par (montant, jour)."""
+
+    def __init__(self, since: datetime.date | None = None):
+        payments = Payment.objects.filter(statement_line__isnull=True)
+        if since:
+            payments = payments.filter(payment_date__date__gte=since)
+        self.by_receipt: dict[str, tuple[int, Decimal]] = {}
+        self.by_amount_date: dict[tuple[Decimal, datetime.date], list[int]] = defaultdict(list)
+        self.consumed: set[int] = set()
+        rows = payments.values_list("pk", "receipt_number", "amount_paid", "payment_date").order_by()
+        for pk, receipt_number, amount, paid_at in rows.iterator(chunk_size=5000):
+            self.by_receipt[receipt_number.upper()] = (pk, amount)
+            self.by_amount_date[(amount, timezone.localdate(paid_at))].append(pk)
+
+    def _by_receipt(self, *texts: str) -> tuple[str, int, Decimal] | None:
+        for text in texts:
+            for token in text.upper().split():
+                found = self.by_receipt.get(token.strip(".,;:()"))
+                if found and found[0] not in self.consumed:
+                    return (token, *found)
+        return None
+
+    def match(
+        self, reference: str, description: str, amount: Decimal | None, day: datetime.date | None, tolerance_days: int
+    ) -> tuple[str, int | None, str]:
+        """Statut, paiement rapproché et motif pour une ligne du relevé."""
+
+        receipt = self._by_receipt(reference, description)
+        if receipt:
+            token, pk, payment_amount = receipt
+            if amount is not None and payment_amount == amount:
+                self.consumed.add(pk)
+                return StatementLine.MATCHED, pk, f"Reçu {token}"
+            return StatementLine.AMBIGUOUS, None, f"Reçu {token} trouvé, montant payé {payment_amount}"
+
+        if amount is None or day is None:
+            return StatementLine.UNMATCHED, None, "Date ou montant illisible."
+        candidates = [
+            pk
+            for offset in range(-tolerance_days, tolerance_days + 1)
+            for pk in self.by_amount_date.get((amount, day + datetime.timedelta(days=offset)), ())
+            if pk not in self.consumed
+        ]
+        if len(candidates) == 1:
+            self.consumed.add(candidates[0])
+            return StatementLine.MATCHED, candidates[0], "Montant et date"
+        if candidates:
+            return StatementLine.AMBIGUOUS, None, f"{len(candidates)} paiements possibles"
+        return StatementLine.UNMATCHED, None, ""
+
+
+def reconcile_statement(
+    file: IO[bytes],
+    filename: str,
+    name: str | None = None,
+    imported_by=None,
+    tolerance_days: int = 1,
+    since: datetime.date | None = None,
+    chunk_size: int = 5000,
+) -> StatementImport:
+    """
+    Importe et rapproche un relevé ; retourne l'import avec ses compteurs.
+    Sans `since`, seuls les paiements depuis la première date du relevé
+    (moins `tolerance_days`) sont candidats.
+    """
+
+    if since is None:
+        start = statement_start(file, filename, chunk_size)
+        since = start - datetime.timedelta(days=tolerance_days) if start else None
+    index = PaymentIndex(since)
+    counts: Counter[str] = Counter()
+    with transaction.atomic():
+        statement = StatementImport.objects.create(name=name or filename, imported_by=imported_by)
+        for chunk in iter_statement(file, filename, chunk_size):
+            lines = []
+            for line, day, amount, reference, description in _parse(chunk).itertuples(index=False):
+                amount = None if pd.isna(amount) else Decimal(f"{amount:.2f}")
+                day = None if pd.isna(day) else day
+                status, payment_id, note = index.match(reference, description, amount, day, tolerance_days)
+                lines.append(
+                    StatementLine(
+                        statement=statement,
+                        line=line,
+                        transaction_date=day,
+                        amount=amount,
+                        reference=reference,
+                        description=description,
+                        status=status,
+                        note=note,
+                        payment_id=payment_id,
+                    )
+                )
+            _save_lines(lines)
+            counts.update(line.status for line in lines)
+
+        statement.total_lines = sum(counts.values())
+        statement.matched = counts[StatementLine.MATCHED]
+        statement.unmatched = counts[StatementLine.UNMATCHED]
+        statement.ambiguous = counts[StatementLine.AMBIGUOUS]
+        statement.save(update_fields=["total_lines", "matched", "unmatched", "ambiguous"])
+    return statement
+
+
+def _release_taken(lines: list[StatementLine]) -> None:
+    """Laisse non rapprochées les lignes dont le paiement est déjà lié à une ligne d'un autre relevé."""
+
+    claimed = [line.payment_id for line in lines if line.payment_id]
+    taken = set(StatementLine.objects.filter(payment_id__in=claimed).values_list("payment_id", flat=True))
+    for line in lines:
+        if line.payment_id in taken:
+            line.status, line.payment_id = StatementLine.UNMATCHED, None
+            line.note = "Paiement déjà rapproché par un autre relevé."
+
+
+def _save_lines(lines: list[StatementLine]) -> None:
+    _release_taken(lines)
+    try:
+        with transaction.atomic():
+            StatementLine.objects.bulk_create(lines, batch_size=1000)
+    except IntegrityError:
+        # Un relevé importé en même temps a lié l'un de ces paiements après la
+        # vérification (PostgreSQL attend sa validation avant de refuser la ligne)
+        _release_taken(lines)
+        StatementLine.objects.bulk_create(lines, batch_size=1000)
+
+
+def summary(statement: StatementImport) -> str:
+    return (
+        f"{statement.total_lines} ligne(s) : {statement.matched} rapprochée(s), "
+        f"{statement.ambiguous} ambiguë(s), {statement.unmatched} non rapprochée(s)"
+    )
+
+
+def write_report(statement: StatementImport, output: IO[str]) -> None:
+    """Lignes non rapprochées ou ambiguës du relevé, puis le bilan."""
+
+    writer = SafeCsvWriter(output)
+    writer.writerow(["ligne", "date", "montant", "référence", "libellé", "statut", "motif"])
+    lines = statement.lines.exclude(status=StatementLine.MATCHED).order_by("line")
+    for line in lines.iterator(chunk_size=2000):
+        writer.writerow(
+            [
+                line.line,
+                line.transaction_date or "",
+                line.amount if line.amount is not None else "",
+                line.reference,
+                line.description,
+                line.get_status_display(),
+                line.note,
+            ]
+        )
+    writer.writerow(["", "total", summary(statement)])
+
+
+def run_statement_reconciliation(params: dict, output) -> str:
+    """
+    Gestionnaire du worker de rapports : rapproche le relevé déposé dans le
+    stockage et écrit les lignes restant à traiter (CSV) dans `output`.
+    """
+
+    path = params["path"]
+    user = get_user_model().objects.filter(pk=params.get("user")).first()
+    with default_storage.open(path, "rb") as file:
+        statement = reconcile_statement(
+            file,
+            path,
+            name=params.get("name"),
+            imported_by=user,
+            tolerance_days=params.get("tolerance_days", 1),
+        )
+    text = io.TextIOWrapper(output, encoding="utf-8-sig", newline="")
+    write_report(statement, text)
+    text.flush()
+    text.detach()
+    return f"rapprochement-{timezone.localdate():%Y%m%d}.csv"
@@ -1,8 +1,12 @@
 from decimal import Decimal
 
-from django.db.models.signals import pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
+from enrollment.models import Enrollment
+from fees.models import AcademicFee
+
+from .balances import apply_fee_amount, apply_payment, period_enrollments, schedule_refresh
 from .models import Payment
 
 
@@ -12,4 +16,54 @@ def payment_pre_save(sender, instance, **kwargs):
         instance.receipt_number = instance.receipt_number.strip().upper()
     if instance.amount_paid is not None:
         instance.amount_paid = abs(Decimal(instance.amount_paid))
+    # Valeurs enregistrées, pour ne reporter que l'écart sur le solde.
+    instance._balance_previous = (
+        Payment.objects.filter(pk=instance.pk).values_list("enrollment_id", "academic_fee_id", "amount_paid").first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Payment)
+def payment_saved(sender, instance, **kwargs):
+    amount = Decimal(instance.amount_paid)
+    previous = getattr(instance, "_balance_previous", None)
+    if previous:
+        enrollment_id, academic_fee_id, previous_amount = previous
+        if (enrollment_id, academic_fee_id) == (instance.enrollment_id, instance.academic_fee_id):
+            amount -= previous_amount
+        else:
+            apply_payment(enrollment_id, academic_fee_id, -previous_amount)
+    apply_payment(instance.enrollment_id, instance.academic_fee_id, amount)
+
+
+@receiver(post_delete, sender=Payment)
+def payment_deleted(sender, instance, **kwargs):
+    apply_payment(instance.enrollment_id, instance.academic_fee_id, -Decimal(instance.amount_paid))
+
+
+@receiver(pre_save, sender=AcademicFee)
+def fee_period_pre_save(sender, instance, **kwargs):
+    instance._balance_period = (
+        AcademicFee.objects.filter(pk=instance.pk).values_list("year_id", "semester_id").first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=AcademicFee)
+def fee_saved(sender, instance, created, **kwargs):
+    period = (instance.year_id, instance.semester_id)
+    previous = getattr(instance, "_balance_period", None)
+    if created or previous != period:
+        enrollment_ids = set(period_enrollments(*period))
+        if previous:
+            enrollment_ids.update(period_enrollments(*previous))
+        schedule_refresh(enrollment_ids)
+    else:
+        apply_fee_amount(instance)
+
 
+@receiver(post_save, sender=Enrollment)
+def enrollment_saved(sender, instance, **kwargs):
+    schedule_refresh([instance.pk])
@@ -1,3 +1,232 @@
+import datetime
+import io
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection, transaction
+from django.db.models import QuerySet
 from django.test import TestCase
+from django.utils import timezone
+
+from core.seeding import SeedVolumes, seed
+from fees.models import AcademicFee, FeeCategory
+
+from .balances import rebuild_all_balances, schedule_refresh
+from .forms import PaymentForm
+from .models import (
+    FeeBalance,
+    Payment,
+    ReceiptSequence,
+    StatementImport,
+    StatementLine,
+    receipt_prefix,
+    reserve_receipt_numbers,
+)
+from .reconciliation import PaymentIndex, reconcile_statement, write_report
+
+SMALL = SeedVolumes(
+    faculties=1, departments=1, promotions=1, courses=2, students=3, payments=1, expenses=1, professors=1, cashiers=1
+)
+
+
+class ReceiptSequenceTests(TestCase):
+    def test_numbers_are_consecutive_per_prefix(self):
+        self.assertEqual(reserve_receipt_numbers("T1", 2), ["T1-00001", "T1-00002"])
+        self.assertEqual(reserve_receipt_numbers("T1"), ["T1-00003"])
+        self.assertEqual(reserve_receipt_numbers("T2"), ["T2-00001"])
+
+    def test_counter_created_concurrently_is_incremented(self):
+        # Le compteur n'existait pas au premier UPDATE, une autre transaction l'a créé depuis
+        ReceiptSequence.objects.create(prefix="T3", last_value=5)
+        update = QuerySet.update
+        calls = []
+
+        def update_after_concurrent_create(queryset, **kwargs):
+            calls.append(kwargs)
+            return 0 if len(calls) == 1 else update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, "update", update_after_concurrent_create):
+            self.assertEqual(reserve_receipt_numbers("T3"), ["T3-00006"])
+        self.assertEqual(len(calls), 2)
+
+
+class PaymentReceiptNumberTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(SMALL)
+        cls.existing = Payment.objects.select_related("academic_fee__year").order_by("pk").first()
+
+    def new_payment(self):
+        payment = Payment(
+            enrollment_id=self.existing.enrollment_id,
+            academic_fee_id=self.existing.academic_fee_id,
+            amount_paid=Decimal("10"),
+            payment_method="cash",
+        )
+        payment.save()
+        return payment
+
+    def test_number_is_assigned_on_insert_only(self):
+        prefix = receipt_prefix(self.existing.academic_fee.year.code)
+        first = self.new_payment()
+        second = self.new_payment()
+        self.assertTrue(first.receipt_number.startswith(f"{prefix}-"))
+        self.assertEqual(int(second.receipt_number.rsplit("-", 1)[1]), int(first.receipt_number.rsplit("-", 1)[1]) + 1)
+
+        last_value = ReceiptSequence.objects.get(prefix=prefix).last_value
+        first.receipt_number = ""
+        first.amount_paid = Decimal("12")
+        first.save()
+        self.assertEqual(ReceiptSequence.objects.get(prefix=prefix).last_value, last_value)
+
+    def test_issued_number_is_read_only_in_form(self):
+        self.assertFalse(PaymentForm().fields["receipt_number"].disabled)
+        form = PaymentForm(instance=self.existing)
+        self.assertTrue(form.fields["receipt_number"].disabled)
+
+
+class FeeBalanceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(SMALL)
+        rebuild_all_balances()
+
+    def balances(self):
+        return sorted(FeeBalance.objects.values_list("enrollment_id", "academic_fee_id", "due", "paid", "outstanding"))
+
+    def assertBalancesRecomputed(self):
+        """Les soldes tenus par deltas égalent ceux d'un recalcul complet."""
+
+        maintained = self.balances()
+        rebuild_all_balances()
+        self.assertEqual(maintained, self.balances())
+
+    def test_payment_changes_are_applied_as_deltas(self):
+        payment = Payment.objects.order_by("pk").first()
+        other_fee = AcademicFee.objects.exclude(pk=payment.academic_fee_id).order_by("pk").first()
+        with self.captureOnCommitCallbacks(execute=True):
+            Payment.objects.create(
+                enrollment_id=payment.enrollment_id,
+                academic_fee_id=payment.academic_fee_id,
+                amount_paid=Decimal("25"),
+                payment_method="cash",
+            )
+            payment.amount_paid += 10
+            payment.save()
+        self.assertBalancesRecomputed()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.academic_fee = other_fee
+            payment.save()
+        self.assertBalancesRecomputed()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.delete()
+        self.assertBalancesRecomputed()
+
+    def test_fee_changes_update_balances(self):
+        fee = AcademicFee.objects.order_by("pk").first()
+        with self.captureOnCommitCallbacks(execute=True):
+            fee.amount += 100
+            fee.save()
+            AcademicFee.objects.create(
+                category=FeeCategory.objects.create(name="Bibliothèque"),
+                year_id=fee.year_id,
+                semester_id=fee.semester_id,
+                amount=Decimal("30"),
+            )
+        self.assertTrue(FeeBalance.objects.filter(academic_fee__category__name="Bibliothèque").exists())
+        self.assertBalancesRecomputed()
+
+    def test_rolled_back_refresh_is_discarded(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            try:
+                with transaction.atomic():
+                    schedule_refresh([1])
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            schedule_refresh([2])
+        self.assertEqual(callbacks, [connection.deferred_payments_balances])
+        self.assertEqual(connection.deferred_payments_balances.ids, {2})
+
+
+class ReconciliationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(SMALL)
+        existing = Payment.objects.order_by("pk").first()
+        cls.payments = [
+            Payment.objects.create(
+                enrollment_id=existing.enrollment_id,
+                academic_fee_id=existing.academic_fee_id,
+                amount_paid=Decimal(amount),
+                payment_method="mobile money",
+            )
+            for amount in ("111.11", "222.22", "333.33")
+        ]
+
+    def test_statement_lines_are_matched_and_reported(self):
+        first, second, third = self.payments
+        today = timezone.localdate().strftime("%d/%m/%Y")
+        statement = (
+            "date;amount;reference;description\n"
+            f"{today};111,11;{first.receipt_number};\n"
+            f"{today};200;;Paiement reçu {second.receipt_number.lower()}\n"
+            f"{today};333.33;TX-9;\n"
+            f"{today};abc;TX-10;\n"
+            f"{today};111.11;{first.receipt_number};doublon\n"
+        )
+        result = reconcile_statement(io.BytesIO(statement.encode()), "releve.csv")
+
+        self.assertEqual((result.total_lines, result.matched, result.ambiguous, result.unmatched), (5, 2, 1, 2))
+        lines = {line.line: line for line in result.lines.all()}
+        self.assertEqual(
+            [lines[number].status for number in range(2, 7)],
+            [
+                StatementLine.MATCHED,
+                StatementLine.AMBIGUOUS,
+                StatementLine.MATCHED,
+                StatementLine.UNMATCHED,
+                StatementLine.UNMATCHED,
+            ],
+        )
+        self.assertEqual((lines[2].payment, lines[4].payment), (first, third))
+
+        output = io.StringIO()
+        write_report(result, output)
+        report = output.getvalue().splitlines()
+        self.assertEqual([row.split(";")[0] for row in report[1:-1]], ["3", "5", "6"])
+        self.assertIn("5 ligne(s) : 2 rapprochée(s), 1 ambiguë(s), 2 non rapprochée(s)", report[-1])
+
+    def test_only_payments_from_the_statement_period_are_indexed(self):
+        first = self.payments[0]
+        day = timezone.localdate() - datetime.timedelta(days=10)
+        statement = f"date;amount;reference\n{day:%d/%m/%Y};5;\n{timezone.localdate():%d/%m/%Y};111.11;\n"
+        with mock.patch("payments.reconciliation.PaymentIndex", wraps=PaymentIndex) as index:
+            reconcile_statement(io.BytesIO(statement.encode()), "releve.csv", tolerance_days=2)
+        index.assert_called_once_with(day - datetime.timedelta(days=2))
+
+        Payment.objects.filter(pk=first.pk).update(payment_date=timezone.now() - datetime.timedelta(days=20))
+        result = reconcile_statement(io.BytesIO(statement.encode()), "releve.csv", tolerance_days=2)
+        self.assertEqual(result.lines.get(line=3).status, StatementLine.UNMATCHED)
+
+    def test_payment_matched_concurrently_is_left_unmatched(self):
+        first = self.payments[0]
+        statement = f"date;amount;reference\n{timezone.localdate():%d/%m/%Y};111.11;{first.receipt_number}\n"
+        match = PaymentIndex.match
+
+        def match_after_other_import(index, *args):
+            # Un autre relevé rapproche le même paiement pendant cet import
+            StatementLine.objects.create(
+                statement=StatementImport.objects.create(name="autre"),
+                line=2,
+                status=StatementLine.MATCHED,
+                payment=first,
+            )
+            return match(index, *args)
 
-# Create your tests here.
+        with mock.patch.object(PaymentIndex, "match", match_after_other_import):
+            result = reconcile_statement(io.BytesIO(statement.encode()), "releve.csv")
+        self.assertEqual((result.matched, result.unmatched), (0, 1))
+        self.assertEqual(result.lines.get().note, "Paiement déjà rapproché par un autre relevé.")
@@ -6,6 +6,10 @@ app_name = "payments"
 
 urlpatterns = [
     path("", views.PaymentListView.as_view(), name="payment_list"),
+    path("debtors/", views.DebtorListView.as_view(), name="debtor_list"),
+    path("statements/", views.StatementListView.as_view(), name="statement_list"),
+    path("statements/import/", views.StatementImportView.as_view(), name="statement_import"),
+    path("statements/<int:pk>/", views.StatementLineListView.as_view(), name="statement_lines"),
     path("create/", views.PaymentCreateView.as_view(), name="payment_create"),
     path("<int:pk>/", views.PaymentDetailView.as_view(), name="payment_detail"),
     path("<int:pk>/update/", views.PaymentUpdateView.as_view(), name="payment_update"),
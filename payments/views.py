@@ -1,7 +1,11 @@
-from django.shortcuts import get_object_or_404
+from django.core.files.storage import default_storage
+from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
+from django.utils.text import get_valid_filename
 from django.views import View
+from django.views.generic import FormView
 
+from ums.db_router import ReplicaReadMixin
 from ums.mixins import (
     BaseCreateView,
     BaseDeleteView,
@@ -11,10 +15,13 @@ from ums.mixins import (
     RoleGroups,
     RolePermissionMixin,
 )
-from ums.pdf import Paragraph, Spacer, build_pdf_response, build_table, get_pdf_styles
+from ums.pdf import Paragraph, Spacer, build_table, get_pdf_styles, render_pdf
+from ums.pdf_cache import cache_key, cached_pdf_response
 
-from .forms import PaymentForm
-from .models import Payment
+from .filters import DebtorFilter
+from .forms import PaymentForm, StatementUploadForm
+from .models import FeeBalance, Payment, StatementImport, StatementLine
+from reports.jobs import enqueue
 
 
 class FinanceAccessMixin:
@@ -25,17 +32,97 @@ class PaymentListView(FinanceAccessMixin, BaseListView):
     model = Payment
     list_display = ("enrollment", "academic_fee", "amount_paid", "payment_method", "payment_date")
     page_title = "Paiements"
+    keyset_field = "-payment_date"
+    search_fields = ("=receipt_number", "=enrollment__student__matricule", "^enrollment__student__last_name")
+    list_filter = ("academic_fee", "payment_method")
     create_url_name = "payments:payment_create"
     detail_url_name = "payments:payment_detail"
     update_url_name = "payments:payment_update"
     delete_url_name = "payments:payment_delete"
 
 
+class DebtorListView(FinanceAccessMixin, BaseListView):
+    """Soldes restant dus, du plus gros arriéré au plus petit (table précalculée)."""
+
+    model = FeeBalance
+    list_display = ("enrollment", "academic_fee", "due", "paid", "outstanding")
+    page_title = "Débiteurs"
+    keyset_field = "-outstanding"
+    search_fields = ("=enrollment__student__matricule", "^enrollment__student__last_name")
+    filterset_class = DebtorFilter
+
+    def get_queryset(self):
+        return super().get_queryset().filter(outstanding__gt=0)
+
+
+class StatementListView(FinanceAccessMixin, BaseListView):
+    model = StatementImport
+    list_display = ("name", "imported_at", "total_lines", "matched", "ambiguous", "unmatched")
+    page_title = "Rapprochements bancaires"
+    keyset_field = "-pk"
+    create_url_name = "payments:statement_import"
+    detail_url_name = "payments:statement_lines"
+
+
+class StatementLineListView(FinanceAccessMixin, BaseListView):
+    """Lignes d'un relevé importé, filtrables par statut de rapprochement."""
+
+    model = StatementLine
+    list_display = ("line", "transaction_date", "amount", "reference", "description", "status", "note", "payment")
+    keyset_field = "pk"
+    search_fields = ("=reference",)
+    list_filter = ("status",)
+
+    def get_page_title(self):
+        return f"Relevé : {self.statement}"
+
+    def get_queryset(self):
+        self.statement = get_object_or_404(StatementImport, pk=self.kwargs["pk"])
+        return super().get_queryset().filter(statement=self.statement)
+
+
+class StatementImportView(FinanceAccessMixin, RolePermissionMixin, FormView):
+    """
+    Dépôt d'un relevé bancaire ou mobile money : le rapprochement est exécuté
+    par le worker de rapports, qui produit la liste des lignes à traiter.
+    """
+
+    form_class = StatementUploadForm
+    template_name = "generic/form.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["page_title"] = "Import d'un relevé"
+        return context
+
+    def form_valid(self, form):
+        upload = form.cleaned_data["file"]
+        path = default_storage.save(f"imports/statements/{get_valid_filename(upload.name)}", upload)
+        job = enqueue(
+            "statement_reconciliation",
+            {
+                "path": path,
+                "name": form.cleaned_data["name"] or upload.name,
+                "tolerance_days": form.cleaned_data["tolerance_days"],
+                "user": self.request.user.pk,
+            },
+            self.request.user,
+        )
+        return redirect("reports:job_detail", pk=job.pk)
+
+
 class PaymentCreateView(FinanceAccessMixin, BaseCreateView):
     model = Payment
     form_class = PaymentForm
     success_url_name = "payments:payment_list"
-    success_message = "Paiement enregistré."
+    success_message = "Paiement enregistré (reçu %(receipt_number)s)."
+
+    def form_valid(self, form):
+        form.instance.recorded_by = self.request.user
+        return super().form_valid(form)
+
+    def get_success_message(self, cleaned_data):
+        return self.success_message % {"receipt_number": self.object.receipt_number}
 
 
 class PaymentDetailView(FinanceAccessMixin, BaseDetailView):
@@ -63,35 +150,50 @@ class PaymentDeleteView(FinanceAccessMixin, BaseDeleteView):
     success_url_name = "payments:payment_list"
 
 
-class PaymentReceiptPDFView(RolePermissionMixin, View):
+class PaymentReceiptPDFView(RolePermissionMixin, ReplicaReadMixin, View):
     allowed_roles = RoleGroups.FINANCE
+    query_budget = 6
+
+    template_version = 1
 
     def get(self, request, pk):
         payment = get_object_or_404(
             Payment.objects.select_related(
                 "enrollment__student",
+                "enrollment__faculty",
                 "academic_fee__category",
                 "academic_fee__year",
             ),
             pk=pk,
         )
+        student = payment.enrollment.student
+        receipt = {
+            "receipt_number": payment.receipt_number,
+            "student": str(student),
+            "matricule": student.matricule or "-",
+            "faculty": payment.enrollment.faculty.name,
+            "year": payment.academic_fee.year.name,
+            "category": payment.academic_fee.category.name,
+            "amount": f"{payment.amount_paid} USD",
+            "method": payment.payment_method,
+            "date": payment.payment_date.strftime("%d/%m/%Y %H:%M"),
+        }
         styles = get_pdf_styles()
 
         def build():
             flow = [
                 Paragraph("REÇU OFFICIEL - SERVICE FINANCIER", styles["Title"]),
                 Spacer(1, 6),
-                Paragraph(f"N° {payment.receipt_number}", styles["Heading2"]),
+                Paragraph(f"N° {receipt['receipt_number']}", styles["Heading2"]),
                 Spacer(1, 12),
             ]
-            student = payment.enrollment.student
             flow.append(
                 build_table(
                     [
-                        ["Étudiant", str(student)],
-                        ["Matricule", student.matricule or "-"],
-                        ["Filière", payment.enrollment.faculty.name],
-                        ["Année académique", payment.academic_fee.year.name],
+                        ["Étudiant", receipt["student"]],
+                        ["Matricule", receipt["matricule"]],
+                        ["Filière", receipt["faculty"]],
+                        ["Année académique", receipt["year"]],
                     ],
                     col_widths=[170, 260],
                 )
@@ -100,10 +202,10 @@ class PaymentReceiptPDFView(RolePermissionMixin, View):
             flow.append(
                 build_table(
                     [
-                        ["Catégorie de frais", payment.academic_fee.category.name],
-                        ["Montant réglé", f"{payment.amount_paid} USD"],
-                        ["Méthode", payment.payment_method],
-                        ["Date", payment.payment_date.strftime("%d/%m/%Y %H:%M")],
+                        ["Catégorie de frais", receipt["category"]],
+                        ["Montant réglé", receipt["amount"]],
+                        ["Méthode", receipt["method"]],
+                        ["Date", receipt["date"]],
                     ],
                     col_widths=[170, 260],
                 )
@@ -118,5 +220,8 @@ class PaymentReceiptPDFView(RolePermissionMixin, View):
             )
             return flow
 
-        filename = f"recu-{payment.receipt_number}.pdf"
-        return build_pdf_response(filename, build)
+        return cached_pdf_response(
+            f"recu-{payment.receipt_number}.pdf",
+            cache_key("receipt", self.template_version, receipt),
+            lambda: render_pdf(build),
+        )
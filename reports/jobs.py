@@ -0,0 +1,174 @@
+"""
+File d'attente des rapports PDF, stockée en base : aucun broker externe.
+
+Chaque type de rapport est associé à un gestionnaire `handler(params, output)`
+qui écrit le fichier dans `output` et retourne son nom.
+
+Un worker réserve un job par un bail (`heartbeat_at`) qu'il renouvelle
+pendant le rendu. Les workers remettent régulièrement en attente les jobs
+dont le bail a expiré (`REPORT_JOB_TIMEOUT`), et un rendu dont le job a été
+remis en attente entre-temps n'enregistre pas son résultat : un rapport long
+n'est jamais repris tant que son worker est en vie.
+
+Le fichier déposé pour un import (`params["path"]`) est supprimé du stockage
+une fois le job terminé, avec succès ou en échec.
+"""
+
+from __future__ import annotations
+
+import logging
+import tempfile
+import threading
+import traceback
+from contextlib import contextmanager, nullcontext
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django.utils.text import get_valid_filename
+
+from ums.db_router import use_primary
+
+from .models import ReportJob
+
+logger = logging.getLogger(__name__)
+
+REPORT_HANDLERS = {
+    "proclamation": "grades.reports.render_proclamation",
+    "bulletins": "enrollment.bulletins.render_bulletin_batch",
+    "exit_certificate": "students.reports.render_exit_certificate",
+    "student_import": "students.importers.run_student_import",
+    "grade_import": "grades.importers.run_grade_import",
+    "statement_reconciliation": "payments.reconciliation.run_statement_reconciliation",
+}
+
+
+def enqueue(kind: str, params: dict, user=None) -> ReportJob:
+    """
+    Crée un job en attente. Si `REPORT_JOBS_ASYNC` est désactivé, le rapport
+    est rendu immédiatement (développement sans worker).
+    """
+
+    if kind not in REPORT_HANDLERS:
+        raise ValueError(f"Type de rapport inconnu : {kind}")
+    job = ReportJob.objects.create(
+        kind=kind,
+        params=params,
+        requested_by=user if user is not None and user.is_authenticated else None,
+    )
+    if not settings.REPORT_JOBS_ASYNC and claim(job, "inline"):
+        run_job(job)
+    return job
+
+
+def claim(job: ReportJob, worker: str) -> bool:
+    """
+    Réserve un job par une mise à jour conditionnelle : un seul worker peut
+    le faire passer de PENDING à RUNNING, sans verrou ni SKIP LOCKED.
+    """
+
+    now = timezone.now()
+    claimed = ReportJob.objects.filter(pk=job.pk, status=ReportJob.PENDING).update(
+        status=ReportJob.RUNNING,
+        started_at=now,
+        heartbeat_at=now,
+        worker=worker,
+    )
+    if claimed:
+        job.status, job.started_at, job.heartbeat_at, job.worker = ReportJob.RUNNING, now, now, worker
+    return bool(claimed)
+
+
+def _owned(job: ReportJob):
+    """Le job tant qu'il est encore réservé par ce rendu (ni remis en attente, ni repris)."""
+
+    return ReportJob.objects.filter(
+        pk=job.pk, status=ReportJob.RUNNING, worker=job.worker, started_at=job.started_at
+    )
+
+
+@contextmanager
+def heartbeat(job: ReportJob, interval: float):
+    """Renouvelle le bail du job toutes les `interval` secondes pendant le bloc (fil séparé)."""
+
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(interval):
+                _owned(job).update(heartbeat_at=timezone.now())
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=beat, name=f"heartbeat-{job.pk}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def claim_next(worker: str) -> ReportJob | None:
+    for job in ReportJob.objects.filter(status=ReportJob.PENDING).order_by("created_at")[:10]:
+        if claim(job, worker):
+            return job
+    return None
+
+
+def _reads(job: ReportJob):
+    """
+    Les gestionnaires lisent leurs requêtes de rapport sur le réplica
+    (`grades.results.result_reads`) et tout le reste sur le primaire. Un job
+    plus récent que `REPLICA_STICKY_SECONDS` lit tout sur le primaire : le
+    réplica n'a peut-être pas encore reçu les écritures qui le précèdent.
+    """
+
+    recent = timezone.now() - job.created_at < timedelta(seconds=settings.REPLICA_STICKY_SECONDS)
+    return use_primary() if recent else nullcontext()
+
+
+def run_job(job: ReportJob) -> None:
+    try:
+        handler = import_string(REPORT_HANDLERS[job.kind])
+        with tempfile.TemporaryFile() as output, _reads(job):
+            filename = handler(job.params, output)
+            output.seek(0)
+            job.file.save(get_valid_filename(filename), File(output), save=False)
+    except Exception:
+        logger.exception("Échec du rapport %s", job)
+        job.status = ReportJob.FAILED
+        job.error = traceback.format_exc()
+    else:
+        job.status = ReportJob.DONE
+    job.finished_at = timezone.now()
+    finished = _owned(job).update(
+        status=job.status, file=job.file.name or "", error=job.error, finished_at=job.finished_at
+    )
+    if not finished:
+        # Bail expiré : le job a été remis en attente et sera (ou a été) rendu ailleurs.
+        logger.warning("Rapport %s abandonné : bail expiré", job)
+        if job.file:
+            job.file.delete(save=False)
+        return
+    if job.params.get("path"):
+        default_storage.delete(job.params["path"])
+
+
+def requeue_stale(lease: int) -> int:
+    """
+    Remet en attente les jobs en cours dont le bail n'a pas été renouvelé
+    depuis `lease` secondes (worker arrêté brutalement).
+    """
+
+    limit = timezone.now() - timedelta(seconds=lease)
+    return ReportJob.objects.filter(status=ReportJob.RUNNING, heartbeat_at__lt=limit).update(
+        status=ReportJob.PENDING,
+        started_at=None,
+        heartbeat_at=None,
+        worker="",
+    )
@@ -0,0 +1,60 @@
+import multiprocessing
+import os
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from reports.jobs import claim_next, heartbeat, requeue_stale, run_job
+
+
+def work(poll_interval: float, once: bool) -> None:
+    name = f"{socket.gethostname()}:{os.getpid()}"
+    lease = settings.REPORT_JOB_TIMEOUT
+    next_requeue = 0.0
+    while True:
+        close_old_connections()
+        if time.monotonic() >= next_requeue:
+            requeue_stale(lease)
+            next_requeue = time.monotonic() + lease / 2
+        job = claim_next(name)
+        if job is not None:
+            with heartbeat(job, lease / 4):
+                run_job(job)
+            continue
+        if once:
+            return
+        time.sleep(poll_interval)
+
+
+class Command(BaseCommand):
+    help = "Démarre les workers locaux qui rendent les rapports PDF en attente."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=1, help="Nombre de processus worker (défaut : 1).")
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="Attente entre deux scrutations (s).")
+        parser.add_argument("--once", action="store_true", help="Traite les jobs en attente puis s'arrête.")
+
+    def handle(self, *args, **options):
+        processes = max(1, options["processes"])
+        if processes == 1:
+            work(options["poll_interval"], options["once"])
+            return
+
+        # Chaque processus ouvre ses propres connexions à la base.
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=work, args=(options["poll_interval"], options["once"]))
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(self.style.SUCCESS(f"{processes} worker(s) démarré(s)."))
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:10
+
+from django.db import migrations, models
+
+
+def start_leases(apps, schema_editor):
+    # Les jobs en cours reçoivent un bail partant de leur démarrage.
+    ReportJob = apps.get_model("reports", "ReportJob")
+    ReportJob.objects.filter(status="RUNNING").update(heartbeat_at=models.F("started_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(start_leases, migrations.RunPython.noop),
+    ]
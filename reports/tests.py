@@ -0,0 +1,97 @@
+import tempfile
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from users.models import User
+
+from .jobs import claim, claim_next, enqueue, requeue_stale, run_job
+from .models import ReportJob
+
+
+class ReportJobQueueTests(TestCase):
+    def setUp(self):
+        self.job = ReportJob.objects.create(kind="exit_certificate", params={"student": 0})
+
+    def test_claim_is_exclusive(self):
+        other = ReportJob.objects.get(pk=self.job.pk)
+        self.assertTrue(claim(self.job, "worker-a"))
+        self.assertFalse(claim(other, "worker-b"))
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.worker), (ReportJob.RUNNING, "worker-a"))
+        self.assertIsNone(claim_next("worker-b"))
+
+    def test_claim_next_takes_oldest_pending_job(self):
+        ReportJob.objects.create(kind="exit_certificate", params={"student": 0})
+        first = claim_next("worker-a")
+        second = claim_next("worker-b")
+        self.assertEqual(first.pk, self.job.pk)
+        self.assertNotEqual(second.pk, first.pk)
+
+    def test_only_expired_leases_are_requeued(self):
+        claim(self.job, "worker-a")
+        self.assertEqual(requeue_stale(60), 0)
+        ReportJob.objects.filter(pk=self.job.pk).update(heartbeat_at=timezone.now() - timedelta(seconds=61))
+        self.assertEqual(requeue_stale(60), 1)
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.worker), (ReportJob.PENDING, ""))
+
+    def test_requeued_job_does_not_record_stale_result(self):
+        claim(self.job, "worker-a")
+        stale = ReportJob.objects.get(pk=self.job.pk)
+        ReportJob.objects.filter(pk=self.job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        requeue_stale(60)
+        self.assertTrue(claim(ReportJob.objects.get(pk=self.job.pk), "worker-b"))
+
+        with self.assertLogs("reports.jobs", "WARNING") as logs:
+            run_job(stale)
+        self.assertIn("bail expiré", logs.output[-1])
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.worker), (ReportJob.RUNNING, "worker-b"))
+
+    def test_failed_handler_marks_job_failed(self):
+        claim(self.job, "worker-a")
+        with self.assertLogs("reports.jobs", "ERROR"):
+            run_job(self.job)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, ReportJob.FAILED)
+        self.assertIn("Traceback", self.job.error)
+
+    def test_unknown_kind_marks_job_failed(self):
+        job = ReportJob.objects.create(kind="inconnu", params={})
+        claim(job, "worker-a")
+        with self.assertLogs("reports.jobs", "ERROR"):
+            run_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ReportJob.FAILED)
+        self.assertIn("KeyError", job.error)
+
+    def test_uploaded_file_is_deleted_once_job_is_done(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        with override_settings(MEDIA_ROOT=media.name):
+            path = default_storage.save("imports/students/vide.csv", ContentFile(b"first_name;last_name\n"))
+            job = ReportJob.objects.create(kind="student_import", params={"path": path})
+            claim(job, "worker-a")
+            run_job(job)
+            job.refresh_from_db()
+            self.assertEqual(job.status, ReportJob.DONE, job.error)
+            self.assertFalse(default_storage.exists(path))
+            self.assertTrue(default_storage.exists(job.file.name))
+
+
+class ReportJobViewTests(TestCase):
+    def test_list_shows_only_own_jobs(self):
+        owner = User.objects.create_user(email="a@ums.local", password="x", first_name="A", last_name="A", role="ADMIN")
+        other = User.objects.create_user(email="b@ums.local", password="x", first_name="B", last_name="B", role="ADMIN")
+        with override_settings(REPORT_JOBS_ASYNC=True):
+            mine = enqueue("exit_certificate", {"student": 0}, owner)
+            enqueue("exit_certificate", {"student": 0}, other)
+        self.client.force_login(owner)
+        response = self.client.get(reverse("reports:job_list"))
+        self.assertEqual([job.pk for job in response.context["object_list"]], [mine.pk])
+        self.assertEqual(self.client.get(reverse("reports:job_status", args=[mine.pk])).status_code, 200)
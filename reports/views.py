@@ -0,0 +1,69 @@
+from django.http import FileResponse, Http404, JsonResponse
+from django.urls import reverse
+from django.views import View
+from django.views.generic import DetailView
+from django.views.generic.detail import SingleObjectMixin
+
+from ums.mixins import BaseListView, RoleGroups, RolePermissionMixin
+
+from .models import ReportJob
+
+
+class ReportJobAccessMixin(RolePermissionMixin):
+    allowed_roles = RoleGroups.ALL_STAFF
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not self.request.user.is_superuser:
+            queryset = queryset.filter(requested_by=self.request.user)
+        return queryset
+
+
+class ReportJobListView(ReportJobAccessMixin, BaseListView):
+    model = ReportJob
+    list_display = ("kind", "status", "created_at", "finished_at")
+    page_title = "Rapports demandés"
+    detail_url_name = "reports:job_detail"
+
+    def get_queryset(self):
+        return super().get_queryset().order_by("-created_at")
+
+
+class ReportJobDetailView(ReportJobAccessMixin, DetailView):
+    """Page d'attente : interroge le statut puis propose le téléchargement."""
+
+    model = ReportJob
+    template_name = "reports/job_detail.html"
+    context_object_name = "job"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["page_title"] = "Rapport en préparation"
+        return context
+
+
+class ReportJobStatusView(ReportJobAccessMixin, SingleObjectMixin, View):
+    model = ReportJob
+
+    def get(self, request, pk):
+        job = self.get_queryset().filter(pk=pk).first()
+        if job is None:
+            raise Http404("Rapport introuvable.")
+        return JsonResponse(
+            {
+                "status": job.status,
+                "status_display": job.get_status_display(),
+                "finished": job.is_finished,
+                "download_url": reverse("reports:job_download", args=[job.pk]) if job.status == ReportJob.DONE else None,
+            }
+        )
+
+
+class ReportJobDownloadView(ReportJobAccessMixin, SingleObjectMixin, View):
+    model = ReportJob
+
+    def get(self, request, pk):
+        job = self.get_queryset().filter(pk=pk, status=ReportJob.DONE).first()
+        if job is None or not job.file:
+            raise Http404("Rapport indisponible.")
+        return FileResponse(job.file.open("rb"), as_attachment=True, filename=job.file.name.rsplit("/", 1)[-1])
@@ -0,0 +1,134 @@
+"""
+Provisionnement des comptes utilisateurs des étudiants, par lots.
+
+La création d'un étudiant ne crée plus son compte de façon synchrone : les
+comptes sont créés en masse avec un mot de passe inutilisable (aucun
+hachage), rattachés aux étudiants par `bulk_update`, puis activés par
+l'étudiant via un jeton (`users.activation`). Un étudiant inscrit depuis le
+formulaire reçoit son jeton dans le même rappel ; pour les comptes importés
+en masse, les liens sont émis par `manage.py provision_accounts --links`.
+Les échecs sont journalisés et retournés à l'appelant.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Iterable, NamedTuple
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+
+from core.kpi import invalidate
+from users.activation import issue_activation_tokens
+
+from .models import Student
+
+logger = logging.getLogger(__name__)
+
+
+class ProvisioningFailure(NamedTuple):
+    student_id: int
+    matricule: str
+    reason: str
+
+
+class ProvisioningReport(NamedTuple):
+    users: list
+    failures: list[ProvisioningFailure]
+
+
+def provision_student_accounts(students: Iterable[Student]) -> ProvisioningReport:
+    """
+    Crée les comptes manquants des étudiants donnés (contact chargé ou non)
+    en un nombre constant de requêtes.
+    """
+
+    User = get_user_model()
+    candidates, failures = [], []
+    for student in students:
+        if student.user_id:
+            continue
+        email = student.contact.email if student.contact_id else ""
+        if not email:
+            failures.append(ProvisioningFailure(student.pk, student.matricule, "Aucune adresse email de contact."))
+            continue
+        candidates.append((student, User.objects.normalize_email(email)))
+
+    emails = [email for _, email in candidates]
+    usernames = [student.matricule.lower() for student, _ in candidates]
+    taken = set()
+    for email, username in User.objects.filter(Q(email__in=emails) | Q(username__in=usernames)).values_list(
+        "email", "username"
+    ):
+        taken.update((email, username))
+
+    accounts = []
+    for student, email in candidates:
+        username = student.matricule.lower()
+        if email in taken or username in taken:
+            failures.append(
+                ProvisioningFailure(student.pk, student.matricule, f"Compte existant pour {email} ou {username}.")
+            )
+            continue
+        taken.update((email, username))
+        user = User(
+            email=email,
+            first_name=student.first_name,
+            last_name=student.last_name,
+            role="STUDENT",
+            username=username,
+        )
+        user.set_unusable_password()
+        accounts.append((student, user))
+
+    users = [user for _, user in accounts]
+    if accounts:
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            for student, user in accounts:
+                student.user = user
+            Student.objects.bulk_update([student for student, _ in accounts], ["user"])
+        invalidate("total_users")
+
+    for failure in failures:
+        logger.warning("Compte non créé pour l'étudiant %s : %s", failure.matricule, failure.reason)
+    return ProvisioningReport(users=users, failures=failures)
+
+
+def provision_missing_accounts(batch_size: int = 1000) -> ProvisioningReport:
+    """Rattrape tous les étudiants sans compte, par lots. Retourne le rapport cumulé."""
+
+    users, failures = [], []
+    last_pk = 0
+    while True:
+        batch = list(
+            Student.objects.select_related("contact")
+            .filter(user__isnull=True, pk__gt=last_pk)
+            .order_by("pk")[:batch_size]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        report = provision_student_accounts(batch)
+        users.extend(report.users)
+        failures.extend(report.failures)
+    return ProvisioningReport(users=users, failures=failures)
+
+
+def provision_and_invite(student: Student) -> None:
+    """
+    Crée le compte de l'étudiant et son jeton d'activation. Le jeton en clair
+    n'est conservé que sur l'instance (`student.activation_token`), pour que
+    la vue qui l'a inscrit affiche le lien.
+    """
+
+    report = provision_student_accounts([student])
+    for _, token in issue_activation_tokens(report.users):
+        student.activation_token = token
+
+
+def schedule_account_provisioning(student: Student) -> None:
+    """Crée le compte de l'étudiant et son lien d'activation une fois sa transaction validée."""
+
+    transaction.on_commit(lambda: provision_and_invite(student))
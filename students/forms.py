@@ -55,3 +55,38 @@ class StudentSponsorForm(forms.ModelForm):
         model = StudentSponsor
         fields = "__all__"
 
+
+
+class StudentImportForm(StudentForm):
+    """Champs de l'étudiant lus dans une ligne de fichier d'import."""
+
+    class Meta(StudentForm.Meta):
+        fields = (
+            "first_name",
+            "middle_name",
+            "last_name",
+            "gender",
+            "marital_status",
+            "birth_place",
+            "birth_date",
+            "nationality",
+        )
+
+
+class ContactImportForm(ContactForm):
+    def validate_unique(self):
+        # L'unicité des emails est vérifiée en une requête par lot par l'importeur.
+        pass
+
+
+class StudentImportUploadForm(forms.Form):
+    file = forms.FileField(
+        label="Fichier",
+        help_text="Classeur .xlsx ou fichier .csv (séparateur « ; » ou « , »), une ligne d'en-tête.",
+    )
+
+    def clean_file(self):
+        upload = self.cleaned_data["file"]
+        if not upload.name.lower().endswith((".xlsx", ".csv")):
+            raise forms.ValidationError("Format non pris en charge : utilisez un fichier .xlsx ou .csv.")
+        return upload
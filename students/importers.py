@@ -0,0 +1,229 @@
+"""
+Import en masse d'étudiants depuis un classeur Excel ou un fichier CSV.
+
+Le fichier est lu par lots de lignes. Chaque ligne est validée avec les
+règles des formulaires existants, puis les adresses, contacts, diplômes,
+comptes utilisateurs et étudiants valides d'un lot sont créés par
+`bulk_create` dans une transaction, avec un bloc de matricules réservé en
+une fois. `bulk_create` ne déclenche ni `save()` ni les signaux : la
+normalisation des noms, le matricule et le compte utilisateur (provisionné
+sans mot de passe, à activer) sont donc traités ici. Les lignes rejetées sont restituées dans un rapport, ligne par ligne.
+"""
+
+from __future__ import annotations
+
+import csv
+import datetime
+import io
+from itertools import islice
+from typing import IO, Iterable, Iterator, NamedTuple
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from core.kpi import invalidate
+from ums.exports import SafeCsvWriter
+
+from .accounts import provision_student_accounts
+from .forms import AddressForm, ContactImportForm, DiplomaForm, StudentImportForm
+from .models import Address, Contact, Diploma, Student, reserve_matricules
+
+NAME_FIELDS = ("first_name", "middle_name", "last_name")
+
+ADDRESS_COLUMNS = tuple(AddressForm.base_fields)
+DIPLOMA_COLUMNS = tuple(DiplomaForm.base_fields)
+
+
+class RowError(NamedTuple):
+    line: int
+    field: str
+    message: str
+
+
+class ImportReport(NamedTuple):
+    created: int
+    errors: list[RowError]
+
+    def write_csv(self, output: IO[str]) -> None:
+        writer = SafeCsvWriter(output)
+        writer.writerow(["ligne", "champ", "erreur"])
+        for error in self.errors:
+            writer.writerow(error)
+        rejected = len({error.line for error in self.errors})
+        writer.writerow(["", "total", f"{self.created} étudiant(s) importé(s), {rejected} ligne(s) rejetée(s)"])
+
+
+class _ValidRow(NamedTuple):
+    line: int
+    student: Student
+    contact: Contact
+    address: Address | None
+    diploma: Diploma | None
+
+
+def _normalize_header(value) -> str:
+    return str(value or "").strip().lower().replace(" ", "_")
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def read_rows(file: IO[bytes], filename: str) -> Iterator[tuple[int, dict]]:
+    """Produit `(numéro de ligne, données)` pour chaque ligne non vide du fichier."""
+
+    if filename.lower().endswith(".xlsx"):
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        rows = workbook.active.iter_rows(values_only=True)
+    else:
+        text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+        sample = text.readline()
+        delimiter = ";" if sample.count(";") >= sample.count(",") else ","
+        rows = csv.reader(_chain_line(sample, text), delimiter=delimiter)
+
+    header = [_normalize_header(value) for value in next(rows, [])]
+    for line, values in enumerate(rows, start=2):
+        data = {name: _cell(value) for name, value in zip(header, values) if name}
+        if any(value != "" for value in data.values()):
+            yield line, data
+
+
+def _chain_line(first: str, rest: IO[str]) -> Iterator[str]:
+    yield first
+    yield from rest
+
+
+def _form_errors(line: int, form) -> list[RowError]:
+    return [RowError(line, field, message) for field, messages in form.errors.items() for message in messages]
+
+
+def _optional_form(form_class, columns: tuple[str, ...], data: dict):
+    """Formulaire lié si au moins une des colonnes du groupe est renseignée."""
+
+    if not any(data.get(column) for column in columns):
+        return None
+    return form_class(data={column: data.get(column, "") for column in columns})
+
+
+def _validate(line: int, data: dict) -> tuple[_ValidRow | None, list[RowError]]:
+    data = dict(data)
+    if not data.get("nationality"):
+        data["nationality"] = Student._meta.get_field("nationality").get_default()
+
+    student_form = StudentImportForm(data=data)
+    contact_form = ContactImportForm(data=data)
+    address_form = _optional_form(AddressForm, ADDRESS_COLUMNS, data)
+    diploma_form = _optional_form(DiplomaForm, DIPLOMA_COLUMNS, data)
+
+    errors = []
+    for form in (student_form, contact_form, address_form, diploma_form):
+        if form is not None and not form.is_valid():
+            errors.extend(_form_errors(line, form))
+    if errors:
+        return None, errors
+
+    student = student_form.save(commit=False)
+    for name in NAME_FIELDS:
+        setattr(student, name, getattr(student, name).strip().title())
+    return (
+        _ValidRow(
+            line=line,
+            student=student,
+            contact=contact_form.save(commit=False),
+            address=address_form.save(commit=False) if address_form else None,
+            diploma=diploma_form.save(commit=False) if diploma_form else None,
+        ),
+        [],
+    )
+
+
+def _reject_duplicates(rows: list[_ValidRow], seen_emails: set[str]) -> tuple[list[_ValidRow], list[RowError]]:
+    """Écarte les emails déjà présents en base ou plus haut dans le fichier (deux requêtes par lot)."""
+
+    User = get_user_model()
+    emails = [row.contact.email for row in rows]
+    user_emails = [User.objects.normalize_email(email) for email in emails]
+    taken = set(Contact.objects.filter(email__in=emails).values_list("email", flat=True))
+    taken.update(User.objects.filter(email__in=user_emails).values_list("email", flat=True))
+
+    kept, errors = [], []
+    for row, user_email in zip(rows, user_emails):
+        key = user_email.lower()
+        if row.contact.email in taken or user_email in taken:
+            errors.append(RowError(row.line, "email", "Cette adresse email est déjà utilisée."))
+        elif key in seen_emails:
+            errors.append(RowError(row.line, "email", "Adresse email en double dans le fichier."))
+        else:
+            seen_emails.add(key)
+            kept.append(row)
+    return kept, errors
+
+
+def _create(rows: list[_ValidRow]) -> list[RowError]:
+    with transaction.atomic():
+        matricules = iter(reserve_matricules(len(rows)))
+        Address.objects.bulk_create([row.address for row in rows if row.address])
+        Contact.objects.bulk_create([row.contact for row in rows])
+        Diploma.objects.bulk_create([row.diploma for row in rows if row.diploma])
+        for row in rows:
+            student = row.student
+            student.matricule = next(matricules)
+            student.address, student.contact, student.diploma = row.address, row.contact, row.diploma
+        Student.objects.bulk_create([row.student for row in rows])
+        report = provision_student_accounts([row.student for row in rows])
+
+    lines = {row.student.pk: row.line for row in rows}
+    return [RowError(lines[failure.student_id], "compte", failure.reason) for failure in report.failures]
+
+
+def import_students(rows: Iterable[tuple[int, dict]], chunk_size: int = 1000) -> ImportReport:
+    """Valide et crée les étudiants lot par lot ; retourne le rapport d'import."""
+
+    created = 0
+    errors: list[RowError] = []
+    seen_emails: set[str] = set()
+
+    rows = iter(rows)
+    while chunk := list(islice(rows, chunk_size)):
+        valid = []
+        for line, data in chunk:
+            row, row_errors = _validate(line, data)
+            errors.extend(row_errors)
+            if row is not None:
+                valid.append(row)
+        valid, duplicate_errors = _reject_duplicates(valid, seen_emails)
+        errors.extend(duplicate_errors)
+        if not valid:
+            continue
+        errors.extend(_create(valid))
+        created += len(valid)
+
+    if created:
+        invalidate("total_students")
+    errors.sort(key=lambda error: error.line)
+    return ImportReport(created=created, errors=errors)
+
+
+def run_student_import(params: dict, output) -> str:
+    """
+    Gestionnaire du worker de rapports : importe le fichier déposé dans le
+    stockage et écrit le rapport d'erreurs (CSV) dans `output`.
+    """
+
+    path = params["path"]
+    with default_storage.open(path, "rb") as file:
+        report = import_students(read_rows(file, path))
+    text = io.TextIOWrapper(output, encoding="utf-8-sig", newline="")
+    report.write_csv(text)
+    text.flush()
+    text.detach()
+    return f"import-etudiants-{timezone.localdate():%Y%m%d}.csv"
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from students.importers import import_students, read_rows
+
+
+class Command(BaseCommand):
+    help = "Importe des étudiants (et leurs comptes) depuis un fichier .xlsx ou .csv."
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="Fichier à importer (.xlsx ou .csv), une ligne d'en-tête.")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Lignes validées et créées par transaction.")
+        parser.add_argument("--report", help="Fichier CSV où écrire le rapport d'erreurs (défaut : sortie standard).")
+
+    def handle(self, *args, **options):
+        path = options["file"]
+        if not path.lower().endswith((".xlsx", ".csv")):
+            raise CommandError("Format non pris en charge : utilisez un fichier .xlsx ou .csv.")
+        try:
+            with open(path, "rb") as file:
+                report = import_students(read_rows(file, path), chunk_size=options["chunk_size"])
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        if report.errors:
+            if options["report"]:
+                with open(options["report"], "w", encoding="utf-8-sig", newline="") as output:
+                    report.write_csv(output)
+            else:
+                report.write_csv(self.stdout)
+
+        rejected = len({error.line for error in report.errors})
+        self.stdout.write(self.style.SUCCESS(f"{report.created} étudiant(s) importé(s), {rejected} ligne(s) rejetée(s)."))
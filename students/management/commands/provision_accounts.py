@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from students.accounts import provision_missing_accounts
+from ums.exports import SafeCsvWriter
+from users.activation import issue_activation_tokens, pending_activation_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Crée en masse les comptes des étudiants qui n'en ont pas (sans mot de passe) "
+        "et exporte leurs liens d'activation."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Étudiants traités par transaction.")
+        parser.add_argument("--links", help="Fichier CSV où écrire les liens d'activation émis.")
+        parser.add_argument(
+            "--all-pending",
+            action="store_true",
+            help="Réémet aussi les liens de tous les comptes étudiants jamais activés.",
+        )
+        parser.add_argument("--base-url", default="http://localhost:8000", help="URL publique du site.")
+
+    def handle(self, *args, **options):
+        report = provision_missing_accounts(options["batch_size"])
+        for failure in report.failures:
+            self.stderr.write(f"{failure.matricule or failure.student_id} : {failure.reason}")
+        self.stdout.write(self.style.SUCCESS(f"{len(report.users)} compte(s) créé(s), {len(report.failures)} échec(s)."))
+
+        if not options["links"]:
+            return
+        if options["all_pending"]:
+            users = pending_activation_users().filter(role="STUDENT")
+        else:
+            users = report.users
+        base_url = options["base_url"].rstrip("/")
+        with open(options["links"], "w", encoding="utf-8-sig", newline="") as output:
+            writer = SafeCsvWriter(output)
+            writer.writerow(["email", "matricule", "lien d'activation"])
+            for user, token in issue_activation_tokens(users):
+                writer.writerow([user.email, user.username, base_url + reverse("users:activate", args=[token])])
+        self.stdout.write(f"Liens d'activation écrits dans {options['links']}.")
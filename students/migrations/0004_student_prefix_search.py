@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:14
+
+import ums.indexes
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0003_alter_student_last_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=ums.indexes.PrefixSearchIndex(field='last_name', name='student_last_name_prefix'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=ums.indexes.PrefixSearchIndex(field='first_name', name='student_first_name_prefix'),
+        ),
+    ]
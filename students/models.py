@@ -1,13 +1,17 @@
 from django.conf import settings
-from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
 from django.utils import timezone
 
+from ums.indexes import PrefixSearchIndex
+
 class Address(models.Model):
     street = models.CharField(max_length=100)
     quarter = models.CharField(max_length=50)
     city_commune = models.CharField(max_length=50)
 
+    str_fields = ("street", "quarter")
+
     def __str__(self):
         return f"{self.street}, {self.quarter}"
 
@@ -17,6 +21,8 @@ class Contact(models.Model):
     whatsapp_number = models.CharField(max_length=20, null=True, blank=True)
     email = models.EmailField(unique=True)
 
+    str_fields = ("email",)
+
     def __str__(self):
         return self.email
 
@@ -28,6 +34,8 @@ class Diploma(models.Model):
     section = models.CharField(max_length=50)
     percentage = models.DecimalField(max_digits=5, decimal_places=2)
 
+    str_fields = ("diploma_number",)
+
     def __str__(self):
         return f"{self.diploma_number}"
 
@@ -42,6 +50,8 @@ class Parent(models.Model):
     phone_number = models.CharField(max_length=20)
     email = models.EmailField(null=True, blank=True)
 
+    str_fields = ("first_name", "last_name")
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
@@ -52,10 +62,70 @@ class Sponsor(models.Model):
     phone_number = models.CharField(max_length=20)
     address = models.CharField(max_length=150)
 
+    str_fields = ("organization",)
+
     def __str__(self):
         return self.organization
 
 
+def current_academic_year() -> str:
+    """Année académique courante au format '25/26' (elle commence en août)."""
+
+    now = timezone.now()
+    start_year = now.year if now.month >= 8 else now.year - 1
+    return f"{str(start_year)[2:]}/{str(start_year + 1)[2:]}"
+
+
+class MatriculeSequence(models.Model):
+    """Dernier numéro de matricule attribué, par année académique."""
+
+    academic_year = models.CharField(max_length=5, unique=True)
+    last_value = models.PositiveIntegerField(default=0)
+
+    str_fields = ("academic_year", "last_value")
+
+    def __str__(self):
+        return f"{self.academic_year} : {self.last_value}"
+
+
+def _highest_matricule(academic_year: str) -> int:
+    """Plus grand numéro déjà attribué pour l'année (lu une seule fois, à la création du compteur)."""
+
+    highest = 0
+    existing = Student.objects.filter(matricule__endswith=f"-{academic_year}").values_list("matricule", flat=True)
+    for matricule in existing.iterator():
+        try:
+            highest = max(highest, int(matricule.split("-")[0]))
+        except ValueError:
+            continue
+    return highest
+
+
+def reserve_matricules(count: int, academic_year: str | None = None) -> list[str]:
+    """
+    Réserve `count` matricules consécutifs. L'incrément `F()` verrouille la
+    ligne du compteur jusqu'à la fin de la transaction : deux inscriptions
+    simultanées ne peuvent pas obtenir le même numéro, et une transaction
+    annulée rend ses numéros.
+    """
+
+    academic_year = academic_year or current_academic_year()
+    with transaction.atomic():
+        sequences = MatriculeSequence.objects.filter(academic_year=academic_year)
+        if not sequences.update(last_value=F("last_value") + count):
+            try:
+                with transaction.atomic():
+                    MatriculeSequence.objects.create(
+                        academic_year=academic_year,
+                        last_value=_highest_matricule(academic_year) + count,
+                    )
+            except IntegrityError:  # compteur créé au même moment par une autre transaction
+                sequences.update(last_value=F("last_value") + count)
+        last_value = sequences.values_list("last_value", flat=True).get()
+    first_value = last_value - count + 1
+    return [f"{str(value).zfill(4)}-{academic_year}" for value in range(first_value, last_value + 1)]
+
+
 class Student(models.Model):
     GENDER_CHOICES = [
         ("masculin", "Masculin"),
@@ -76,7 +146,7 @@ class Student(models.Model):
 
     first_name = models.CharField(max_length=50)
     middle_name = models.CharField(max_length=50)
-    last_name = models.CharField(max_length=50)
+    last_name = models.CharField(max_length=50, db_index=True)
 
     gender = models.CharField(max_length=8, choices=GENDER_CHOICES)
     marital_status = models.CharField(max_length=50)
@@ -93,42 +163,17 @@ class Student(models.Model):
 
     sponsors = models.ManyToManyField(Sponsor, through="StudentSponsor")
 
+    class Meta:
+        # Recherche par préfixe des listes (`^last_name`, `^first_name`)
+        indexes = [
+            PrefixSearchIndex(field="last_name", name="student_last_name_prefix"),
+            PrefixSearchIndex(field="first_name", name="student_first_name_prefix"),
+        ]
+
     def generate_matricule(self):
         """Génère le matricule au format 0001-26/27"""
 
-        current_year = timezone.now().year
-        # Si nous sommes en 2025 (début de l'année académique 2025-2026),
-        # l'année académique est '25/26'.
-        if timezone.now().month >= 8: # Par exemple, si l'année académique commence en août
-            start_year = str(current_year)[2:]
-            end_year = str(current_year + 1)[2:]
-        else: # Si nous sommes en 2026 mais dans les premiers mois de l'année académique 2025-2026
-            start_year = str(current_year - 1)[2:]
-            end_year = str(current_year)[2:]
-
-        academic_year = f"{start_year}/{end_year}"
-
-        # Trouver le dernier matricule de l'année académique en cours
-        last_student = Student.objects.filter(
-            matricule__startswith="", # Filtre pour s'assurer que le matricule est non nul
-            matricule__endswith=academic_year
-        ).order_by('-matricule').first()
-
-        sequence_number = 1
-        if last_student and last_student.matricule:
-            # Extrait le numéro de séquence (e.g., '0001')
-            try:
-                # Le matricule est 'XXXX-YY/ZZ', on prend la première partie
-                last_sequence = int(last_student.matricule.split('-')[0])
-                sequence_number = last_sequence + 1
-            except ValueError:
-                # En cas d'erreur de format, on recommence à 1
-                sequence_number = 1
-
-        # Formate le numéro de séquence sur 4 chiffres (e.g., 1 -> '0001')
-        matricule_sequence = str(sequence_number).zfill(4)
-
-        return f"{matricule_sequence}-{academic_year}"
+        return reserve_matricules(1)[0]
 
     def save(self, *args, **kwargs):
         # 1. Génération du matricule à la création
@@ -140,32 +185,13 @@ class Student(models.Model):
 
         super().save(*args, **kwargs)
 
-        # 2. Création ou mise à jour de l'utilisateur
-        if is_new_instance and not self.user and self.contact and self.contact.email:
-            try:
-                # Par défaut, le mot de passe peut être une valeur temporaire ou générée (e.g., 'changemoi123')
-                # Vous devez gérer l'envoi du mot de passe initial à l'utilisateur
-                # Ou forcer une réinitialisation après la première connexion.
-                default_password = 'changeme_initial_password'
-
-                UserModel = get_user_model()
-                user = UserModel.objects.create_user(
-                    email=self.contact.email,
-                    password=default_password,
-                    first_name=self.first_name,
-                    last_name=self.last_name,
-                    role='STUDENT',
-                    # Optionnel: on peut définir le username comme le matricule si souhaité
-                    username=self.matricule 
-                )
-                self.user = user
-                # Sauvegarder à nouveau pour lier l'utilisateur au profil Student
-                # Utilisez update_fields pour éviter une boucle infinie dans save()
-                Student.objects.filter(pk=self.pk).update(user=user) 
-
-            except Exception as e:
-                # Gérer les cas où l'utilisateur ne peut pas être créé (e.g., email déjà utilisé)
-                print(f"Erreur lors de la création de l'utilisateur pour l'étudiant {self.matricule}: {e}")
+        # 2. Compte utilisateur : créé après le commit, sans hachage de mot de passe
+        if is_new_instance and not self.user_id:
+            from .accounts import schedule_account_provisioning
+
+            schedule_account_provisioning(self)
+
+    str_fields = ("first_name", "last_name", "matricule")
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.matricule})"
@@ -184,5 +210,7 @@ class StudentSponsor(models.Model):
         verbose_name = "Parrainage étudiant"
         verbose_name_plural = "Parrainages étudiants"
 
+    str_fields = ("sponsor", "student")
+
     def __str__(self):
         return f"{self.sponsor} -> {self.student}"
\ No newline at end of file
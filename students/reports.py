@@ -0,0 +1,88 @@
+"""
+Rendu de l'état de sortie, exécuté par le worker de rapports.
+"""
+
+from enrollment.models import Enrollment
+from grades.results import load_summary
+from ums.pdf import Paragraph, Spacer, build_table, get_pdf_styles, lmd_decision, lmd_mention, render_pdf
+
+from .models import Student
+
+
+def render_exit_certificate(params: dict, output) -> str:
+    """
+    Génère un état de sortie consolidé conforme aux attendus LMD (RDC).
+    """
+
+    student = Student.objects.select_related("address", "contact", "diploma").get(pk=params["student"])
+    enrollments = (
+        Enrollment.objects.filter(student=student)
+        .select_related("year", "semester", "faculty", "department")
+        .order_by("year__name", "semester__name")
+    )
+    summary = load_summary(enrollments)
+    styles = get_pdf_styles()
+
+    def build():
+        flow = [
+            Paragraph("République Démocratique du Congo", styles["Small"]),
+            Paragraph("ÉTAT DE SORTIE - SYSTÈME LMD", styles["Title"]),
+            Spacer(1, 12),
+        ]
+        identity_rows = [
+            ["Nom complet", f"{student.last_name} {student.first_name}".upper()],
+            ["Matricule", student.matricule or "-"],
+            ["Genre", student.get_gender_display() if hasattr(student, "get_gender_display") else student.gender],
+            ["Nationalité", student.nationality or "-"],
+            ["Date / Lieu de naissance", f"{student.birth_date} - {student.birth_place}"],
+        ]
+        if student.contact:
+            identity_rows.append(["Email", student.contact.email])
+            identity_rows.append(["Téléphone", student.contact.phone_number])
+        flow.append(Paragraph("Informations personnelles", styles["Heading2"]))
+        flow.append(build_table(identity_rows, col_widths=[160, 300]))
+
+        if enrollments:
+            enrollment_table = [
+                ["Année académique", "Semestre", "Faculté", "Département", "Promotion"],
+            ]
+            for enrollment in enrollments:
+                enrollment_table.append(
+                    [
+                        enrollment.year.name,
+                        enrollment.semester.name,
+                        enrollment.faculty.name,
+                        enrollment.department.name if enrollment.department else "-",
+                        enrollment.promotion,
+                    ]
+                )
+            flow.append(Spacer(1, 12))
+            flow.append(Paragraph("Parcours académique", styles["Heading2"]))
+            flow.append(build_table(enrollment_table, header=True))
+
+        summary_rows = [
+            ["Crédits validés", summary.validated_credits],
+            [
+                "Moyenne générale",
+                f"{summary.average:.2f}" if summary.average is not None else "N/A",
+            ],
+            ["Mention", lmd_mention(summary.average)],
+            ["Décision", lmd_decision(summary.average)],
+        ]
+        flow.append(Spacer(1, 12))
+        flow.append(Paragraph("Synthèse académique LMD", styles["Heading2"]))
+        flow.append(build_table(summary_rows, col_widths=[200, 200]))
+
+        flow.append(Spacer(1, 18))
+        flow.append(
+            Paragraph(
+                "Conformément aux exigences du système LMD en RDC, cet état de sortie atteste du parcours "
+                "académique de l'étudiant, de la validation des unités d'enseignement et de la décision finale "
+                "de la faculté.",
+                styles["BodyText"],
+            )
+        )
+        return flow
+
+    render_pdf(build, output=output)
+    return f"etat-sortie-{student.matricule or student.pk}.pdf"
@@ -1,11 +1,10 @@
 from django import template
 
-from students.models import Student
+from core.kpi import kpi_value
 
 register = template.Library()
 
 
 @register.simple_tag
 def total_students():
-    return Student.objects.count()
-
+    return kpi_value("total_students")
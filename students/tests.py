@@ -1,3 +1,205 @@
-from django.test import TestCase
+import datetime
+import io
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.db.models import Q, QuerySet
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core.benchmark import benchmark_client
+from core.seeding import SeedVolumes, seed
+from ums.mixins import BaseListView
+from users.activation import find_activation_token
+
+from .importers import import_students, read_rows
+from .models import Contact, MatriculeSequence, Student, reserve_matricules
+from .views import StudentListView
+
+SMALL = SeedVolumes(
+    faculties=1, departments=1, promotions=1, courses=2, students=7, payments=1, expenses=1, professors=1, cashiers=1
+)
+
+
+class MatriculeSequenceTests(TestCase):
+    def test_reservations_are_consecutive(self):
+        self.assertEqual(reserve_matricules(2, "98/99"), ["0001-98/99", "0002-98/99"])
+        self.assertEqual(reserve_matricules(1, "98/99"), ["0003-98/99"])
+        self.assertEqual(reserve_matricules(1, "99/00"), ["0001-99/00"])
+
+    def test_new_counter_starts_after_existing_matricules(self):
+        seed(SMALL)
+        Student.objects.filter(pk=Student.objects.order_by("pk").values("pk")[:1]).update(matricule="0042-97/98")
+        self.assertEqual(reserve_matricules(1, "97/98"), ["0043-97/98"])
+
+    def test_counter_created_concurrently_is_incremented(self):
+        # Le compteur n'existait pas au premier UPDATE, une autre transaction l'a créé depuis
+        MatriculeSequence.objects.create(academic_year="96/97", last_value=5)
+        update = QuerySet.update
+        calls = []
+
+        def update_after_concurrent_create(queryset, **kwargs):
+            calls.append(kwargs)
+            return 0 if len(calls) == 1 else update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, "update", update_after_concurrent_create):
+            self.assertEqual(reserve_matricules(2, "96/97"), ["0006-96/97", "0007-96/97"])
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(MatriculeSequence.objects.get(academic_year="96/97").last_value, 7)
+
+
+class StudentListPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(SMALL)
+        # Étudiants saisis sans matricule
+        Student.objects.filter(pk__in=Student.objects.order_by("pk").values("pk")[:2]).update(matricule=None)
+
+    def setUp(self):
+        self.client = benchmark_client()
+        self.url = reverse("students:student_list")
+
+    def walk(self, direction, cursor=None):
+        """Pages parcourues de proche en proche depuis `cursor`, dans l'ordre de lecture."""
+
+        pages = []
+        while True:
+            context = self.client.get(self.url, {direction: cursor} if cursor else {}).context
+            pages.append([student.pk for student in context["object_list"]])
+            keyset = context["keyset"]
+            if direction == "after" and keyset["has_next"]:
+                cursor = keyset["next_cursor"]
+            elif direction == "before" and keyset["has_previous"]:
+                cursor = keyset["previous_cursor"]
+            else:
+                return pages, keyset
+
+    @mock.patch.object(StudentListView, "paginate_by", 3)
+    def test_cursors_walk_every_student_once_in_both_directions(self):
+        expected = list(Student.objects.order_by("pk").values_list("pk", flat=True))
+        self.assertTrue(Student.objects.filter(matricule__isnull=True).exists())
+
+        pages, last = self.walk("after")
+        self.assertEqual(sum(pages, []), expected)
+
+        previous, _ = self.walk("before", last["previous_cursor"])
+        self.assertEqual(sum(reversed(previous), []) + pages[-1], expected)
+
+    def test_null_cursor_is_rejected(self):
+        cursor = BaseListView.encode_cursor(None, 1)
+        self.assertEqual(self.client.get(self.url, {"after": cursor}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"after": "pas-un-curseur"}).status_code, 400)
+
+
+class StudentSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(SMALL)
+
+    def search(self, query):
+        view = StudentListView()
+        view.setup(RequestFactory().get("/", {"q": query}))
+        return view.search_queryset(Student.objects.all())
+
+    def test_prefix_search_ignores_case(self):
+        student = Student.objects.exclude(contact=None).order_by("pk").first()
+        prefix = student.last_name[:3]
+        expected = Student.objects.filter(Q(last_name__istartswith=prefix) | Q(first_name__istartswith=prefix))
+        found = self.search(prefix.lower())
+        self.assertEqual(set(found), set(expected))
+        self.assertIn(student, found)
+        self.assertEqual(list(self.search(student.contact.email)), [student])
+
+    def test_search_uses_indexes(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("plan SQLite")
+        plan = self.search("dup").explain()
+        self.assertNotIn("SCAN students_student", plan)
+        self.assertIn("student_last_name_prefix", plan)
+
+
+class StudentExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(SMALL)
+
+    def setUp(self):
+        self.client = benchmark_client()
+        self.url = reverse("students:student_list")
+
+    def test_small_list_is_exported_as_xlsx(self):
+        response = self.client.get(self.url, {"format": "xlsx", "q": "a"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Disposition"].endswith('.xlsx"'))
+
+    @override_settings(EXPORT_XLSX_MAX_ROWS=2)
+    def test_large_list_is_redirected_to_csv(self):
+        response = self.client.get(self.url, {"format": "xlsx", "gender": "masculin"})
+        self.assertRedirects(response, f"{self.url}?format=csv&gender=masculin", fetch_redirect_response=False)
+        response = self.client.get(self.url + response["Location"])
+        rows = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(rows) - 1, Student.objects.filter(gender="masculin").count())
+
+
+class StudentAccountTests(TestCase):
+    def new_student(self, email):
+        return Student(
+            first_name="Grace",
+            middle_name="Mbuyi",
+            last_name="Kabeya",
+            gender="feminin",
+            marital_status="Célibataire",
+            birth_place="Kinshasa",
+            birth_date=datetime.date(2005, 3, 1),
+            contact=Contact.objects.create(phone_number="0810000000", email=email) if email else None,
+        )
+
+    def test_registered_student_gets_account_and_activation_link(self):
+        student = self.new_student("grace@example.com")
+        with self.captureOnCommitCallbacks(execute=True):
+            student.save()
+        self.assertEqual(student.user.email, "grace@example.com")
+        self.assertFalse(student.user.has_usable_password())
+        self.assertEqual(find_activation_token(student.activation_token).user, student.user)
+
+    def test_student_without_email_gets_no_account(self):
+        student = self.new_student(None)
+        with self.assertLogs("students.accounts", "WARNING"), self.captureOnCommitCallbacks(execute=True):
+            student.save()
+        self.assertIsNone(student.user_id)
+        self.assertFalse(hasattr(student, "activation_token"))
+
+
+class StudentImportTests(TestCase):
+    HEADER = "first_name;middle_name;last_name;gender;marital_status;birth_place;birth_date;phone_number;email\n"
+
+    def import_file(self, lines):
+        data = (self.HEADER + "".join(f"{line}\n" for line in lines)).encode()
+        with self.captureOnCommitCallbacks(execute=True):
+            return import_students(read_rows(io.BytesIO(data), "etudiants.csv"), chunk_size=2)
+
+    def test_valid_rows_are_created_and_rejections_reported(self):
+        Contact.objects.create(phone_number="0810000000", email="pris@example.com")
+        report = self.import_file(
+            [
+                "grace;mbuyi;KABEYA;feminin;Célibataire;Kinshasa;2005-03-01;0811111111;grace@example.com",
+                "Jean;Ilunga;Mukendi;autre;Célibataire;Lubumbashi;2004-01-10;0812222222;jean@example.com",
+                "Paul;Tshibangu;Kasongo;masculin;Célibataire;Kananga;2004-05-02;0813333333;pris@example.com",
+                "Marie;Ngalula;Kabeya;feminin;Célibataire;Kinshasa;2005-07-08;0814444444;GRACE@example.com",
+                "Eric;Mbala;Lukusa;masculin;Célibataire;Mbuji-Mayi;2003-11-30;0815555555;eric@example.com",
+            ]
+        )
+
+        self.assertEqual(report.created, 2)
+        self.assertEqual(
+            [(error.line, error.field) for error in report.errors], [(3, "gender"), (4, "email"), (5, "email")]
+        )
+        grace = Student.objects.select_related("user").get(contact__email="grace@example.com")
+        self.assertEqual((grace.first_name, grace.last_name), ("Grace", "Kabeya"))
+        self.assertTrue(grace.matricule)
+        self.assertEqual(grace.user.email, "grace@example.com")
+        self.assertFalse(grace.user.has_usable_password())
+
+        output = io.StringIO()
+        report.write_csv(output)
+        self.assertIn("2 étudiant(s) importé(s), 3 ligne(s) rejetée(s)", output.getvalue())
@@ -7,6 +7,7 @@ app_name = "students"
 urlpatterns = [
     path("", views.StudentListView.as_view(), name="student_list"),
     path("create/", views.StudentCreateView.as_view(), name="student_create"),
+    path("import/", views.StudentImportView.as_view(), name="student_import"),
     path("<int:pk>/", views.StudentDetailView.as_view(), name="student_detail"),
     path("<int:pk>/update/", views.StudentUpdateView.as_view(), name="student_update"),
     path("<int:pk>/delete/", views.StudentDeleteView.as_view(), name="student_delete"),
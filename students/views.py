@@ -1,7 +1,9 @@
-from django.db.models import Avg, Q, Sum
-from django.shortcuts import get_object_or_404
+from django.core.files.storage import default_storage
+from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
+from django.utils.text import get_valid_filename
 from django.views import View
+from django.views.generic import FormView
 
 from ums.mixins import (
     BaseCreateView,
@@ -12,15 +14,6 @@ from ums.mixins import (
     RoleGroups,
     RolePermissionMixin,
 )
-from ums.pdf import (
-    Paragraph,
-    Spacer,
-    build_pdf_response,
-    build_table,
-    get_pdf_styles,
-    lmd_decision,
-    lmd_mention,
-)
 
 from .forms import (
     AddressForm,
@@ -29,12 +22,13 @@ from .forms import (
     ParentForm,
     SponsorForm,
     StudentForm,
+    StudentImportUploadForm,
     StudentSponsorForm,
 )
 from .models import Address, Contact, Diploma, Parent, Sponsor, Student, StudentSponsor
 
 from enrollment.models import Enrollment
-from grades.models import Grade
+from reports.jobs import enqueue
 
 
 class AcademicAccessMixin:
@@ -210,6 +204,10 @@ class StudentListView(AcademicAccessMixin, BaseListView):
     model = Student
     list_display = ("matricule", "first_name", "last_name", "gender", "contact")
     page_title = "Étudiants"
+    # Le matricule peut être vide : la pagination suit l'ordre d'inscription.
+    keyset_field = "pk"
+    search_fields = ("=matricule", "^last_name", "^first_name", "=contact__email")
+    list_filter = ("gender",)
     create_url_name = "students:student_create"
     detail_url_name = "students:student_detail"
     update_url_name = "students:student_update"
@@ -222,6 +220,16 @@ class StudentCreateView(AcademicAccessMixin, BaseCreateView):
     success_url_name = "students:student_list"
     success_message = "Étudiant créé."
 
+    def get_success_message(self, cleaned_data):
+        # Jeton émis au commit de l'inscription (students.accounts)
+        token = getattr(self.object, "activation_token", None)
+        if token is None:
+            if not self.object.user_id:
+                return "Étudiant créé, sans compte utilisateur (adresse email manquante ou déjà utilisée)."
+            return self.success_message
+        url = self.request.build_absolute_uri(reverse("users:activate", args=[token]))
+        return f"Étudiant créé. Lien d'activation du compte à lui transmettre : {url}"
+
 
 class StudentDetailView(AcademicAccessMixin, BaseDetailView):
     model = Student
@@ -295,6 +303,7 @@ class StudentSponsorDeleteView(AcademicAccessMixin, BaseDeleteView):
 
 class StudentPDFBaseView(RolePermissionMixin, View):
     allowed_roles = RoleGroups.ACADEMIC
+    query_budget = 12
 
 
 class StudentExitCertificatePDFView(StudentPDFBaseView):
@@ -303,87 +312,27 @@ class StudentExitCertificatePDFView(StudentPDFBaseView):
     """
 
     def get(self, request, pk):
-        student = get_object_or_404(
-            Student.objects.select_related("address", "contact", "diploma"),
-            pk=pk,
-        )
-        enrollments = (
-            Enrollment.objects.filter(student=student)
-            .select_related("year", "semester", "faculty", "department")
-            .order_by("year__name", "semester__name")
-        )
-        grade_stats = (
-            Grade.objects.filter(enrollment__student=student)
-            .aggregate(
-                average=Avg("score"),
-                validated_credits=Sum(
-                    "course_offering__course__credits",
-                    filter=Q(score__gte=50),
-                ),
-            )
-        )
-        styles = get_pdf_styles()
-
-        def build():
-            flow = [
-                Paragraph("République Démocratique du Congo", styles["Small"]),
-                Paragraph("ÉTAT DE SORTIE - SYSTÈME LMD", styles["Title"]),
-                Spacer(1, 12),
-            ]
-            identity_rows = [
-                ["Nom complet", f"{student.last_name} {student.first_name}".upper()],
-                ["Matricule", student.matricule or "-"],
-                ["Genre", student.get_gender_display() if hasattr(student, "get_gender_display") else student.gender],
-                ["Nationalité", student.nationality or "-"],
-                ["Date / Lieu de naissance", f"{student.birth_date} - {student.birth_place}"],
-            ]
-            if student.contact:
-                identity_rows.append(["Email", student.contact.email])
-                identity_rows.append(["Téléphone", student.contact.phone_number])
-            flow.append(Paragraph("Informations personnelles", styles["Heading2"]))
-            flow.append(build_table(identity_rows, col_widths=[160, 300]))
-
-            if enrollments:
-                enrollment_table = [
-                    ["Année académique", "Semestre", "Faculté", "Département", "Promotion"],
-                ]
-                for enrollment in enrollments:
-                    enrollment_table.append(
-                        [
-                            enrollment.year.name,
-                            enrollment.semester.name,
-                            enrollment.faculty.name,
-                            enrollment.department.name if enrollment.department else "-",
-                            enrollment.promotion,
-                        ]
-                    )
-                flow.append(Spacer(1, 12))
-                flow.append(Paragraph("Parcours académique", styles["Heading2"]))
-                flow.append(build_table(enrollment_table, header=True))
-
-            summary_rows = [
-                ["Crédits validés", grade_stats["validated_credits"] or 0],
-                [
-                    "Moyenne générale",
-                    f"{grade_stats['average']:.2f}" if grade_stats["average"] is not None else "N/A",
-                ],
-                ["Mention", lmd_mention(grade_stats["average"])],
-                ["Décision", lmd_decision(grade_stats["average"])],
-            ]
-            flow.append(Spacer(1, 12))
-            flow.append(Paragraph("Synthèse académique LMD", styles["Heading2"]))
-            flow.append(build_table(summary_rows, col_widths=[200, 200]))
-
-            flow.append(Spacer(1, 18))
-            flow.append(
-                Paragraph(
-                    "Conformément aux exigences du système LMD en RDC, cet état de sortie atteste du parcours "
-                    "académique de l'étudiant, de la validation des unités d'enseignement et de la décision finale "
-                    "de la faculté.",
-                    styles["BodyText"],
-                )
-            )
-            return flow
+        student = get_object_or_404(Student, pk=pk)
+        job = enqueue("exit_certificate", {"student": student.pk}, request.user)
+        return redirect("reports:job_detail", pk=job.pk)
+
+
+class StudentImportView(AcademicAccessMixin, RolePermissionMixin, FormView):
+    """
+    Dépôt d'un fichier d'étudiants : l'import est exécuté par le worker de
+    rapports, qui produit le rapport d'erreurs ligne par ligne.
+    """
+
+    form_class = StudentImportUploadForm
+    template_name = "generic/form.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["page_title"] = "Import d'étudiants"
+        return context
 
-        filename = f"etat-sortie-{student.matricule or student.pk}.pdf"
-        return build_pdf_response(filename, build)
+    def form_valid(self, form):
+        upload = form.cleaned_data["file"]
+        path = default_storage.save(f"imports/students/{get_valid_filename(upload.name)}", upload)
+        job = enqueue("student_import", {"path": path}, self.request.user)
+        return redirect("reports:job_detail", pk=job.pk)
@@ -0,0 +1,136 @@
+"""
+Lecture des rapports sur un réplica de la base (`REPLICA_DATABASE`).
+
+Seules les lectures explicitement marquées vont au réplica : les vues PDF
+qui n'écrivent rien (`ReplicaReadMixin`), les exports de listes, le calcul
+des compteurs du tableau de bord (`core.kpi`) et les requêtes de lecture des
+rapports (`grades.results.result_reads`). Tout le reste, écritures comprises,
+reste sur `default`. Une lecture qui alimente une écriture (recalcul des
+résultats) se fait sur le primaire (`use_primary`) : lue sur un réplica en
+retard, elle écraserait des données fraîches par des données périmées.
+
+Un réplica est en retard de quelques instants sur le primaire. Après une
+écriture (requête POST, PUT, PATCH ou DELETE), la session est donc épinglée
+au primaire pendant `REPLICA_STICKY_SECONDS` : l'utilisateur qui vient de
+saisir des notes voit ses notes dans la proclamation qu'il demande ensuite.
+Ce délai doit dépasser le retard de réplication.
+
+Sans `REPLICA_DATABASE`, tout est lu sur `default`.
+
+En local, deux fichiers SQLite suffisent : copier la base
+(`sqlite3 db.sqlite3 ".backup replica.sqlite3"`) puis définir
+`DB_REPLICA_NAME=replica.sqlite3`. Les écritures n'atteignant pas la copie,
+on voit directement quelles pages la lisent.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+
+SESSION_KEY = "_db_primary_until"
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+_reading: ContextVar[bool] = ContextVar("db_replica_reading", default=False)
+_pinned: ContextVar[bool] = ContextVar("db_primary_pinned", default=False)
+
+
+def replica_alias() -> str:
+    """Base où lire un rapport maintenant : le réplica, sauf s'il n'y en a pas ou si la session est épinglée."""
+
+    if settings.REPLICA_DATABASE and not _pinned.get():
+        return settings.REPLICA_DATABASE
+    return DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def use_replica(pinned: bool = False) -> Iterator[None]:
+    """
+    Envoie au réplica les lectures du bloc. `pinned` force le primaire (ex.
+    rapport demandé juste après une écriture).
+    """
+
+    pin_token = _pinned.set(_pinned.get() or pinned)
+    read_token = _reading.set(True)
+    try:
+        yield
+    finally:
+        _reading.reset(read_token)
+        _pinned.reset(pin_token)
+
+
+@contextmanager
+def use_primary() -> Iterator[None]:
+    """Envoie au primaire les lectures du bloc, même à l'intérieur d'un bloc `use_replica`."""
+
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class ReplicaReadMixin:
+    """Vue en lecture seule (aucune écriture) dont les requêtes vont au réplica."""
+
+    def dispatch(self, request, *args, **kwargs):
+        with use_replica():
+            return super().dispatch(request, *args, **kwargs)
+
+
+class ReplicaRouter:
+    """Lectures marquées vers le réplica, tout le reste vers `default`."""
+
+    def db_for_read(self, model, **hints):
+        if _reading.get():
+            return replica_alias()
+        # Explicite : un objet lu sur le réplica ne doit pas y entraîner ses relations
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Mêmes données des deux côtés
+        databases = {DEFAULT_DB_ALIAS, settings.REPLICA_DATABASE}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if settings.REPLICA_DATABASE and db == settings.REPLICA_DATABASE:
+            return False
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """
+    Épingle au primaire, pour `REPLICA_STICKY_SECONDS`, la session qui vient
+    d'écrire. À placer après `SessionMiddleware` ; retiré de la chaîne sans
+    réplica.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REPLICA_DATABASE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        session = getattr(request, "session", None)
+        pinned = session is not None and session.get(SESSION_KEY, 0) > time.time()
+        token = _pinned.set(pinned)
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        # Sessions existantes ou ouvertes par la requête (connexion) : les
+        # clients de l'API (JWT) n'en ont pas et ne doivent pas en recevoir
+        if request.method in WRITE_METHODS and session is not None and (session.modified or session.session_key):
+            session[SESSION_KEY] = time.time() + settings.REPLICA_STICKY_SECONDS
+        return response
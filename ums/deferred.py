@@ -0,0 +1,54 @@
+"""
+Recalculs différés au commit de la transaction.
+
+Les signaux d'écriture ajoutent les identifiants touchés à un lot ; le lot
+est traité une seule fois, par le rappel `on_commit` de la transaction
+courante (immédiatement en autocommit). Le lot en attente est attaché à la
+connexion et n'est complété que tant que son rappel y est enregistré et n'a
+pas encore été exécuté : une annulation (transaction ou point de
+sauvegarde) retire le rappel, et le lot avec lui.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Iterable
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+
+class _Batch:
+    def __init__(self, process: Callable[[set[int]], None]):
+        self.process = process
+        self.ids: set[int] = set()
+        self.done = False
+
+    def __call__(self) -> None:
+        self.done = True
+        if self.ids:
+            self.process(self.ids)
+
+
+class DeferredBatch:
+    """Lot d'identifiants traités par `process(ids)` au commit, un lot par connexion."""
+
+    def __init__(self, name: str, process: Callable[[set[int]], None]):
+        self.attribute = f"deferred_{name}"
+        self.process = process
+
+    def add(self, ids: Iterable[int], using: str = DEFAULT_DB_ALIAS) -> None:
+        ids = set(ids)
+        if not ids:
+            return
+        connection = transaction.get_connection(using)
+        batch = getattr(connection, self.attribute, None)
+        if (
+            batch is not None
+            and not batch.done
+            and any(func is batch for _, func, _ in connection.run_on_commit)
+        ):
+            batch.ids.update(ids)
+            return
+        batch = _Batch(self.process)
+        batch.ids.update(ids)
+        setattr(connection, self.attribute, batch)
+        transaction.on_commit(batch, using=using)
@@ -0,0 +1,125 @@
+"""
+Exports tabulaires (CSV, XLSX) des listes génériques.
+
+Les lignes sont produites au fil de l'itération du queryset : le CSV est
+envoyé par morceaux dans une `StreamingHttpResponse`, le classeur XLSX est
+écrit en mode « write-only » d'openpyxl dans un fichier temporaire puis servi
+par `FileResponse`. La mémoire reste constante quel que soit le volume ; le
+classeur est en revanche écrit avant la réponse, d'où le plafond
+`EXPORT_XLSX_MAX_ROWS` au-delà duquel la liste est exportée en CSV.
+
+Un texte commençant par « = », « + », « - » ou « @ » serait évalué comme
+formule par le tableur qui ouvre le fichier (injection de formule) : le CSV
+le préfixe d'une apostrophe, le classeur l'écrit comme texte.
+"""
+
+from __future__ import annotations
+
+import csv
+import datetime
+import tempfile
+from decimal import Decimal
+from typing import Iterable, Iterator, Sequence
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+
+EXPORT_FORMATS = ("csv", "xlsx")
+CSV_CHUNK_ROWS = 500
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class _Echo:
+    """Pseudo-fichier dont `write` renvoie la ligne au lieu de la stocker."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def cell_value(value):
+    """Convertit une valeur de modèle en valeur de cellule (texte pour les objets liés)."""
+
+    if value is None or isinstance(value, (str, int, float, Decimal, bool)):
+        return value
+    if isinstance(value, datetime.datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.replace(tzinfo=None)
+    if isinstance(value, datetime.date):
+        return value
+    return str(value)
+
+
+def is_formula(value) -> bool:
+    return isinstance(value, str) and value.startswith(FORMULA_PREFIXES)
+
+
+def neutralize_formula(value):
+    """Préfixe d'une apostrophe le texte qu'un tableur évaluerait comme formule."""
+
+    return "'" + value if is_formula(value) else value
+
+
+class SafeCsvWriter:
+    """`csv.writer` (séparateur « ; ») dont les cellules ne peuvent pas être des formules."""
+
+    def __init__(self, output):
+        self.writer = csv.writer(output, delimiter=";")
+
+    def writerow(self, row: Iterable):
+        return self.writer.writerow([neutralize_formula(value) for value in row])
+
+
+def iter_csv(header: Sequence[str], rows: Iterable[Sequence]) -> Iterator[str]:
+    """
+    Produit le CSV par blocs de lignes. Séparateur « ; » et BOM UTF-8 pour
+    qu'Excel en configuration française ouvre le fichier directement.
+    """
+
+    writer = SafeCsvWriter(_Echo())
+    yield "\ufeff" + writer.writerow(header)
+    chunk = []
+    for row in rows:
+        chunk.append(writer.writerow(["" if value is None else value for value in row]))
+        if len(chunk) >= CSV_CHUNK_ROWS:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+def csv_response(filename: str, header: Sequence[str], rows: Iterable[Sequence]) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(iter_csv(header, rows), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def write_xlsx(output, title: str, header: Sequence[str], rows: Iterable[Sequence]) -> None:
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title[:31] or "Export")
+    sheet.append(list(header))
+    for row in rows:
+        sheet.append([_text_cell(sheet, value) if is_formula(value) else value for value in row])
+    workbook.save(output)
+
+
+def _text_cell(sheet, value: str) -> WriteOnlyCell:
+    cell = WriteOnlyCell(sheet, value)
+    cell.data_type = "s"
+    return cell
+
+
+def xlsx_response(filename: str, title: str, header: Sequence[str], rows: Iterable[Sequence]) -> FileResponse:
+    """Écrit le classeur dans un fichier temporaire (supprimé à la fermeture) et le sert."""
+
+    output = tempfile.TemporaryFile(suffix=".xlsx")
+    write_xlsx(output, title, header, rows)
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=filename,
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
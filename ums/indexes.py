@@ -0,0 +1,39 @@
+"""
+Index servant les recherches par préfixe des listes (`^champ`, `istartswith`).
+
+Un index ordinaire ne sert pas `istartswith` : SQLite ne l'emploie pour
+`LIKE` que si la colonne est indexée en `COLLATE NOCASE`, et PostgreSQL
+compare `UPPER(colonne) LIKE UPPER('préfixe%')`, qu'il ne sert qu'avec un
+index sur l'expression `UPPER(colonne)` en classe `text_pattern_ops`
+(`OpClass`, d'où `django.contrib.postgres` dans `INSTALLED_APPS`).
+`PrefixSearchIndex` crée l'index qui correspond au SQL de chaque moteur
+(index ordinaire sur les autres, dont MySQL, insensible à la casse par
+défaut). Vérifier avec `EXPLAIN` : SQLite doit répondre `SEARCH ... USING
+INDEX`, pas `SCAN`.
+"""
+
+from __future__ import annotations
+
+from django.contrib.postgres.indexes import OpClass
+from django.db.models import F, Index
+from django.db.models.functions import Collate, Upper
+
+
+class PrefixSearchIndex(Index):
+    def __init__(self, *, field: str, name: str):
+        super().__init__(fields=[field], name=name)
+
+    def deconstruct(self):
+        path, args, kwargs = super().deconstruct()
+        return path, args, {"field": self.fields[0], "name": self.name}
+
+    def create_sql(self, model, schema_editor, using="", **kwargs):
+        vendor = schema_editor.connection.vendor
+        if vendor == "sqlite":
+            expression = Collate(F(self.fields[0]), "NOCASE")
+        elif vendor == "postgresql":
+            expression = OpClass(Upper(self.fields[0]), name="text_pattern_ops")
+        else:
+            return super().create_sql(model, schema_editor, using=using, **kwargs)
+        index = Index(expression, name=self.name)
+        return index.create_sql(model, schema_editor, using=using, **kwargs)
@@ -1,7 +1,24 @@
+import base64
+import binascii
+import json
+from decimal import Decimal
+
+from django import forms
+from django.conf import settings
+from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.messages.views import SuccessMessageMixin
-from django.core.exceptions import PermissionDenied
+from django.core.exceptions import (
+    BadRequest,
+    ImproperlyConfigured,
+    PermissionDenied,
+    ValidationError,
+)
+from django.db import models
+from django.db.models import Q
+from django.http import HttpResponseRedirect
 from django.urls import reverse_lazy
+from django.utils.text import slugify
 from django.views.generic import (
     CreateView,
     UpdateView,
@@ -9,6 +26,10 @@ from django.views.generic import (
     DeleteView,
     ListView,
 )
+from django_filters.filterset import filterset_factory
+
+from .db_router import replica_alias
+from .exports import EXPORT_FORMATS, cell_value, csv_response, xlsx_response
 
 
 class RoleGroups:
@@ -63,15 +84,107 @@ class CrudSuccessUrlMixin:
         return reverse_lazy(self.success_url_name)
 
 
+def str_dependencies(model) -> tuple[str, ...] | None:
+    """
+    Champs lus par `model.__str__`, déclarés par l'attribut `str_fields` du
+    modèle (champs concrets, relations comprises). Retourne None si le modèle
+    redéfinit `__str__` sans les déclarer : l'appelant doit alors charger
+    toutes les colonnes.
+    """
+
+    if model.__str__ is models.Model.__str__:
+        return ()
+    return getattr(model, "str_fields", None)
+
+
+def related_projection(model, field_names, prefix="", depth=0):
+    """
+    Calcule les chemins `select_related` et les colonnes `only()` nécessaires
+    pour afficher `field_names` de `model`, y compris la représentation texte
+    (`__str__`) des objets liés, sur plusieurs niveaux.
+    """
+
+    related = []
+    columns = [f"{prefix}{model._meta.pk.name}"]
+    for name in field_names:
+        field = model._meta.get_field(name)
+        if not field.concrete or field.many_to_many:
+            continue
+        path = f"{prefix}{name}"
+        columns.append(path)
+        if not field.is_relation:
+            continue
+        related.append(path)
+        related_model = field.related_model
+        dependencies = str_dependencies(related_model)
+        if dependencies is None or depth >= 2:
+            # `__str__` sans `str_fields` : l'objet lié est chargé en entier.
+            columns += [f"{path}__{f.name}" for f in related_model._meta.concrete_fields]
+            continue
+        sub_related, sub_columns = related_projection(related_model, dependencies, f"{path}__", depth + 1)
+        related += sub_related
+        columns += sub_columns
+    return related, columns
+
+
+def select_choice_related(fields) -> None:
+    """Charge avec chaque liste de choix les objets liés qu'affiche son `__str__`."""
+
+    for field in fields:
+        queryset = getattr(field, "queryset", None)
+        dependencies = str_dependencies(queryset.model) if queryset is not None else None
+        if dependencies:
+            related, _ = related_projection(queryset.model, dependencies)
+            if related:
+                field.queryset = queryset.select_related(*related)
+
+
 class BaseListView(RolePermissionMixin, ListView):
     """
     Opinionated base `ListView` that prepares context with table meta-data so
     templates can stay generic across apps.
+
+    Lists are paginated by `paginate_by`. Setting `keyset_field` (an indexed,
+    non-null column, prefixed with "-" for descending order) switches to
+    keyset pagination: pages are fetched with `WHERE (field, pk) > cursor`
+    instead of an OFFSET scan, so deep pages cost the same as the first one.
+
+    `search_fields` enables the `?q=` search box. Prefix a field with "^" for a
+    prefix match or "=" for an exact match so the lookup can use the column
+    index (a `ums.indexes.PrefixSearchIndex` for "^"); unprefixed fields fall
+    back to a substring match (full scan). Only follow forward (to-one)
+    relations; they are searched through `IN (subquery)`. `list_filter` lists
+    model fields exposed as django-filter filters above the table;
+    `filterset_class` replaces it when filters need custom lookups (ranges,
+    related fields).
+
+    `?format=csv` or `?format=xlsx` exports the whole filtered list, streamed
+    from the database in chunks of `export_chunk_size` rows. XLSX requests
+    above `EXPORT_XLSX_MAX_ROWS` rows are redirected to the CSV export.
+
+    Related objects shown in `list_display` are joined with `select_related`
+    and only the displayed columns are read (`only()`), including the fields
+    their `__str__` uses as declared by the related model's `str_fields`.
+
+    `query_budget` caps the SQL queries of a page whatever the number of rows;
+    `manage.py benchmark_views` fails when a view exceeds it.
     """
 
     template_name = "generic/list.html"
     page_title: str | None = None
     list_display: list[str] | tuple[str, ...] | None = None
+    paginate_by = 25
+    keyset_field: str | None = None
+    search_fields: tuple[str, ...] = ()
+    list_filter: tuple[str, ...] = ()
+    filterset_class = None
+    filterset = None
+    query_budget = 10
+
+    export_formats: tuple[str, ...] = EXPORT_FORMATS
+    export_chunk_size = 2000
+
+    SEARCH_LOOKUPS = {"^": "istartswith", "=": "exact"}
     create_url_name: str | None = None
     detail_url_name: str | None = None
     update_url_name: str | None = None
@@ -86,19 +199,216 @@ class BaseListView(RolePermissionMixin, ListView):
             if field.name not in ("id",)
         ]
 
+    def get_page_title(self) -> str:
+        return self.page_title or self.model._meta.verbose_name_plural.title()  # type: ignore[attr-defined]
+
+    def get_headers(self) -> list[str]:
+        model = self.model  # type: ignore[attr-defined]
+        return [model._meta.get_field(name).verbose_name.title() for name in self.get_list_display()]
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get("format")
+        if export_format in self.export_formats:
+            return self.export(export_format)
+        return super().get(request, *args, **kwargs)
+
+    def export(self, export_format: str):
+        """
+        Exporte toutes les lignes filtrées, sans pagination, lues sur le
+        réplica (la réponse CSV est produite après le retour de la vue : le
+        queryset porte lui-même la base).
+        """
+
+        queryset = self.get_queryset().using(replica_alias())
+        if self.keyset_field:
+            name = self.keyset_field.lstrip("-")
+            direction = "-" if self.keyset_field.startswith("-") else ""
+            queryset = queryset.order_by(f"{direction}{name}", f"{direction}pk")
+        field_names = self.get_list_display()
+        rows = (
+            [cell_value(getattr(obj, name)) for name in field_names]
+            for obj in queryset.iterator(chunk_size=self.export_chunk_size)
+        )
+        title = self.get_page_title()
+        filename = f"{slugify(title) or 'export'}.{export_format}"
+        if export_format == "xlsx":
+            limit = settings.EXPORT_XLSX_MAX_ROWS
+            if queryset[: limit + 1].count() > limit:
+                # Le classeur est écrit avant la réponse : au-delà, CSV diffusé
+                messages.info(self.request, f"Plus de {limit} lignes : la liste est exportée au format CSV.")
+                params = self.request.GET.copy()
+                params["format"] = "csv"
+                return HttpResponseRedirect(f"?{params.urlencode()}")
+            return xlsx_response(filename, title, self.get_headers(), rows)
+        return csv_response(filename, self.get_headers(), rows)
+
+    def get_queryset(self):
+        """
+        Charge en une requête les objets liés affichés (et ceux qu'utilise
+        leur `__str__`) et limite les colonnes lues à celles du tableau.
+        """
+
+        queryset = self.filter_queryset(self.search_queryset(super().get_queryset()))
+        related, columns = related_projection(queryset.model, self.get_list_display())
+        if self.keyset_field:
+            columns.append(self.keyset_field.lstrip("-"))
+        if related:
+            queryset = queryset.select_related(*related)
+        if not queryset.ordered:
+            queryset = queryset.order_by("pk")
+        return queryset.only(*columns)
+
+    def get_search_query(self) -> str:
+        return self.request.GET.get("q", "").strip()
+
+    def search_queryset(self, queryset):
+        """Chaque mot saisi doit correspondre à au moins un des `search_fields`."""
+
+        terms = self.get_search_query().split()
+        if not self.search_fields or not terms:
+            return queryset
+        lookups = []
+        for field in self.search_fields:
+            lookup = self.SEARCH_LOOKUPS.get(field[0])
+            if lookup:
+                lookups.append(f"{field[1:]}__{lookup}")
+            else:
+                lookups.append(f"{field}__icontains")
+        for term in terms:
+            condition = Q()
+            for lookup in lookups:
+                condition |= self.search_condition(queryset.model, lookup, term)
+            queryset = queryset.filter(condition)
+        return queryset
+
+    @staticmethod
+    def search_condition(model, lookup: str, term: str) -> Q:
+        """
+        Un champ lié est cherché par sous-requête (`fk IN (SELECT ...)`) plutôt
+        que par jointure : chaque branche du OR porte alors sur une colonne
+        indexée de la table listée, et SQLite combine les index au lieu de
+        parcourir la table.
+        """
+
+        head, _, rest = lookup.partition("__")
+        field = model._meta.get_field(head)
+        if not field.is_relation:
+            return Q(**{lookup: term})
+        related = field.related_model
+        condition = BaseListView.search_condition(related, rest, term)
+        return Q(**{f"{head}__in": related._default_manager.filter(condition).values("pk")})
+
+    def filter_queryset(self, queryset):
+        self.filterset = None
+        filterset_class = self.filterset_class
+        if filterset_class is None:
+            if not self.list_filter:
+                return queryset
+            filterset_class = filterset_factory(queryset.model, fields=list(self.list_filter))
+        self.filterset = filterset_class(self.request.GET or None, queryset=queryset, request=self.request)
+        for field in self.filterset.form.fields.values():
+            css = "form-select" if isinstance(field.widget, forms.Select) else "form-control"
+            field.widget.attrs.setdefault("class", f"{css} {css}-sm")
+        select_choice_related(self.filterset.form.fields.values())
+        return self.filterset.qs
+
+    def get_paginate_by(self, queryset):
+        return None if self.keyset_field else self.paginate_by
+
+    @staticmethod
+    def encode_cursor(value, pk) -> str:
+        if hasattr(value, "isoformat"):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = str(value)
+        payload = json.dumps([value, pk], separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str, field):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            value, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            value = field.to_python(value)
+            if value is None:
+                raise ValueError("valeur de curseur nulle")
+            return value, int(pk)
+        except (binascii.Error, ValueError, TypeError, UnicodeDecodeError, ValidationError):
+            raise BadRequest("Curseur de pagination invalide.")
+
+    def paginate_keyset(self, queryset):
+        """
+        Retourne la page demandée par `?after=` / `?before=` et les curseurs
+        des pages voisines, en une requête bornée à `paginate_by` + 1 lignes.
+        """
+
+        name = self.keyset_field.lstrip("-")
+        descending = self.keyset_field.startswith("-")
+        model = queryset.model
+        field = model._meta.pk if name == "pk" else model._meta.get_field(name)
+        if field.null:
+            # Les lignes à NULL ne seraient sur aucune page.
+            raise ImproperlyConfigured(f"{type(self).__name__}.keyset_field doit désigner une colonne non nulle.")
+        after = self.request.GET.get("after")
+        before = self.request.GET.get("before") if not after else None
+        backwards = bool(before)
+        reverse = descending != backwards
+
+        ordering = [name] if name == "pk" else [name, "pk"]
+        queryset = queryset.order_by(*[f"-{key}" if reverse else key for key in ordering])
+        cursor = after or before
+        if cursor:
+            value, pk = self.decode_cursor(cursor, field)
+            lookup = "lt" if reverse else "gt"
+            condition = Q(**{f"pk__{lookup}": pk})
+            if name != "pk":
+                condition = Q(**{f"{name}__{lookup}": value}) | (Q(**{name: value}) & condition)
+            queryset = queryset.filter(condition)
+
+        rows = list(queryset[: self.paginate_by + 1])
+        has_more = len(rows) > self.paginate_by
+        rows = rows[: self.paginate_by]
+        if backwards:
+            rows.reverse()
+
+        has_next = True if backwards else has_more
+        has_previous = has_more if backwards else bool(after)
+        keyset = {
+            "has_next": has_next and bool(rows),
+            "has_previous": has_previous and bool(rows),
+            "next_cursor": self.encode_cursor(getattr(rows[-1], name), rows[-1].pk) if rows else None,
+            "previous_cursor": self.encode_cursor(getattr(rows[0], name), rows[0].pk) if rows else None,
+        }
+        return rows, keyset
+
+    def get_pagination_query(self):
+        """Paramètres GET courants (filtres, recherche) hors pagination."""
+
+        params = self.request.GET.copy()
+        for key in ("page", "after", "before", "format"):
+            params.pop(key, None)
+        return params.urlencode()
+
     def get_context_data(self, **kwargs):
+        keyset = None
+        if self.keyset_field:
+            kwargs["object_list"], keyset = self.paginate_keyset(kwargs.get("object_list", self.object_list))
         context = super().get_context_data(**kwargs)
+        context["keyset"] = keyset
+        context["pagination_query"] = self.get_pagination_query()
+        context["search_enabled"] = bool(self.search_fields)
+        context["search_query"] = self.get_search_query()
+        context["filter"] = self.filterset
+        context["export_formats"] = self.export_formats
         field_names = self.get_list_display()
-        model = self.model  # type: ignore[attr-defined]
-        headers = [model._meta.get_field(name).verbose_name.title() for name in field_names]
         rows = [
             {"pk": obj.pk, "values": [getattr(obj, name) for name in field_names]}
             for obj in context["object_list"]
         ]
         context.update(
             {
-                "page_title": self.page_title or model._meta.verbose_name_plural.title(),
-                "headers": headers,
+                "page_title": self.get_page_title(),
+                "headers": self.get_headers(),
                 "rows": rows,
                 "create_url_name": self.create_url_name,
                 "detail_url_name": self.detail_url_name,
@@ -119,6 +429,7 @@ class BaseListView(RolePermissionMixin, ListView):
 class BaseFormView(RolePermissionMixin, CrudSuccessUrlMixin, SuccessMessageMixin):
     template_name = "generic/form.html"
     page_title: str | None = None
+    query_budget = 12
     success_message = ""
 
     def get_context_data(self, **kwargs):
@@ -132,6 +443,11 @@ class BaseFormView(RolePermissionMixin, CrudSuccessUrlMixin, SuccessMessageMixin
         context["page_title"] = self.page_title or default_title
         return context
 
+    def get_form(self, form_class=None):
+        form = super().get_form(form_class)
+        select_choice_related(form.fields.values())
+        return form
+
 
 class BaseCreateView(BaseFormView, CreateView):
     action_label = "Créer"
@@ -144,6 +460,12 @@ class BaseUpdateView(BaseFormView, UpdateView):
 class BaseDetailView(RolePermissionMixin, DetailView):
     template_name = "generic/detail.html"
     page_title: str | None = None
+    query_budget = 6
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        related, _ = related_projection(queryset.model, [field.name for field in queryset.model._meta.fields])
+        return queryset.select_related(*related) if related else queryset
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -174,6 +496,7 @@ class BaseDetailView(RolePermissionMixin, DetailView):
 class BaseDeleteView(RolePermissionMixin, CrudSuccessUrlMixin, DeleteView):
     template_name = "generic/confirm_delete.html"
     page_title: str | None = None
+    query_budget = 8
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
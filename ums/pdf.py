@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import zipfile
 from io import BytesIO
-from typing import Callable, Iterable
+from typing import Callable, Iterable, Iterator
 
 from django.http import HttpResponse
 from reportlab.lib import colors
@@ -10,14 +11,17 @@ from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.lib.units import cm
 from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 
+from .profiling import timer
 
-def build_pdf_response(filename: str, build_flowables: Callable[[], list]) -> HttpResponse:
+
+def render_pdf(build_flowables: Callable[[], list], output=None) -> bytes | None:
     """
-    Construit une réponse PDF standardisée (A4) à partir d'une fonction qui retourne
-    la liste des flowables ReportLab.
+    Rend un document A4 à partir d'une fonction qui retourne la liste des
+    flowables ReportLab. Sans `output`, retourne les octets du PDF ; sinon
+    écrit dans le fichier fourni.
     """
 
-    buffer = BytesIO()
+    buffer = output if output is not None else BytesIO()
     doc = SimpleDocTemplate(
         buffer,
         pagesize=A4,
@@ -27,16 +31,69 @@ def build_pdf_response(filename: str, build_flowables: Callable[[], list]) -> Ht
         bottomMargin=2 * cm,
     )
     elements = build_flowables()
-    doc.build(elements)
+    with timer("pdf"):
+        doc.build(elements)
+    if output is not None:
+        return None
     pdf = buffer.getvalue()
     buffer.close()
+    return pdf
 
+
+def pdf_response(filename: str, pdf: bytes) -> HttpResponse:
     response = HttpResponse(content_type="application/pdf")
     response["Content-Disposition"] = f'attachment; filename="{filename}"'
     response.write(pdf)
     return response
 
 
+def build_pdf_response(filename: str, build_flowables: Callable[[], list]) -> HttpResponse:
+    """
+    Construit une réponse PDF standardisée (A4) à partir d'une fonction qui retourne
+    la liste des flowables ReportLab.
+    """
+
+    return pdf_response(filename, render_pdf(build_flowables))
+
+
+class _ZipStream:
+    """Tampon en écriture seule que `zipfile` remplit et que l'on vide par morceaux."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(files: Iterable[tuple[str, bytes]]) -> Iterator[bytes]:
+    """
+    Produit une archive ZIP morceau par morceau à partir de couples
+    (nom, contenu), sans jamais conserver l'archive complète en mémoire.
+    """
+
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in files:
+            archive.writestr(name, content)
+            yield stream.drain()
+    yield stream.drain()
+
+
 def get_pdf_styles():
     """
     Retourne un jeu de styles harmonisés avec la charte Bootstrap utilisée par l'app.
@@ -114,6 +171,9 @@ def lmd_decision(score: float | None) -> str:
 
 __all__ = [
     "build_pdf_response",
+    "iter_zip",
+    "pdf_response",
+    "render_pdf",
     "build_table",
     "get_pdf_styles",
     "lmd_mention",
@@ -0,0 +1,157 @@
+"""
+Cache disque des PDF adressé par contenu.
+
+La clé est l'empreinte SHA-256 des données qui alimentent le document (et de
+la version de sa mise en page) : deux demandes aux données identiques
+partagent le même fichier, et toute modification produit une nouvelle clé,
+sans invalidation explicite. L'éviction supprime les fichiers les moins
+récemment servis au-delà de `PDF_CACHE_MAX_BYTES` ; le répertoire n'est
+parcouru que lorsque la taille estimée dépasse le plafond (`_Usage`).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import IO, Callable
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse
+
+EVICT_EVERY = 100
+# Élagage jusqu'à cette fraction du plafond, pour ne pas reparcourir à chaque écriture
+EVICT_TARGET = 0.9
+
+
+def cache_key(*parts) -> str:
+    payload = json.dumps(parts, cls=DjangoJSONEncoder, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cache_path(key: str) -> Path:
+    return Path(settings.PDF_CACHE_DIR) / key[:2] / f"{key}.pdf"
+
+
+class _Usage:
+    """
+    Taille du cache estimée par le processus : le dernier parcours du
+    répertoire plus les écritures depuis. Le répertoire n'est reparcouru (et
+    élagué) que lorsque l'estimation dépasse le plafond, ou toutes les
+    `EVICT_EVERY` écritures pour tenir compte des autres processus.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.total: int | None = None
+        self.writes = 0
+
+    def add(self, size: int) -> None:
+        max_bytes = settings.PDF_CACHE_MAX_BYTES
+        with self.lock:
+            self.writes += 1
+            if self.total is not None:
+                self.total += size
+            if self.total is not None and self.total <= max_bytes and self.writes < EVICT_EVERY:
+                return
+            self.writes = 0
+            self.total = None
+        total = evict(max_bytes)
+        with self.lock:
+            self.total = total
+
+
+_usage = _Usage()
+
+
+def _open_cached(path: Path) -> IO[bytes] | None:
+    """
+    Ouvre le PDF en cache s'il existe. Le fichier est ouvert avant d'être
+    horodaté : une éviction concurrente peut le supprimer, le descripteur
+    ouvert reste lisible.
+    """
+
+    try:
+        handle = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    try:
+        os.utime(path)  # horodatage d'accès pour l'éviction LRU
+    except FileNotFoundError:
+        pass
+    return handle
+
+
+def open_or_render(key: str, render: Callable[[], bytes]) -> IO[bytes]:
+    """
+    Retourne le PDF en cache, ouvert en lecture, en le rendant au premier
+    accès. L'écriture passe par un fichier temporaire renommé atomiquement.
+    """
+
+    path = _cache_path(key)
+    handle = _open_cached(path)
+    if handle is not None:
+        return handle
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pdf = render()
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as handle:
+        handle.write(pdf)
+    os.replace(tmp_name, path)
+    _usage.add(len(pdf))
+    return _open_cached(path) or io.BytesIO(pdf)
+
+
+def evict(max_bytes: int) -> int:
+    """
+    Supprime les PDF les moins récemment utilisés quand le cache dépasse
+    `max_bytes`, jusqu'à `EVICT_TARGET` du plafond. Retourne la taille restante.
+    """
+
+    root = Path(settings.PDF_CACHE_DIR)
+    entries = []
+    total = 0
+    for directory in root.iterdir():
+        if not directory.is_dir():
+            continue
+        for entry in os.scandir(directory):
+            if entry.name.endswith(".pdf"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+    if total <= max_bytes:
+        return total
+
+    target = max_bytes * EVICT_TARGET
+    for _, size, file_path in sorted(entries):
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        if total <= target:
+            break
+    return total
+
+
+def cached_pdf_response(filename: str, key: str, render: Callable[[], bytes]) -> FileResponse:
+    """
+    Sert le PDF depuis le cache via `FileResponse` (envoi de fichier par le
+    serveur WSGI) ; ReportLab n'est sollicité qu'en cas d'absence.
+    """
+
+    return FileResponse(
+        open_or_render(key, render),
+        as_attachment=True,
+        filename=filename,
+        content_type="application/pdf",
+    )
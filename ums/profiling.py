@@ -0,0 +1,229 @@
+"""
+Profilage des requêtes HTTP, activé par `PROFILING_ENABLED` et échantillonné
+(`PROFILING_SAMPLE_RATE`) pour pouvoir rester branché en production.
+
+Pour une requête échantillonnée, `ProfilingMiddleware` mesure :
+
+* les requêtes SQL (nombre et durée) par `execute_wrapper` sur chaque
+  connexion, et les requêtes répétées : même SQL avec des paramètres
+  quelconques, la signature d'un N+1 ;
+* le rendu des gabarits des `TemplateResponse` (requêtes SQL paresseuses
+  comprises) ;
+* la construction des PDF par ReportLab (`timer("pdf")` dans `ums.pdf`).
+
+Les mesures sont envoyées au personnel dans l'en-tête `Server-Timing`
+(onglet réseau du navigateur) et conservées dans un historique borné, en
+mémoire du processus, affiché par la page `core:profiling`. Le temps de
+production d'une réponse en flux (exports, archives) n'est pas compté.
+"""
+
+from __future__ import annotations
+
+import datetime
+import random
+import statistics
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from typing import Iterator, NamedTuple
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+
+from .mixins import RoleGroups
+
+# Rôles qui reçoivent l'en-tête `Server-Timing` et consultent les statistiques
+PROFILING_ROLES = RoleGroups.ALL_STAFF
+REPEATED_QUERIES = 5
+
+_current: ContextVar[RequestProfile | None] = ContextVar("request_profile", default=None)
+
+
+class RequestProfile:
+    """Mesures d'une requête ; sert aussi d'`execute_wrapper` aux connexions."""
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.statements: Counter[str] = Counter()
+        self.timings: defaultdict[str, float] = defaultdict(float)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.sql_count += 1
+            self.statements[sql] += 1
+
+    def repeated(self) -> tuple[tuple[str, int], ...]:
+        return tuple(
+            (sql, count) for sql, count in self.statements.most_common(REPEATED_QUERIES) if count > 1
+        )
+
+    def server_timing(self, duration: float) -> str:
+        metrics = [f'sql;dur={self.sql_time * 1000:.1f};desc="SQL ({self.sql_count})"']
+        metrics += [f"{name};dur={value * 1000:.1f}" for name, value in self.timings.items()]
+        metrics.append(f"total;dur={duration * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+@contextmanager
+def timer(name: str) -> Iterator[None]:
+    """Ajoute la durée du bloc à la mesure `name` de la requête profilée en cours, s'il y en a une."""
+
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.timings[name] += time.perf_counter() - start
+
+
+class ProfileRecord(NamedTuple):
+    timestamp: datetime.datetime
+    method: str
+    path: str
+    view: str
+    status: int
+    duration_ms: float
+    sql_count: int
+    sql_ms: float
+    render_ms: float
+    pdf_ms: float
+    repeated: tuple[tuple[str, int], ...]
+
+
+class ViewStats(NamedTuple):
+    view: str
+    count: int
+    total_ms: float
+    avg_ms: float
+    p95_ms: float
+    max_ms: float
+    avg_sql: float
+    max_sql: int
+    avg_render_ms: float
+    avg_pdf_ms: float
+
+
+class ProfileStore:
+    """Dernières requêtes profilées du processus (historique borné, protégé par un verrou)."""
+
+    def __init__(self, size: int):
+        self._records: deque[ProfileRecord] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, record: ProfileRecord) -> None:
+        with self._lock:
+            self._records.append(record)
+
+    def records(self) -> list[ProfileRecord]:
+        """Du plus récent au plus ancien."""
+
+        with self._lock:
+            return list(reversed(self._records))
+
+    def by_view(self) -> list[ViewStats]:
+        """Statistiques par vue, de celle qui cumule le plus de temps à celle qui en cumule le moins."""
+
+        groups: dict[str, list[ProfileRecord]] = defaultdict(list)
+        for record in self.records():
+            groups[record.view].append(record)
+        stats = []
+        for view, records in groups.items():
+            durations = sorted(record.duration_ms for record in records)
+            stats.append(
+                ViewStats(
+                    view=view,
+                    count=len(records),
+                    total_ms=sum(durations),
+                    avg_ms=statistics.fmean(durations),
+                    p95_ms=durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+                    max_ms=durations[-1],
+                    avg_sql=statistics.fmean(record.sql_count for record in records),
+                    max_sql=max(record.sql_count for record in records),
+                    avg_render_ms=statistics.fmean(record.render_ms for record in records),
+                    avg_pdf_ms=statistics.fmean(record.pdf_ms for record in records),
+                )
+            )
+        return sorted(stats, key=lambda stat: stat.total_ms, reverse=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+
+
+store = ProfileStore(getattr(settings, "PROFILING_HISTORY", 1000))
+
+
+def can_view_profiles(user) -> bool:
+    if not getattr(user, "is_authenticated", False):
+        return False
+    return user.is_superuser or getattr(user, "role", None) in PROFILING_ROLES
+
+
+class ProfilingMiddleware:
+    """Retiré de la chaîne au démarrage si `PROFILING_ENABLED` est faux : aucun coût."""
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.ignored_prefixes = tuple(prefix for prefix in (settings.STATIC_URL, settings.MEDIA_URL) if prefix)
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate or request.path.startswith(self.ignored_prefixes):
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        duration = time.perf_counter() - start
+
+        match = getattr(request, "resolver_match", None)
+        store.add(
+            ProfileRecord(
+                timestamp=timezone.now(),
+                method=request.method,
+                path=request.path,
+                view=match.view_name if match else request.path,
+                status=response.status_code,
+                duration_ms=duration * 1000,
+                sql_count=profile.sql_count,
+                sql_ms=profile.sql_time * 1000,
+                render_ms=profile.timings.get("render", 0.0) * 1000,
+                pdf_ms=profile.timings.get("pdf", 0.0) * 1000,
+                repeated=profile.repeated(),
+            )
+        )
+        if can_view_profiles(getattr(request, "user", None)):
+            response["Server-Timing"] = profile.server_timing(duration)
+        return response
+
+    def process_template_response(self, request, response):
+        profile = _current.get()
+        if profile is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                profile.timings["render"] += time.perf_counter() - start
+
+            response.add_post_render_callback(rendered)
+        return response
@@ -5,8 +5,12 @@ Generated by 'django-admin startproject' using Django 5.2.8.
 """
 
 import os
+from importlib.util import find_spec
 from pathlib import Path
 from datetime import timedelta
+
+import django
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 # Load environment variables from a .env file (for SECRET_KEY, etc.)
@@ -60,15 +64,19 @@ INSTALLED_APPS = [
     "assessments",
     "grades",
     "users",
+    "reports",
+    "api",
 ]
 
 # ------------------------------------------------------
 # MIDDLEWARE
 # ------------------------------------------------------
 MIDDLEWARE = [
+    "ums.profiling.ProfilingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
+    "ums.db_router.ReplicaPinningMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -98,14 +106,86 @@ WSGI_APPLICATION = 'ums.wsgi.application'
 
 
 # ------------------------------------------------------
-# DATABASE (SQLite Configuration)
+# DATABASE
 # ------------------------------------------------------
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE=postgresql in production; SQLite (default) for small deployments
+DB_ENGINE = os.getenv("DB_ENGINE", "sqlite")
+
+if DB_ENGINE == "postgresql":
+    # Operator-class index expressions (ums.indexes.PrefixSearchIndex)
+    INSTALLED_APPS.append("django.contrib.postgres")
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.getenv("DB_NAME", "ums"),
+            "USER": os.getenv("DB_USER", "ums"),
+            "PASSWORD": os.getenv("DB_PASSWORD", ""),
+            "HOST": os.getenv("DB_HOST", "localhost"),
+            "PORT": os.getenv("DB_PORT", "5432"),
+            # Persistent connections (seconds), checked before reuse so that a
+            # connection dropped by the server or a bouncer is replaced
+            "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 600)),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {"connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", 5))},
+        }
+    }
+    # Driver-side pool shared by the threads of a process. Requires Django 5.1
+    # and psycopg 3 with psycopg[pool] (psycopg2 has none); replaces persistent
+    # connections.
+    if os.getenv("DB_POOL", "0") == "1":
+        if django.VERSION < (5, 1) or find_spec("psycopg_pool") is None:
+            raise ImproperlyConfigured("DB_POOL=1 requires Django >= 5.1 and psycopg[binary,pool].")
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+            "timeout": int(os.getenv("DB_POOL_TIMEOUT", 10)),
+        }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.getenv("DB_NAME", BASE_DIR / "db.sqlite3"),
+            "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 60)),
+            "OPTIONS": {},
+        }
+    }
+    # Writers take the lock when the transaction starts: a transaction that
+    # reads then writes waits for its turn instead of failing with "database
+    # is locked" (option added in Django 5.1)
+    if django.VERSION >= (5, 1):
+        DATABASES["default"]["OPTIONS"]["transaction_mode"] = "IMMEDIATE"
+
+# Optional read replica for PDF reports, list exports, dashboard counters and
+# report jobs (ums.db_router): DB_REPLICA_NAME and/or DB_REPLICA_HOST, other
+# settings inherited from default. Locally, a copy of the SQLite file works.
+if os.getenv("DB_REPLICA_NAME") or os.getenv("DB_REPLICA_HOST"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+        # Tests run against default only
+        "TEST": {"MIRROR": "default"},
     }
+    for key in ("NAME", "HOST", "PORT", "USER", "PASSWORD"):
+        if os.getenv(f"DB_REPLICA_{key}"):
+            DATABASES["replica"][key] = os.getenv(f"DB_REPLICA_{key}")
+REPLICA_DATABASE = "replica" if "replica" in DATABASES else None
+# Seconds a session keeps reading the primary after a write (> replication lag)
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 15))
+DATABASE_ROUTERS = ["ums.db_router.ReplicaRouter"]
+
+# Applied to every new SQLite connection (core.signals): busy_timeout (ms)
+# waits for the write lock, mmap_size (bytes) maps the file
+SQLITE_PRAGMAS = {
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", 20000)),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
 }
+# WAL lets readers run alongside the writer instead of failing with "database
+# is locked", and NORMAL syncs at checkpoints only (safe with WAL). WAL is
+# stored in the file itself and adds -wal/-shm files next to it; SQLITE_WAL=0
+# leaves the journal mode untouched (e.g. a read-only copy of the file)
+if os.getenv("SQLITE_WAL", "1") == "1":
+    SQLITE_PRAGMAS.update({"journal_mode": "WAL", "synchronous": "NORMAL"})
 
 
 # ------------------------------------------------------
@@ -120,6 +200,9 @@ LOGIN_URL = "users:login"
 LOGIN_REDIRECT_URL = "core:dashboard"
 LOGOUT_REDIRECT_URL = "users:login"
 
+# Days during which an account activation link stays valid
+ACCOUNT_ACTIVATION_DAYS = int(os.getenv("ACCOUNT_ACTIVATION_DAYS", 30))
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -195,6 +278,60 @@ SPECTACULAR_SETTINGS = {
 }
 
 
+# ------------------------------------------------------
+# LIST EXPORTS
+# ------------------------------------------------------
+# XLSX workbooks are written before the response is sent: larger lists are
+# redirected to the streamed CSV export
+EXPORT_XLSX_MAX_ROWS = int(os.getenv("EXPORT_XLSX_MAX_ROWS", 20000))
+
+
+# ------------------------------------------------------
+# PDF REPORTS
+# ------------------------------------------------------
+# Processes used to render batches of bulletins (1 = render inline)
+BULLETIN_RENDER_WORKERS = int(os.getenv("BULLETIN_RENDER_WORKERS", os.cpu_count() or 1))
+
+# Heavy reports are rendered inline by default. In production, set
+# REPORT_JOBS_ASYNC=1 and run `manage.py run_report_worker` to queue them.
+REPORT_JOBS_ASYNC = os.getenv("REPORT_JOBS_ASYNC", "0") == "1"
+# Worker lease (seconds): a RUNNING job whose worker has not renewed it for
+# this long is requeued by the other workers
+REPORT_JOB_TIMEOUT = int(os.getenv("REPORT_JOB_TIMEOUT", 120))
+
+# Content-addressed cache of rendered receipts and bulletins (LRU eviction)
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", os.path.join(BASE_DIR, "cache", "pdf"))
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+
+# ------------------------------------------------------
+# CACHE & KPI COUNTERS
+# ------------------------------------------------------
+# Per-process memory cache by default; point CACHE_BACKEND/CACHE_LOCATION at a
+# shared backend (e.g. django.core.cache.backends.redis.RedisCache) in production
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "ums"),
+    }
+}
+
+# Dashboard counters are invalidated by signals; this bounds their staleness
+# (seconds) for writes that bypass signals and for per-process caches
+KPI_CACHE_TIMEOUT = int(os.getenv("KPI_CACHE_TIMEOUT", 300))
+
+
+# ------------------------------------------------------
+# REQUEST PROFILING
+# ------------------------------------------------------
+# Opt-in: SQL, template and PDF timings of a sample of requests, sent to staff
+# as Server-Timing headers and listed on the /profiling/ page
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+# Fraction of requests profiled (1 in development, a few percent in production)
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", 0.05))
+# Profiled requests kept in memory by each process for the stats page
+PROFILING_HISTORY = int(os.getenv("PROFILING_HISTORY", 1000))
+
 # ------------------------------------------------------
 # DEFAULT PRIMARY KEY
 # ------------------------------------------------------
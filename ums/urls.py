@@ -32,6 +32,8 @@ urlpatterns = [
     path('grades/', include('grades.urls')),
     path('staff/', include('staff.urls')),
     path('users/', include('users.urls')),
+    path('reports/', include('reports.urls')),
+    path('api/v1/', include('api.urls')),
 ]
 
 if settings.DEBUG:
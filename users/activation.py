@@ -0,0 +1,76 @@
+"""
+Activation des comptes créés sans mot de passe.
+
+Les comptes provisionnés en masse reçoivent un mot de passe inutilisable :
+aucun hachage PBKDF2 n'est calculé à la création. L'utilisateur choisit son
+mot de passe via un lien contenant un jeton à usage unique, dont seule
+l'empreinte est stockée.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import secrets
+from datetime import timedelta
+from typing import Iterable
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ActivationToken
+
+
+def _digest(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def pending_activation_users():
+    """Comptes jamais activés : mot de passe inutilisable et aucune connexion."""
+
+    return get_user_model().objects.filter(
+        password__startswith=UNUSABLE_PASSWORD_PREFIX,
+        last_login__isnull=True,
+        is_active=True,
+    )
+
+
+def issue_activation_tokens(users: Iterable) -> list[tuple[object, str]]:
+    """
+    Émet un nouveau jeton pour chaque utilisateur (les anciens sont
+    révoqués) et retourne les couples `(utilisateur, jeton en clair)`.
+    """
+
+    users = list(users)
+    issued = [(user, secrets.token_urlsafe(32)) for user in users]
+    with transaction.atomic():
+        ActivationToken.objects.filter(user__in=users).delete()
+        ActivationToken.objects.bulk_create(
+            [ActivationToken(user=user, token_hash=_digest(token)) for user, token in issued]
+        )
+    return issued
+
+
+def find_activation_token(token: str) -> ActivationToken | None:
+    """Jeton valide (non utilisé, non expiré) correspondant à `token`, sinon None."""
+
+    limit = timezone.now() - timedelta(days=settings.ACCOUNT_ACTIVATION_DAYS)
+    return (
+        ActivationToken.objects.select_related("user")
+        .filter(token_hash=_digest(token), used_at__isnull=True, created_at__gte=limit, user__is_active=True)
+        .first()
+    )
+
+
+def activate_account(activation: ActivationToken, password: str):
+    """Définit le mot de passe choisi et consomme le jeton."""
+
+    user = activation.user
+    with transaction.atomic():
+        user.set_password(password)
+        user.save(update_fields=["password"])
+        activation.used_at = timezone.now()
+        activation.save(update_fields=["used_at"])
+    return user
@@ -1,6 +1,6 @@
 from django import forms
 from django.contrib.auth import get_user_model
-from django.contrib.auth.forms import AuthenticationForm, PasswordChangeForm
+from django.contrib.auth.forms import AuthenticationForm, PasswordChangeForm, SetPasswordForm
 
 User = get_user_model()
 
@@ -98,3 +98,21 @@ class CustomPasswordChangeForm(PasswordChangeForm):
         })
     )
 
+
+
+class AccountActivationForm(SetPasswordForm):
+    new_password1 = forms.CharField(
+        label="Mot de passe",
+        widget=forms.PasswordInput(attrs={
+            "class": "form-control",
+            "placeholder": "••••••••",
+        }),
+        help_text="Au moins 8 caractères, pas uniquement des chiffres.",
+    )
+    new_password2 = forms.CharField(
+        label="Confirmer le mot de passe",
+        widget=forms.PasswordInput(attrs={
+            "class": "form-control",
+            "placeholder": "••••••••",
+        })
+    )
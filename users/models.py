@@ -97,6 +97,33 @@ class User(AbstractUser):
         """Retourne l'affichage du rôle."""
         return dict(self.ROLE_CHOICES).get(self.role, self.role)
 
+    str_fields = ("first_name", "last_name", "role", "email")
+
     def __str__(self):
         return f'{self.first_name} {self.last_name} ({self.role})' if self.first_name and self.last_name else self.email
 
+
+
+# ====================================================================
+# 3. Activation Tokens
+# ====================================================================
+
+class ActivationToken(models.Model):
+    """
+    Jeton d'activation à usage unique d'un compte créé sans mot de passe.
+    Seule l'empreinte SHA-256 du jeton est conservée.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='activation_token')
+    token_hash = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    used_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('jeton d\'activation')
+        verbose_name_plural = _('jetons d\'activation')
+
+    str_fields = ("user",)
+
+    def __str__(self):
+        return f'Activation {self.user}'
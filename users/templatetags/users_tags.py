@@ -1,11 +1,10 @@
 from django import template
-from django.contrib.auth import get_user_model
+
+from core.kpi import kpi_value
 
 register = template.Library()
-User = get_user_model()
 
 
 @register.simple_tag
 def total_users():
-    return User.objects.count()
-
+    return kpi_value("total_users")
@@ -8,6 +8,7 @@ urlpatterns = [
     # Authentication
     path("login/", views.LoginView.as_view(), name="login"),
     path("logout/", views.LogoutView.as_view(), name="logout"),
+    path("activate/<str:token>/", views.AccountActivationView.as_view(), name="activate"),
     
     # Profile Management
     path("profile/", views.ProfileView.as_view(), name="profile"),
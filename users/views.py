@@ -2,6 +2,7 @@ from django.contrib.auth import get_user_model, login, update_session_auth_hash
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
+from django.http import Http404
 from django.shortcuts import redirect, render
 from django.urls import reverse_lazy
 from django.views.generic import View, TemplateView
@@ -15,7 +16,8 @@ from ums.mixins import (
     RoleGroups,
 )
 
-from .forms import UserForm, LoginForm, ProfileEditForm, CustomPasswordChangeForm
+from .activation import activate_account, find_activation_token
+from .forms import AccountActivationForm, UserForm, LoginForm, ProfileEditForm, CustomPasswordChangeForm
 
 User = get_user_model()
 
@@ -134,3 +136,30 @@ class ChangePasswordView(LoginRequiredMixin, View):
             messages.success(request, "Votre mot de passe a été modifié avec succès.")
             return redirect("users:profile")
         return render(request, self.template_name, {"form": form})
+
+
+class AccountActivationView(View):
+    """Premier choix du mot de passe d'un compte provisionné, via un jeton à usage unique."""
+
+    template_name = "users/activate.html"
+    form_class = AccountActivationForm
+
+    def get_activation(self, token):
+        activation = find_activation_token(token)
+        if activation is None:
+            raise Http404("Lien d'activation invalide ou expiré.")
+        return activation
+
+    def get(self, request, token):
+        activation = self.get_activation(token)
+        form = self.form_class(user=activation.user)
+        return render(request, self.template_name, {"form": form, "account": activation.user})
+
+    def post(self, request, token):
+        activation = self.get_activation(token)
+        form = self.form_class(user=activation.user, data=request.POST)
+        if form.is_valid():
+            activate_account(activation, form.cleaned_data["new_password1"])
+            messages.success(request, "Votre compte est activé. Vous pouvez vous connecter.")
+            return redirect("users:login")
+        return render(request, self.template_name, {"form": form, "account": activation.user})